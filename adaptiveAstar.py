@@ -0,0 +1,205 @@
+"""
+Adaptive A*: repeated searches toward the same goal that learn a better heuristic
+
+After a search reaches the goal at cost g(goal), every cell s it expanded is
+at least g(goal) - g(s) from the goal, since g(s) is exact for an expanded
+cell and a cheaper way on from s would have given a cheaper path. That bound
+is never below the distance heuristic and stays consistent, so later searches
+toward the same goal use the larger of the two and expand fewer cells without
+losing optimality. Learned values are kept per goal.
+
+A cell getting cheaper can make a learned value too large, so any decrease
+drops every table. Cells getting dearer only make the learned values more
+cautious, so those tables are kept. Cells are the cost of entering them and
+0 is a wall, as in astarFix-modified.
+"""
+from collections import OrderedDict
+from warnings import warn
+import heapq
+import math
+import time
+
+from compiledMaze import CompiledMaze
+from movementModels import getMovement
+
+class AdaptiveAstar:
+    """
+    Searches on one maze with a learned heuristic table per goal
+    stats holds the searches run, the cells learned and the times the tables
+    were dropped because a cell got cheaper.
+    """
+
+    def __init__(self, maze, allow_diagonal_movement = False, cacheSize = 64, movement = None):
+        """
+        :param maze: a CompiledMaze or a weighted maze
+        :param allow_diagonal_movement:
+        :param cacheSize: goals whose learned tables are kept
+        :param movement: a movementModels model or model name; its moves, move costs and
+            distance replace allow_diagonal_movement
+        """
+
+        self.compiled = maze if isinstance(maze, CompiledMaze) else CompiledMaze(maze)
+        self.allow_diagonal_movement = allow_diagonal_movement
+        self.movement = getMovement(movement, allow_diagonal_movement)
+        self.steps = self.movement.steps(self.compiled.width)
+        self.cacheSize = cacheSize
+        # goal flat index -> {flat index: learned h}, least recently used first
+        self.tables = OrderedDict()
+        self.stats = {'searches': 0, 'learned': 0, 'invalidations': 0}
+
+    def table(self, goalIndex):
+        learned = self.tables.get(goalIndex)
+        if learned is None:
+            learned = self.tables[goalIndex] = {}
+            if len(self.tables) > self.cacheSize:
+                self.tables.popitem(last=False)
+        else:
+            self.tables.move_to_end(goalIndex)
+        return learned
+
+    def updateCells(self, changes):
+        """
+        Sets the cost of cells; changes is an iterable of ((row, col), cost)
+        Walls opening up and costs going down invalidate the learned tables.
+        """
+
+        cells = self.compiled.cells
+        cheaper = False
+        for (position, cost) in changes:
+            index = self.compiled.index(position)
+            old = cells[index]
+            if cost != 0 and (old == 0 or cost < old):
+                cheaper = True
+            cells[index] = cost
+        if cheaper and self.tables:
+            self.tables.clear()
+            self.stats['invalidations'] += 1
+
+    def search(self, start, end, stats = None):
+        """
+        Returns (path, totalNodes) like astarFix-modified.astar and learns from the search
+        :param start:
+        :param end:
+        :param stats: optional dict that receives the number of nodes expanded
+        :return:
+        """
+
+        compiled = self.compiled
+        cells = compiled.cells
+        rowOf = compiled.rowOf
+        colOf = compiled.colOf
+        startIndex = compiled.index(start)
+        endIndex = compiled.index(end)
+        endRow = rowOf[endIndex]
+        endCol = colOf[endIndex]
+        learned = self.table(endIndex)
+        modelDistance = self.movement.distance
+        distance = lambda i: modelDistance(abs(rowOf[i] - endRow), abs(colOf[i] - endCol))
+
+        def h(i):
+            value = learned.get(i)
+            return distance(i) if value is None else value
+
+        g = {startIndex: 0}
+        parent = {startIndex: -1}
+        closed = []
+        closedSet = set()
+        open_list = [(h(startIndex), 0, 0, startIndex)]
+        counter = 0
+        totalNodes = 0
+        self.stats['searches'] += 1
+
+        while open_list:
+            f, negG, _, current = heapq.heappop(open_list)
+            if current in closedSet:
+                continue
+            closedSet.add(current)
+            closed.append(current)
+
+            # Found the goal
+            if current == endIndex:
+                if stats is not None:
+                    stats['expanded'] = len(closed)
+                goalG = g[current]
+                for index in closed:
+                    value = goalG - g[index]
+                    if value > h(index):
+                        learned[index] = value
+                self.stats['learned'] = sum(len(table) for table in self.tables.values())
+                path = []
+                while current != -1:
+                    path.append(compiled.position(current))
+                    current = parent[current]
+                return (path[::-1], totalNodes)
+
+            currentG = g[current]
+            for (offset, multiplier, sideA, sideB) in self.steps:
+                child = current + offset
+                cost = cells[child]
+                if cost == 0:
+                    continue
+                # a diagonal move that may not squeeze past a wall corner
+                if sideA and (cells[current + sideA] == 0 or cells[current + sideB] == 0):
+                    continue
+                totalNodes += 1
+                if child in closedSet:
+                    continue
+                childG = currentG + cost * multiplier
+                if childG < g.get(child, math.inf):
+                    g[child] = childG
+                    parent[child] = current
+                    counter += 1
+                    heapq.heappush(open_list, (childG + h(child), -childG, counter, child))
+
+        if stats is not None:
+            stats['expanded'] = len(closed)
+        warn("Couldn't get a path to destination")
+        return ([], totalNodes)
+
+
+def main():
+    import random
+    from astarCommon import pathCost
+    from compiledMaze import astarCompiled
+    from mazeGenerators import generate
+
+    terrain = generate('terrain', 128, 128, seed=8)
+    maze = terrain.tolist()
+    walkable = [(r, c) for r in range(len(maze)) for c in range(len(maze[0])) if maze[r][c] != 0]
+    rng = random.Random(8)
+    goal = rng.choice(walkable)
+    starts = rng.sample(walkable, 40)
+
+    adaptive = AdaptiveAstar(maze)
+    startTime = time.perf_counter()
+    adaptiveExpanded = 0
+    for start in starts:
+        stats = {}
+        (path, _) = adaptive.search(start, goal, stats)
+        adaptiveExpanded += stats['expanded']
+    adaptiveSeconds = time.perf_counter() - startTime
+
+    # the same searches without learning: a fresh table every time
+    startTime = time.perf_counter()
+    plainExpanded = 0
+    for start in starts:
+        stats = {}
+        AdaptiveAstar(adaptive.compiled).search(start, goal, stats)
+        plainExpanded += stats['expanded']
+    plainSeconds = time.perf_counter() - startTime
+    print(f'{len(starts)} searches toward {goal}')
+    print(f'Adaptive A*:\n{adaptiveSeconds} ({adaptiveExpanded} expanded, {adaptive.stats})')
+    print(f'A* without learning:\n{plainSeconds} ({plainExpanded} expanded)')
+
+    # a cheaper cell invalidates what was learned; the answer stays optimal
+    (path, _) = adaptive.search(starts[0], goal)
+    (row, col) = path[len(path) // 2]
+    maze[row][col] = 1
+    adaptive.updateCells([((row, col), 1)])
+    (path, _) = adaptive.search(starts[0], goal)
+    (expected, _) = astarCompiled(adaptive.compiled, starts[0], goal)
+    print(f'After lowering {(row, col)} to 1:\ncost {pathCost(maze, path)}, stats {adaptive.stats}, matches A*: {pathCost(maze, path) == pathCost(maze, expected)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Pieces shared by the weighted-maze A* engines
+
+Weighted mazes hold the cost of entering each cell, with 0 meaning a wall.
+"""
+import random
+
+class Node:
+    """
+    A node class for A* Pathfinding
+    """
+
+    def __init__(self, parent=None, position=None, cost=0):
+        self.parent = parent
+        self.position = position
+        self.cost = cost
+
+        self.g = 0
+        self.h = 0
+        self.f = 0
+
+    def __eq__(self, other):
+        return self.position == other.position
+
+    def __repr__(self):
+        return f"{self.position} - g: {self.g} h: {self.h} f: {self.f}"
+
+    # defining less than for purposes of heap queue
+    def __lt__(self, other):
+        return self.f < other.f
+
+    # defining greater than for purposes of heap queue
+    def __gt__(self, other):
+        return self.f > other.f
+
+def return_path(current_node):
+    path = []
+    current = current_node
+    while current is not None:
+        path.append(current.position)
+        current = current.parent
+    return path[::-1]  # Return reversed path
+
+def adjacentSquares(allow_diagonal_movement = False):
+    """Offsets of the cells reachable in one move"""
+    if allow_diagonal_movement:
+        return ((0, -1), (0, 1), (-1, 0), (1, 0), (-1, -1), (-1, 1), (1, -1), (1, 1),)
+    return ((0, -1), (0, 1), (-1, 0), (1, 0),)
+
+def pathCost(maze, path):
+    """Cost of a path the way termMain reports it: the sum of every cell on it, or -1 if there is none"""
+    if not path:
+        return -1
+    cost = 0
+    for node in path:
+        cost += maze[node[0]][node[1]]
+    return cost
+
+def zeroHeuristic(node, endNode):
+    """Heuristic H1: All zeros"""
+    return 0
+
+def manhattanHeuristic(node, endNode):
+    return abs(node.position[0] - endNode.position[0]) + abs(node.position[1] - endNode.position[1])
+
+def modManhattanHeuristic(node, endNode):
+    # This heuristic is still admissible but more accurate; it could be, for example, Manhattan distance multiplied by a constant factor
+    #return 2 * (abs(node.position[0] - end_node.position[0]) + abs(node.position[1] - end_node.position[1]))
+    # multiplies the original sum from the manhattanHeuristic by half the cost of the node
+    return (0.5 * node.cost) * abs(node.position[0] - endNode.position[0]) + abs(node.position[1] - endNode.position[1])
+
+def errorManhattanHeuristic(node, endNode):
+    # Standard Manhattan distance calculation
+    manhattanDistance = manhattanHeuristic(node, endNode)
+    # Generate a random error between -10 and 10, excluding 0
+    error = random.choice(list(range(-10, 0)) + list(range(1, 11)))
+    # Add the error to the Manhattan distance
+    adjustedDistance = manhattanDistance + error
+    # Ensure the heuristic is at least 0
+    if adjustedDistance < 0:
+        adjustedDistance = 0
+    return adjustedDistance
+
+# heuristic numbers as taken by astar() and termMain
+HEURISTICS = {
+    1: zeroHeuristic,
+    2: manhattanHeuristic,
+    3: modManhattanHeuristic,
+    4: errorManhattanHeuristic,
+}
+
+def getHeuristic(heuristic):
+    """Heuristic function for a heuristic number, defaulting to Manhattan distance like astar()"""
+    return HEURISTICS.get(heuristic, manhattanHeuristic)
+
+# how nodes of equal f are ordered in the open list
+TIE_BREAKS = ('none', 'g', 'h', 'fifo', 'lifo', 'cross')
+
+def flatTieKey(tieBreak, rowOf, colOf, startIndex, endIndex):
+    """
+    key(index, g, h, counter) of a tie-breaking policy for the engines on flat indices; lower is popped first
+    counter goes up once per push. 'g' gives None: the engines use -g inline.
+    """
+
+    if tieBreak not in TIE_BREAKS:
+        raise ValueError(f'unknown tie-break {tieBreak!r}, expected one of {", ".join(TIE_BREAKS)}')
+    match tieBreak:
+        case 'g':
+            return None
+        case 'h':
+            return lambda index, g, h, counter: h
+        case 'fifo':
+            return lambda index, g, h, counter: counter
+        case 'lifo':
+            return lambda index, g, h, counter: -counter
+        case 'cross':
+            # prefer cells close to the straight line from start to end
+            dx2 = rowOf[startIndex] - rowOf[endIndex]
+            dy2 = colOf[startIndex] - colOf[endIndex]
+            endRow = rowOf[endIndex]
+            endCol = colOf[endIndex]
+            return lambda index, g, h, counter: abs((rowOf[index] - endRow) * dy2 - dx2 * (colOf[index] - endCol))
+        case _:
+            return lambda index, g, h, counter: 0
@@ -3,6 +3,10 @@ import sys
 from warnings import warn
 import heapq
 import time
+from astarCommon import TIE_BREAKS, manhattanHeuristic, modManhattanHeuristic, errorManhattanHeuristic, pathCost
+from csrGraph import CSRGraph, astarGraph
+from expansionTrace import END, POP, PUSH
+from movementModels import getMovement
 
 class Node:
     """
@@ -17,6 +21,8 @@ class Node:
         self.g = 0
         self.h = 0
         self.f = 0
+        # secondary heap key between nodes of equal f, set by the tie-breaking policy
+        self.tie = 0
 
     def __eq__(self, other):
         return self.position == other.position
@@ -26,11 +32,11 @@ class Node:
 
     # defining less than for purposes of heap queue
     def __lt__(self, other):
-      return self.f < other.f
+      return self.f < other.f or (self.f == other.f and self.tie < other.tie)
     
     # defining greater than for purposes of heap queue
     def __gt__(self, other):
-      return self.f > other.f
+      return self.f > other.f or (self.f == other.f and self.tie > other.tie)
 
 def return_path(current_node):
     path = []
@@ -41,15 +47,82 @@ def return_path(current_node):
     return path[::-1]  # Return reversed path
 
 
-def astar(maze, start, end, heuristic = 2, allow_diagonal_movement = False):
+def tieKey(tieBreak, node, start, end, counter):
+    """Secondary heap key of a node; lower is popped first"""
+    match tieBreak:
+        case 'g':
+            # deeper nodes first: they are closer to finishing a path
+            return -node.g
+        case 'h':
+            return node.h
+        case 'fifo':
+            return counter
+        case 'lifo':
+            return -counter
+        case 'cross':
+            # prefer nodes close to the straight line from start to end
+            dx1 = node.position[0] - end[0]
+            dy1 = node.position[1] - end[1]
+            dx2 = start[0] - end[0]
+            dy2 = start[1] - end[1]
+            return abs(dx1 * dy2 - dx2 * dy1)
+        case _:
+            return 0
+
+def astar(maze, start, end, heuristic = 2, allow_diagonal_movement = False, tieBreak = 'none', stats = None, tracer = None, movement = None,
+          maxCost = None, region = None, bounds = None):
     """
     Returns a list of tuples as a path from the given start to the given end in the given maze
-    :param maze:
+    :param maze: a weighted maze, or a CSRGraph whose labels are used for start, end and the path
     :param start:
     :param end:
+    :param tieBreak: one of TIE_BREAKS, how to order nodes of equal f
+    :param stats: optional dict that receives the number of nodes expanded, and whether
+        maxCost cut the search short when no path is found
+    :param tracer: optional expansionTrace.ExpansionTracer that records every push and pop
+    :param movement: a movementModels model or model name; its moves, move costs and
+        distance replace allow_diagonal_movement and heuristics 2 to 4
+    :param maxCost: only paths whose g (the cells entered after start) is at most this are
+        wanted: a node is dropped once its g plus the movement model's distance to end is higher.
+        That distance never overestimates, so the pruning itself loses no path within budget; but
+        closed nodes are never reopened, so with heuristics 3 and 4, which can overestimate, a node
+        may be closed on a dearer g first and a query can fail although a path within budget exists
+    :param region: optional mask of the maze's shape; the path only uses cells that are true in it
+    :param bounds: optional (top, left, bottom, right) box, inclusive, the path stays inside
     :return:
     """
 
+    if isinstance(maze, CSRGraph):
+        # astarGraph has its own moves and heuristics and none of the options below
+        used = {'allow_diagonal_movement': allow_diagonal_movement, 'tieBreak': tieBreak != 'none', 'stats': stats is not None,
+                'tracer': tracer is not None, 'movement': movement is not None, 'maxCost': maxCost is not None,
+                'region': region is not None, 'bounds': bounds is not None}
+        unsupported = [name for (name, isUsed) in used.items() if isUsed]
+        if unsupported:
+            raise TypeError(f'astar on a CSRGraph does not support {", ".join(unsupported)}')
+        return astarGraph(maze, start, end, heuristic)
+
+    # Queries that cannot succeed fail before searching anything
+    if bounds is not None or region is not None or maxCost is not None:
+        if stats is not None:
+            stats['expanded'] = 0
+            stats['budgetExhausted'] = False
+        for position in (start, end):
+            if bounds is not None and not (bounds[0] <= position[0] <= bounds[2] and bounds[1] <= position[1] <= bounds[3]):
+                warn("Couldn't get a path to destination inside the allowed region")
+                return ([], 0)
+            if region is not None and not region[position[0]][position[1]]:
+                warn("Couldn't get a path to destination inside the allowed region")
+                return ([], 0)
+    # no path can be cheaper than the distance of the movement model, which never overestimates
+    budgetDistance = getMovement(movement, allow_diagonal_movement).heuristic if maxCost is not None else None
+    if maxCost is not None and budgetDistance(start, end) > maxCost:
+        if stats is not None:
+            stats['budgetExhausted'] = True
+        warn("Couldn't get a path to destination within the cost budget")
+        return ([], 0)
+    exhausted = False
+
     # Create start and end node
     start_node = Node(None, start)
     start_node.g = start_node.h = start_node.f = 0
@@ -72,8 +145,17 @@ def astar(maze, start, end, heuristic = 2, allow_diagonal_movement = False):
     adjacent_squares = ((0, -1), (0, 1), (-1, 0), (1, 0),)
     if allow_diagonal_movement:
         adjacent_squares = ((0, -1), (0, 1), (-1, 0), (1, 0), (-1, -1), (-1, 1), (1, -1), (1, 1),)
+    moves = tuple((dy, dx, 1) for (dy, dx) in adjacent_squares)
+    if movement is not None:
+        movement = getMovement(movement)
+        moves = movement.moves
 
     totalNodes = 0
+    # insertion order of the open list, the key of the fifo and lifo tie-breaks
+    pushes = 0
+    cols = len(maze[len(maze)-1])
+    if tracer is not None:
+        tracer.begin(cols, start[0] * cols + start[1])
     # Loop until you find the end
     while len(open_list) > 0:
         outer_iterations += 1
@@ -87,30 +169,47 @@ def astar(maze, start, end, heuristic = 2, allow_diagonal_movement = False):
         # Get the current node
         current_node = heapq.heappop(open_list)
         closed_list.append(current_node)
+        if stats is not None:
+            stats['expanded'] = len(closed_list)
+        if tracer is not None:
+            tracer.record(POP, current_node.position[0] * cols + current_node.position[1], current_node.g, current_node.f)
 
         # Found the goal
         if current_node == end_node:
+            if tracer is not None:
+                tracer.record(END, end[0] * cols + end[1], current_node.g, 0)
             return (return_path(current_node), totalNodes)
 
         # Generate children
         children = []
         
-        for new_position in adjacent_squares: # Adjacent squares
+        for (dy, dx, multiplier) in moves: # Adjacent squares
 
             # Get node position
-            node_position = (current_node.position[0] + new_position[0], current_node.position[1] + new_position[1])
+            node_position = (current_node.position[0] + dy, current_node.position[1] + dx)
 
             # Make sure within range
             if node_position[0] > (len(maze) - 1) or node_position[0] < 0 or node_position[1] > (len(maze[len(maze)-1]) -1) or node_position[1] < 0:
                 continue
 
+            # Make sure inside the allowed region
+            if bounds is not None and not (bounds[0] <= node_position[0] <= bounds[2] and bounds[1] <= node_position[1] <= bounds[3]):
+                continue
+            if region is not None and not region[node_position[0]][node_position[1]]:
+                continue
+
             # Make sure walkable terrain
             if maze[node_position[0]][node_position[1]] == 0:
                 continue
 
+            # Make sure the model lets a diagonal move pass between these cells
+            if movement is not None and not movement.cutsCorners and dy != 0 and dx != 0:
+                if maze[current_node.position[0] + dy][current_node.position[1]] == 0 or maze[current_node.position[0]][current_node.position[1] + dx] == 0:
+                    continue
+
             # Create new node
             totalNodes += 1
-            nodeCost = maze[node_position[0]][node_position[1]]
+            nodeCost = maze[node_position[0]][node_position[1]] * multiplier
             new_node = Node(current_node, node_position, nodeCost)
 
             # Append
@@ -128,6 +227,8 @@ def astar(maze, start, end, heuristic = 2, allow_diagonal_movement = False):
             match heuristic:
                 case 1:
                     child.h = 0
+                case _ if movement is not None:
+                    child.h = movement.heuristic(child.position, end)
                 case 2:
                     child.h = manhattanHeuristic(child, end_node)
                 case 3:
@@ -139,159 +240,35 @@ def astar(maze, start, end, heuristic = 2, allow_diagonal_movement = False):
 
             child.f = child.g + child.h
 
+            # Child cannot reach the end within the budget
+            if maxCost is not None and child.g + budgetDistance(child.position, end) > maxCost:
+                exhausted = True
+                continue
+
             # Child is already in the open list
             if len([open_node for open_node in open_list if child.position == open_node.position and child.g > open_node.g]) > 0:
                 continue
 
             # Add the child to the open list
+            pushes += 1
+            child.tie = tieKey(tieBreak, child, start, end, pushes)
+            if tracer is not None:
+                tracer.record(PUSH, child.position[0] * cols + child.position[1], child.g, child.f)
             heapq.heappush(open_list, child)
 
-    warn("Couldn't get a path to destination")
-    return ([], totalNodes)
-
-#def zeroHeuristic(node, end_node):
-#   """Heuristic H1: All zeros"""
-#  return 0
-
-def manhattanHeuristic(node, endNode):
-    return abs(node.position[0] - endNode.position[0]) + abs(node.position[1] - endNode.position[1])
-
-def modManhattanHeuristic(node, endNode):
-    # This heuristic is still admissible but more accurate; it could be, for example, Manhattan distance multiplied by a constant factor
-    #return 2 * (abs(node.position[0] - end_node.position[0]) + abs(node.position[1] - end_node.position[1]))
-    # multiplies the original sum from the manhattanHeuristic by half the cost of the node
-    return (0.5 * node.cost) * abs(node.position[0] - endNode.position[0]) + abs(node.position[1] - endNode.position[1])
-
-#def errorManhattanHeuristic(node, endnode):
-#    """Heuristic H4: Manhattan distance with error"""
-#    # Add errors from -10 to +10, excluding 0 with a uniform random distribution
-#    error = random.randint(-10, 10)
-#    if error == 0:
-#        error = 1 if random.random() < 0.5 else -1
-#    return max(0, abs(node.position[0] - endnode.position[0]) + abs(node.position[1] - endnode.position[1]) + error)
-
-def errorManhattanHeuristic(node, endNode):
-    # Standard Manhattan distance calculation
-    manhattanDistance = manhattanHeuristic(node, endNode)
-    # Generate a random error between -10 and 10, excluding 0
-    error = random.choice(list(range(-10, 0)) + list(range(1, 11)))
-    # Add the error to the Manhattan distance
-    adjustedDistance = manhattanDistance + error
-    # Ensure the heuristic is at least 0
-    if adjustedDistance < 0:
-        adjustedDistance = 0
-    return adjustedDistance
-
-def termMain(testCase = 1, heuristic = 2):
-    if not (heuristic >= 1 and heuristic <= 4):
-        heuristic = 2
-    match testCase:
-        case '1':
-            maze = [
-                [2, 4, 2, 1, 4, 5, 2],
-                [0, 1, 2, 3, 5, 3, 1],
-                [2, 0, 4, 4, 1, 2, 4],
-                [2, 5, 5, 3, 2, 0, 1],
-                [4, 3, 3, 2, 1, 0, 1]
-            ]
-            start = (1, 2)
-            end = (4, 3)
-        case '2':
-            maze = [
-                [1, 3, 2, 5, 1, 4, 3],
-                [2, 1, 3, 1, 3, 2, 5],
-                [3, 0, 5, 0, 1, 2, 2],
-                [5, 3, 2, 1, 5, 0, 3],
-                [2, 4, 1, 0, 0, 2, 0],
-                [4, 0, 2, 1, 5, 3, 4],
-                [1, 5, 1, 0, 2, 4, 1]
-            ]
-            start = (3, 6)
-            end = (5, 1)
-        case '3':
-            maze = [
-                [2, 0, 2, 0, 2, 0, 0, 2, 2, 0],
-                [1, 2, 3, 5, 2, 1, 2, 5, 1, 2],
-                [2, 0, 2, 2, 1, 2, 1, 2, 4, 2],
-                [2, 0, 1, 0, 1, 1, 1, 0, 0, 1],
-                [1, 1, 0, 0, 5, 0, 3, 2, 2, 2],
-                [2, 2, 2, 2, 1, 0, 1, 2, 1, 0],
-                [1, 0, 2, 1, 3, 1, 4, 3, 0, 1],
-                [2, 0, 5, 1, 5, 2, 1, 2, 4, 1],
-                [1, 2, 2, 2, 0, 2, 0, 1, 1, 0],
-                [5, 1, 2, 1, 1, 1, 2, 0, 1, 2]
-            ]
-            start = (1, 2)
-            end = (8, 8)
-        case '4':
-            maze = [
-                [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-                [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-                [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-                [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-                [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-                [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-                [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-                [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-                [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-                [1, 1, 1, 1, 1, 1, 1, 1, 1, 1]
-            ]
-            start = (0, 0)
-            end = (4, 4)
-        case '5':
-            maze = [
-                [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-                [0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-                [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-                [1, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-                [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-                [0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
-                [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-                [1, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-                [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-                [0, 0, 0, 0, 0, 0, 0, 0, 0, 1]
-            ]
-            start = (0, 0)
-            end = (8, 8)
-        case _: #default
-            maze = [
-                [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
-                [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
-                [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
-                [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
-                [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
-                [0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-                [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
-                [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
-                [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
-                [0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
-            ]
-            start = (0, 0)
-            end = (7, 6)
-    
-    startTime = time.time()
-    (path, totalNodes) = astar(maze, start, end, heuristic)
-    endTime = time.time()
-    if not path:
-        cost = -1
-        path = 'NULL'
+    if tracer is not None:
+        tracer.record(END, end[0] * cols + end[1], 0, -1)
+    if stats is not None:
+        stats['budgetExhausted'] = exhausted
+    if exhausted:
+        warn("Couldn't get a path to destination within the cost budget")
     else:
-        cost = 0
-        for node in path:
-            cost += maze[node[0]][node[1]]
-    print(f'Maze:\n{maze}')
-    print(f'Start:\n{start}')
-    print(f'End:\n{end}')
-    print(f'Heuristic:\n{heuristic}')
-    print(f'Cost of path:\n{cost}')
-    print(f'Path found:\n{path}')
-    print(f'Nodes created:\n{totalNodes}')
-    print(f'Execution time:\n{endTime - startTime}')
-    print()
-
+        warn("Couldn't get a path to destination")
+    return ([], totalNodes)
 
-def main():    
-    maze = [
+# the test mazes of termMain and main(), in main's order: maze, start, end
+SCENARIOS = [
+    ([
         [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
         [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
         [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
@@ -302,59 +279,15 @@ def main():
         [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
         [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
         [0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
-    ]
-    start = (0, 0)
-    end = (7, 6)
-    print(f'{1}')
-    for i in range(4):
-        heuristicNum = i + 1
-        print(f'Heuristic Number:\n{heuristicNum}')
-        startTime = time.time()
-        (path, totalNodes) = astar(maze, start, end, heuristicNum)
-        endTime = time.time()
-        if not path:
-            cost = -1
-            path = 'NULL'
-        else:
-            cost = 0
-            for node in path:
-                cost += maze[node[0]][node[1]]
-        print(f'Cost of path:\n{cost}')
-        print(f'Path found:\n{path}')
-        print(f'Nodes created:\n{totalNodes}')
-        print(f'Execution time:\n{endTime - startTime}')
-        print()
-
-    maze = [
+    ], (0, 0), (7, 6)),
+    ([
         [2, 4, 2, 1, 4, 5, 2],
         [0, 1, 2, 3, 5, 3, 1],
         [2, 0, 4, 4, 1, 2, 4],
         [2, 5, 5, 3, 2, 0, 1],
         [4, 3, 3, 2, 1, 0, 1]
-    ]
-    start = (1, 2)
-    end = (4, 3)
-    print(f'{2}')
-    for i in range(4):
-        heuristicNum = i + 1
-        print(f'Heuristic Number:\n{heuristicNum}')
-        startTime = time.time()
-        (path, totalNodes) = astar(maze, start, end, heuristicNum)
-        endTime = time.time()
-        if not path:
-            cost = -1
-            path = 'NULL'
-        else:
-            cost = 0
-            for node in path:
-                cost += maze[node[0]][node[1]]
-        print(f'Cost of path:\n{cost}')
-        print(f'Path found:\n{path}')
-        print(f'Nodes created:\n{totalNodes}')
-        print(f'Execution time:\n{endTime - startTime}')
-        print()
-
-    maze = [
+    ], (1, 2), (4, 3)),
+    ([
         [1, 3, 2, 5, 1, 4, 3],
         [2, 1, 3, 1, 3, 2, 5],
         [3, 0, 5, 0, 1, 2, 2],
@@ -362,30 +295,8 @@ def main():
         [2, 4, 1, 0, 0, 2, 0],
         [4, 0, 2, 1, 5, 3, 4],
         [1, 5, 1, 0, 2, 4, 1]
-    ]
-    start = (3, 6)
-    end = (5, 1)
-    print(f'{3}')
-    for i in range(4):
-        heuristicNum = i + 1
-        print(f'Heuristic Number:\n{heuristicNum}')
-        startTime = time.time()
-        (path, totalNodes) = astar(maze, start, end, heuristicNum)
-        endTime = time.time()
-        if not path:
-            cost = -1
-            path = 'NULL'
-        else:
-            cost = 0
-            for node in path:
-                cost += maze[node[0]][node[1]]
-        print(f'Cost of path:\n{cost}')
-        print(f'Path found:\n{path}')
-        print(f'Nodes created:\n{totalNodes}')
-        print(f'Execution time:\n{endTime - startTime}')
-        print()
-
-    maze = [
+    ], (3, 6), (5, 1)),
+    ([
         [2, 0, 2, 0, 2, 0, 0, 2, 2, 0],
         [1, 2, 3, 5, 2, 1, 2, 5, 1, 2],
         [2, 0, 2, 2, 1, 2, 1, 2, 4, 2],
@@ -396,31 +307,9 @@ def main():
         [2, 0, 5, 1, 5, 2, 1, 2, 4, 1],
         [1, 2, 2, 2, 0, 2, 0, 1, 1, 0],
         [5, 1, 2, 1, 1, 1, 2, 0, 1, 2]
-    ]
-    start = (1, 2)
-    end = (8, 8)
-    print(f'{4}')
-    for i in range(4):
-        heuristicNum = i + 1
-        print(f'Heuristic Number:\n{heuristicNum}')
-        startTime = time.time()
-        (path, totalNodes) = astar(maze, start, end, heuristicNum)
-        endTime = time.time()
-        if not path:
-            cost = -1
-            path = 'NULL'
-        else:
-            cost = 0
-            for node in path:
-                cost += maze[node[0]][node[1]]
-        print(f'Cost of path:\n{cost}')
-        print(f'Path found:\n{path}')
-        print(f'Nodes created:\n{totalNodes}')
-        print(f'Execution time:\n{endTime - startTime}')
-        print()
-
+    ], (1, 2), (8, 8)),
     # my test
-    maze = [
+    ([
         [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
         [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
         [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
@@ -431,30 +320,8 @@ def main():
         [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
         [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
         [1, 1, 1, 1, 1, 1, 1, 1, 1, 1]
-    ]
-    start = (0, 0)
-    end = (4, 4)
-    print(f'{5}')
-    for i in range(4):
-        heuristicNum = i + 1
-        print(f'Heuristic Number:\n{heuristicNum}')
-        startTime = time.time()
-        (path, totalNodes) = astar(maze, start, end, heuristicNum)
-        endTime = time.time()
-        if not path:
-            cost = -1
-            path = 'NULL'
-        else:
-            cost = 0
-            for node in path:
-                cost += maze[node[0]][node[1]]
-        print(f'Cost of path:\n{cost}')
-        print(f'Path found:\n{path}')
-        print(f'Nodes created:\n{totalNodes}')
-        print(f'Execution time:\n{endTime - startTime}')
-        print()
-
-    maze = [
+    ], (0, 0), (4, 4)),
+    ([
         [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
         [0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
         [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
@@ -465,33 +332,99 @@ def main():
         [1, 0, 0, 0, 0, 0, 0, 0, 0, 0],
         [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
         [0, 0, 0, 0, 0, 0, 0, 0, 0, 1]
-    ]
-    start = (0, 0)
-    end = (8, 8)
-    print(f'{6}')
-    for i in range(4):
-        heuristicNum = i + 1
-        print(f'Heuristic Number:\n{heuristicNum}')
-        startTime = time.time()
-        (path, totalNodes) = astar(maze, start, end, heuristicNum)
-        endTime = time.time()
-        if not path:
-            cost = -1
-            path = 'NULL'
-        else:
-            cost = 0
-            for node in path:
-                cost += maze[node[0]][node[1]]
-        print(f'Cost of path:\n{cost}')
-        print(f'Path found:\n{path}')
-        print(f'Nodes created:\n{totalNodes}')
-        print(f'Execution time:\n{endTime - startTime}')
-        print()
+    ], (0, 0), (8, 8)),
+]
+
+def runScenario(task):
+    """
+    Runs one test case with one heuristic; the worker of runMatrix
+    :param task: (scenario number, heuristic, seed); a seed of None leaves random as it is
+    :return: dict with scenario, heuristic, cost, path, totalNodes and seconds
+    """
+
+    (scenario, heuristic, seed) = task
+    (maze, start, end) = SCENARIOS[scenario]
+    # heuristic 4 draws its errors from random, so a seeded run gives the same result in any process
+    if seed is not None:
+        random.seed(seed)
+    startTime = time.time()
+    (path, totalNodes) = astar(maze, start, end, heuristic)
+    endTime = time.time()
+    return {
+        'scenario': scenario,
+        'heuristic': heuristic,
+        'cost': pathCost(maze, path),
+        'path': path,
+        'totalNodes': totalNodes,
+        'seconds': endTime - startTime,
+    }
+
+def runMatrix(scenarios = None, heuristics = (1, 2, 3, 4), workers = None, seed = 0):
+    """
+    Every heuristic on every test case, spread over a process pool
+    Results come back ordered by scenario, then heuristic, however the runs
+    were scheduled. Each run is seeded from seed and its place in the matrix,
+    so parallel and serial runs agree.
+    :param scenarios: scenario numbers, default all of SCENARIOS
+    :param heuristics:
+    :param workers: processes to use; 1 runs everything in this process
+    :param seed:
+    :return: list of runScenario results
+    """
+
+    if scenarios is None:
+        scenarios = range(len(SCENARIOS))
+    tasks = [(scenario, heuristic, seed * 1000 + scenario * 10 + heuristic) for scenario in scenarios for heuristic in heuristics]
+    if workers == 1:
+        return [runScenario(task) for task in tasks]
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(runScenario, tasks))
+
+def renderText(results):
+    """The results as task2.txt lays them out: a header per test case, a block per heuristic"""
+    lines = []
+    scenario = None
+    for result in results:
+        if result['scenario'] != scenario:
+            scenario = result['scenario']
+            lines.append(f'{scenario + 1}')
+        lines.append(f'Heuristic Number:\n{result["heuristic"]}')
+        lines.append(f'Cost of path:\n{result["cost"]}')
+        lines.append(f'Path found:\n{result["path"] or "NULL"}')
+        lines.append(f'Nodes created:\n{result["totalNodes"]}')
+        lines.append(f'Execution time:\n{result["seconds"]}')
+        lines.append('')
+    return '\n'.join(lines) + '\n'
+
+def termMain(testCase = 1, heuristic = 2):
+    if not (heuristic >= 1 and heuristic <= 4):
+        heuristic = 2
+    # cases '1' to '5' are main's tests 2 to 6; anything else, the int default included, is its first
+    scenario = int(testCase) if testCase in ('1', '2', '3', '4', '5') else 0
+    (maze, start, end) = SCENARIOS[scenario]
+    result = runScenario((scenario, heuristic, None))
+    print(f'Maze:\n{maze}')
+    print(f'Start:\n{start}')
+    print(f'End:\n{end}')
+    print(f'Heuristic:\n{heuristic}')
+    print(f'Cost of path:\n{result["cost"]}')
+    print(f'Path found:\n{result["path"] or "NULL"}')
+    print(f'Nodes created:\n{result["totalNodes"]}')
+    print(f'Execution time:\n{result["seconds"]}')
+    print()
+
+
+def main(workers = None):
+    print(renderText(runMatrix(workers=workers)), end='')
 
 if __name__ == '__main__':
     args = sys.argv[1:]
     if len(args) < 1:
         print(f'NO ARGUMENTS WERE GIVEN')
+    elif args[0] == 'all' and len(args) <= 2:
+        # every test case with every heuristic, in a pool of WORKERS processes
+        main(int(args[1]) if len(args) == 2 else None)
     elif len(args) != 2:
         print(f'INVALID ARGUMENTS WERE GIVEN (RECEIVED {len(args)} ARGUMENTS, BUT TAKES 2 ARGUMENTS)')
     elif int(args[0]) <= 5 and int(args[1]) <= 4:
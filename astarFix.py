@@ -2,6 +2,7 @@
 # as found at https://medium.com/@nicholas.w.swift/easy-a-star-pathfinding-7e6689c7f7b2
 from warnings import warn
 import heapq
+import math
 
 class Node:
     """
@@ -39,15 +40,20 @@ def return_path(current_node):
     return path[::-1]  # Return reversed path
 
 
-def astar(maze, start, end, allow_diagonal_movement = False):
+def astar(maze, start, end, allow_diagonal_movement = False, max_nodes = None, stats = None):
     """
     Returns a list of tuples as a path from the given start to the given end in the given maze
     :param maze:
     :param start:
     :param end:
+    :param max_nodes: if given, run the memory-bounded SMA* search with this many nodes at most
+    :param stats: optional dict that receives the number of nodes expanded
     :return:
     """
 
+    if max_nodes is not None:
+        return smastar(maze, start, end, max_nodes, allow_diagonal_movement, stats)
+
     # Create start and end node
     start_node = Node(None, start)
     start_node.g = start_node.h = start_node.f = 0
@@ -84,6 +90,8 @@ def astar(maze, start, end, allow_diagonal_movement = False):
         # Get the current node
         current_node = heapq.heappop(open_list)
         closed_list.append(current_node)
+        if stats is not None:
+            stats['expanded'] = len(closed_list)
 
         # Found the goal
         if current_node == end_node:
@@ -132,6 +140,214 @@ def astar(maze, start, end, allow_diagonal_movement = False):
     warn("Couldn't get a path to destination")
     return None
 
+class SMANode(Node):
+    """
+    A node class for SMA* Pathfinding
+
+    On top of the plain A* node it remembers which successors are still to be
+    generated, which children are currently in memory and the backed-up f of
+    every child that had to be forgotten.
+    """
+
+    def __init__(self, parent=None, position=None, depth=0):
+        super().__init__(parent, position)
+        self.depth = depth
+        self.children = []
+        self.pending = None
+        self.forgotten = {}
+        self.in_open = False
+        self.in_memory = True
+        self.stamp = 0
+
+    # nodes are kept in several containers at once, so hash by identity
+    __hash__ = object.__hash__
+
+
+def smastar(maze, start, end, max_nodes, allow_diagonal_movement = False, stats = None):
+    """
+    Memory-bounded A* (SMA*): never keeps more than max_nodes nodes in memory
+    When the budget is full the shallowest, highest-f leaf is forgotten and its
+    f-value is backed up into its parent, which regenerates it later if needed.
+    A path is returned whenever one with at most max_nodes cells exists.
+    :param maze:
+    :param start:
+    :param end:
+    :param max_nodes: maximum number of nodes held in memory (at least 2)
+    :param stats: optional dict that receives the number of expansions, one per successor generated
+    :return:
+    """
+
+    if max_nodes < 2:
+        raise ValueError("max_nodes must be at least 2")
+
+    # what squares do we search
+    adjacent_squares = ((0, -1), (0, 1), (-1, 0), (1, 0),)
+    if allow_diagonal_movement:
+        adjacent_squares = ((0, -1), (0, 1), (-1, 0), (1, 0), (-1, -1), (-1, 1), (1, -1), (1, 1),)
+
+    # admissible heuristic for unit step costs, so backed-up values stay meaningful
+    def heuristic(position):
+        dy = abs(position[0] - end[0])
+        dx = abs(position[1] - end[1])
+        if allow_diagonal_movement:
+            return max(dy, dx)
+        return dy + dx
+
+    # both queues are lazy: an entry is only valid while its stamp matches the node
+    best_queue = []
+    worst_queue = []
+    counter = 0
+
+    def push_open(node):
+        nonlocal counter
+        counter += 1
+        node.stamp = counter
+        node.in_open = True
+        heapq.heappush(best_queue, (node.f, -node.depth, counter, node))
+        if not node.children:
+            heapq.heappush(worst_queue, (-node.f, node.depth, counter, node))
+
+    def peek_best():
+        while best_queue:
+            f, _, stamp, node = best_queue[0]
+            if node.in_memory and node.in_open and stamp == node.stamp:
+                return node
+            heapq.heappop(best_queue)
+        return None
+
+    def pop_worst_leaf(keep):
+        skipped = []
+        worst = None
+        while worst_queue:
+            entry = heapq.heappop(worst_queue)
+            node = entry[3]
+            if not (node.in_memory and node.in_open and not node.children and entry[2] == node.stamp):
+                continue
+            if node is keep or node.parent is None:
+                # never forget the node being expanded or the root
+                skipped.append(entry)
+                continue
+            worst = node
+            break
+        for entry in skipped:
+            heapq.heappush(worst_queue, entry)
+        return worst
+
+    def backup(node):
+        # a fully generated node is worth the best of its children, known or forgotten
+        while node is not None and not node.pending:
+            values = [child.f for child in node.children] + list(node.forgotten.values())
+            new_f = min(values) if values else math.inf
+            if new_f == node.f:
+                break
+            node.f = new_f
+            if node.in_open:
+                push_open(node)
+            node = node.parent
+
+    root = SMANode(None, start)
+    root.h = root.f = heuristic(start)
+    push_open(root)
+    resident = {start: root}
+    used = 1
+
+    if stats is not None:
+        stats['expanded'] = 0
+    while True:
+        # Get the deepest lowest-f node
+        current_node = peek_best()
+        if current_node is None or current_node.f == math.inf:
+            warn("Couldn't get a path to destination within the memory budget")
+            return None
+        if stats is not None:
+            stats['expanded'] += 1
+
+        # Found the goal
+        if current_node.position == end:
+            return return_path(current_node)
+
+        # Generate the list of successors the first time the node is expanded
+        if current_node.pending is None:
+            current_node.pending = []
+            for new_position in adjacent_squares: # Adjacent squares
+                node_position = (current_node.position[0] + new_position[0], current_node.position[1] + new_position[1])
+                if node_position[0] > (len(maze) - 1) or node_position[0] < 0 or node_position[1] > (len(maze[len(maze)-1]) -1) or node_position[1] < 0:
+                    continue
+                if maze[node_position[0]][node_position[1]] != 0:
+                    continue
+                current_node.pending.append(node_position)
+
+        # Pick the next successor: a new one first, then the best forgotten one
+        child = None
+        while current_node.pending:
+            node_position = current_node.pending.pop(0)
+            # skip cells already held in memory on an equal or cheaper route
+            other = resident.get(node_position)
+            if other is not None and other.g <= current_node.g + 1:
+                continue
+            child = SMANode(current_node, node_position, current_node.depth + 1)
+            child.g = current_node.g + 1
+            child.h = heuristic(node_position)
+            child.f = max(current_node.f, child.g + child.h)
+            break
+        if child is None and current_node.forgotten:
+            node_position = min(current_node.forgotten, key=current_node.forgotten.get)
+            child = SMANode(current_node, node_position, current_node.depth + 1)
+            child.g = current_node.g + 1
+            child.h = heuristic(node_position)
+            child.f = current_node.forgotten.pop(node_position)
+
+        if child is None:
+            # nothing left to generate: the node is only worth its children now
+            if current_node.children:
+                current_node.in_open = False
+                backup(current_node)
+            else:
+                # dead end: keep it as an infinite leaf so it is forgotten first
+                current_node.f = math.inf
+                push_open(current_node)
+                backup(current_node.parent)
+            continue
+
+        # a node at the depth limit can never reach the goal within the budget
+        if child.position != end and child.depth >= max_nodes - 1:
+            child.f = math.inf
+
+        current_node.children.append(child)
+
+        # Make room by forgetting the shallowest highest-f leaf
+        if used >= max_nodes:
+            worst = pop_worst_leaf(current_node)
+            if worst is None:
+                # only the current path is in memory; the child cannot be kept
+                current_node.children.pop()
+                current_node.forgotten[child.position] = math.inf
+                push_open(current_node)
+                backup(current_node)
+                continue
+            parent = worst.parent
+            parent.children.remove(worst)
+            parent.forgotten[worst.position] = worst.f
+            worst.in_memory = False
+            worst.in_open = False
+            if resident.get(worst.position) is worst:
+                del resident[worst.position]
+            used -= 1
+            # the parent has something to regenerate again
+            push_open(parent)
+
+        other = resident.get(child.position)
+        if other is None or child.g < other.g:
+            resident[child.position] = child
+        used += 1
+        push_open(child)
+
+        # all successors have been generated once: back up and leave the open list
+        if not current_node.pending and not current_node.forgotten:
+            current_node.in_open = False
+        backup(current_node)
+
+
 def main():
     maze = [
         [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
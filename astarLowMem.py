@@ -0,0 +1,209 @@
+"""
+Low-memory alternatives to the heap based astar() for weighted mazes
+
+Both engines take the same heuristic numbers as astarFix-modified.astar and
+return the same (path, totalNodes) pair, so they can be swapped in directly.
+They pay off on narrow corridor mazes, where the open list of A* holds little
+but the closed list still grows with every cell visited.
+"""
+from warnings import warn
+import math
+
+from astarCommon import Node, return_path, adjacentSquares, getHeuristic
+
+
+def idastar(maze, start, end, heuristic = 2, allow_diagonal_movement = False, tableSize = 65536):
+    """
+    Iterative deepening A*: repeated depth-first searches bounded by an f threshold
+    Memory is the current path plus a transposition table of at most tableSize
+    cells, which stops the depth-first search re-expanding cells it has already
+    reached more cheaply during the same iteration.
+    :param maze:
+    :param start:
+    :param end:
+    :param heuristic:
+    :param allow_diagonal_movement:
+    :param tableSize: maximum entries in the transposition table, 0 disables it
+    :return:
+    """
+
+    heuristicFunc = getHeuristic(heuristic)
+    adjacent_squares = adjacentSquares(allow_diagonal_movement)
+    rows = len(maze)
+    cols = len(maze[rows - 1])
+
+    start_node = Node(None, start, maze[start[0]][start[1]])
+    end_node = Node(None, end)
+    start_node.h = heuristicFunc(start_node, end_node)
+    start_node.f = start_node.g + start_node.h
+    threshold = start_node.f
+
+    totalNodes = 0
+    while True:
+        nextThreshold = math.inf
+        table = {start: 0}
+        onPath = {start}
+        # every frame is a node and the successors still to try from it
+        stack = [(start_node, iter(adjacent_squares))]
+
+        while stack:
+            current_node, moves = stack[-1]
+
+            # Found the goal
+            if current_node == end_node:
+                return (return_path(current_node), totalNodes)
+
+            child = None
+            for new_position in moves:
+                # Get node position
+                node_position = (current_node.position[0] + new_position[0], current_node.position[1] + new_position[1])
+
+                # Make sure within range and walkable terrain
+                if node_position[0] > (rows - 1) or node_position[0] < 0 or node_position[1] > (cols - 1) or node_position[1] < 0:
+                    continue
+                nodeCost = maze[node_position[0]][node_position[1]]
+                if nodeCost == 0 or node_position in onPath:
+                    continue
+
+                g = current_node.g + nodeCost
+                # Reached before on a path at least as cheap
+                if table.get(node_position, math.inf) <= g:
+                    continue
+
+                totalNodes += 1
+                new_node = Node(current_node, node_position, nodeCost)
+                new_node.g = g
+                new_node.h = heuristicFunc(new_node, end_node)
+                new_node.f = new_node.g + new_node.h
+
+                # Beyond the threshold: remember the smallest overshoot for the next iteration
+                if new_node.f > threshold:
+                    nextThreshold = min(nextThreshold, new_node.f)
+                    continue
+
+                if node_position in table or len(table) < tableSize:
+                    table[node_position] = g
+                child = new_node
+                break
+
+            if child is None:
+                # Every successor tried, backtrack
+                stack.pop()
+                onPath.discard(current_node.position)
+            else:
+                onPath.add(child.position)
+                stack.append((child, iter(adjacent_squares)))
+
+        if nextThreshold == math.inf:
+            warn("Couldn't get a path to destination")
+            return ([], totalNodes)
+        threshold = nextThreshold
+
+
+def fringeSearch(maze, start, end, heuristic = 2, allow_diagonal_movement = False):
+    """
+    Fringe Search: A* ordering approximated by f-limited passes over a plain list
+    There is no priority queue; nodes over the current f limit are deferred to the
+    next pass and the limit is raised to the smallest f seen. The cache of best g
+    per cell doubles as the transposition table.
+    :param maze:
+    :param start:
+    :param end:
+    :param heuristic:
+    :param allow_diagonal_movement:
+    :return:
+    """
+
+    heuristicFunc = getHeuristic(heuristic)
+    adjacent_squares = adjacentSquares(allow_diagonal_movement)
+    rows = len(maze)
+    cols = len(maze[rows - 1])
+
+    start_node = Node(None, start, maze[start[0]][start[1]])
+    end_node = Node(None, end)
+    start_node.h = heuristicFunc(start_node, end_node)
+    start_node.f = start_node.g + start_node.h
+
+    cache = {start: start_node}
+    now = [start_node]
+    flimit = start_node.f
+
+    totalNodes = 0
+    while now:
+        fmin = math.inf
+        later = []
+        while now:
+            current_node = now.pop()
+
+            # A cheaper route to this cell has been queued since
+            if cache[current_node.position] is not current_node:
+                continue
+
+            # Over the limit: try again on the next pass
+            if current_node.f > flimit:
+                fmin = min(fmin, current_node.f)
+                later.append(current_node)
+                continue
+
+            # Found the goal
+            if current_node == end_node:
+                return (return_path(current_node), totalNodes)
+
+            # Children are pushed in reverse so they are visited in adjacent_squares order
+            for new_position in reversed(adjacent_squares):
+                node_position = (current_node.position[0] + new_position[0], current_node.position[1] + new_position[1])
+
+                if node_position[0] > (rows - 1) or node_position[0] < 0 or node_position[1] > (cols - 1) or node_position[1] < 0:
+                    continue
+                nodeCost = maze[node_position[0]][node_position[1]]
+                if nodeCost == 0:
+                    continue
+
+                g = current_node.g + nodeCost
+                cached = cache.get(node_position)
+                if cached is not None and cached.g <= g:
+                    continue
+
+                totalNodes += 1
+                new_node = Node(current_node, node_position, nodeCost)
+                new_node.g = g
+                new_node.h = heuristicFunc(new_node, end_node)
+                new_node.f = new_node.g + new_node.h
+                cache[node_position] = new_node
+                now.append(new_node)
+
+        # keep the deferred nodes in the order they were met
+        later.reverse()
+        now = later
+        flimit = fmin
+
+    warn("Couldn't get a path to destination")
+    return ([], totalNodes)
+
+
+def main():
+    maze = [
+        [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
+        [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
+        [1, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
+        [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
+        [1, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 1]
+    ]
+    start = (0, 0)
+    end = (8, 8)
+
+    for engine in (idastar, fringeSearch):
+        (path, totalNodes) = engine(maze, start, end)
+        print(f'{engine.__name__}')
+        print(f'Path found:\n{path}')
+        print(f'Nodes created:\n{totalNodes}')
+        print()
+
+
+if __name__ == '__main__':
+    main()
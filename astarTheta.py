@@ -0,0 +1,185 @@
+"""
+Any-angle pathfinding (Theta* and Lazy Theta*) for the 0/1 mazes of astarFix
+
+Instead of stepping from cell to cell, a node may take its grandparent as
+parent whenever the two can see each other, so the returned path is a short
+list of waypoints joined by straight segments rather than a zig-zag of grid
+moves. 0 is walkable terrain and anything else is a wall, as in astarFix.
+"""
+from warnings import warn
+import heapq
+import math
+
+from astarCommon import adjacentSquares
+
+class LineOfSight:
+    """
+    Bresenham line-of-sight checks between cell centres with a result cache
+    A line is blocked if it enters a wall, or if a diagonal step squeezes
+    between two cells of which either is a wall. The cache can be kept and
+    passed to several queries on the same maze.
+    """
+
+    def __init__(self, maze, cacheSize = 1 << 16):
+        self.maze = maze
+        self.cacheSize = cacheSize
+        self.cache = {}
+        self.checks = 0
+        self.hits = 0
+
+    def walkable(self, position):
+        return 0 <= position[0] < len(self.maze) and 0 <= position[1] < len(self.maze[0]) and self.maze[position[0]][position[1]] == 0
+
+    def __call__(self, a, b):
+        # the line is symmetric, so store each pair once
+        key = (a, b) if a <= b else (b, a)
+        self.checks += 1
+        result = self.cache.get(key)
+        if result is not None:
+            self.hits += 1
+            return result
+        result = self.bresenham(key[0], key[1])
+        if len(self.cache) >= self.cacheSize:
+            self.cache.clear()
+        self.cache[key] = result
+        return result
+
+    def bresenham(self, a, b):
+        maze = self.maze
+        (r, c) = a
+        dr = abs(b[0] - r)
+        dc = abs(b[1] - c)
+        sr = 1 if b[0] > r else -1
+        sc = 1 if b[1] > c else -1
+        err = dc - dr
+        while (r, c) != b:
+            e2 = 2 * err
+            stepRow = e2 < dc
+            stepCol = e2 > -dr
+            if stepRow and stepCol:
+                # no slipping through a diagonal gap between two cells
+                if maze[r + sr][c] != 0 or maze[r][c + sc] != 0:
+                    return False
+            if stepCol:
+                err -= dr
+                c += sc
+            if stepRow:
+                err += dc
+                r += sr
+            if maze[r][c] != 0:
+                return False
+        return True
+
+
+def euclidean(a, b):
+    return math.hypot(a[0] - b[0], a[1] - b[1])
+
+def pathLength(path):
+    """Euclidean length of a waypoint path"""
+    return sum(euclidean(a, b) for a, b in zip(path, path[1:]))
+
+def thetastar(maze, start, end, lazy = False, los = None, stats = None, allow_diagonal_movement = True):
+    """
+    Returns a list of waypoints from start to end; consecutive waypoints see each other
+    :param maze:
+    :param start:
+    :param end:
+    :param lazy: Lazy Theta*, which defers line-of-sight checks until a node is expanded
+    :param los: a LineOfSight for this maze, to share its cache between queries
+    :param stats: optional dict that receives the number of nodes expanded
+    :param allow_diagonal_movement: expand the 8 neighbours of a cell rather than 4; segments
+        between waypoints take any angle either way
+    :return:
+    """
+
+    if los is None:
+        los = LineOfSight(maze)
+
+    # diagonal moves may not cut a wall corner
+    adjacent_squares = adjacentSquares(allow_diagonal_movement)
+
+    g = {start: 0.0}
+    parent = {start: start}
+    closed = set()
+    open_list = [(euclidean(start, end), 0, start)]
+    counter = 0
+
+    while open_list:
+        f, _, current = heapq.heappop(open_list)
+        if current in closed:
+            continue
+
+        if lazy and not los(parent[current], current):
+            # the optimistic parent was wrong: fall back to the best closed neighbour
+            best = None
+            for new_position in adjacent_squares:
+                neighbour = (current[0] + new_position[0], current[1] + new_position[1])
+                if neighbour in closed and los(neighbour, current):
+                    cost = g[neighbour] + euclidean(neighbour, current)
+                    if best is None or cost < best[0]:
+                        best = (cost, neighbour)
+            g[current], parent[current] = best
+        closed.add(current)
+        if stats is not None:
+            stats['expanded'] = len(closed)
+
+        # Found the goal
+        if current == end:
+            path = [current]
+            while parent[current] != current:
+                current = parent[current]
+                path.append(current)
+            return path[::-1]
+
+        for new_position in adjacent_squares:
+            neighbour = (current[0] + new_position[0], current[1] + new_position[1])
+            if neighbour in closed or not los.walkable(neighbour):
+                continue
+            if new_position[0] and new_position[1] and not los(current, neighbour):
+                continue
+
+            # Path 2: straight from the current node's parent
+            grandparent = parent[current]
+            if lazy or los(grandparent, neighbour):
+                newG = g[grandparent] + euclidean(grandparent, neighbour)
+                newParent = grandparent
+            else:
+                newG = g[current] + euclidean(current, neighbour)
+                newParent = current
+
+            if newG < g.get(neighbour, math.inf):
+                g[neighbour] = newG
+                parent[neighbour] = newParent
+                counter += 1
+                heapq.heappush(open_list, (newG + euclidean(neighbour, end), counter, neighbour))
+
+    warn("Couldn't get a path to destination")
+    return None
+
+
+def main():
+    maze = [
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+    ]
+
+    start = (0, 0)
+    end = (7, 6)
+
+    for lazy in (False, True):
+        los = LineOfSight(maze)
+        path = thetastar(maze, start, end, lazy, los)
+        print(f'{"Lazy Theta*" if lazy else "Theta*"}: {path}')
+        print(f'Length: {pathLength(path):.3f}  line-of-sight checks: {los.checks} (cached: {los.hits})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark of the A* engines on the weighted test mazes
+
+Runs every engine on the mazes from astarFix-modified.main plus a few larger
+generated ones and prints cost, nodes created, time and peak memory per run.
+
+    python benchmark.py [heuristic ...]     engines side by side
+    python benchmark.py ties [heuristic]    compiled A* under each tie-breaking policy
+"""
+import sys
+import time
+import tracemalloc
+from warnings import catch_warnings, simplefilter
+
+from astarCommon import TIE_BREAKS, pathCost
+from astarLowMem import idastar, fringeSearch
+from compiledMaze import CompiledMaze, astarCompiled
+from mazeGenerators import generate, pickEndpoints
+from pathfinding.engines import loadScript
+from pruning import PruningTable, astarPruned
+
+def serpentineMaze(rows, cols):
+    """Cost-1 corridors joined at alternating ends, like test case 6 of main()"""
+    maze = []
+    for r in range(rows):
+        if r % 2 == 0:
+            maze.append([1] * cols)
+        elif r % 4 == 1:
+            maze.append([0] * (cols - 1) + [1])
+        else:
+            maze.append([1] + [0] * (cols - 1))
+    return maze
+
+def openMaze(rows, cols):
+    return [[1] * cols for _ in range(rows)]
+
+def generatedScenario(kind, size, seed = 1):
+    maze = generate(kind, size, size, seed)
+    (start, end) = pickEndpoints(maze, 1, seed)[0]
+    return (f'{kind}-{size}', maze.tolist(), start, end)
+
+# name, maze, start, end
+SCENARIOS = [
+    ('main-1', [
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+    ], (0, 0), (7, 6)),
+    ('main-2', [
+        [2, 4, 2, 1, 4, 5, 2],
+        [0, 1, 2, 3, 5, 3, 1],
+        [2, 0, 4, 4, 1, 2, 4],
+        [2, 5, 5, 3, 2, 0, 1],
+        [4, 3, 3, 2, 1, 0, 1]
+    ], (1, 2), (4, 3)),
+    ('main-3', [
+        [1, 3, 2, 5, 1, 4, 3],
+        [2, 1, 3, 1, 3, 2, 5],
+        [3, 0, 5, 0, 1, 2, 2],
+        [5, 3, 2, 1, 5, 0, 3],
+        [2, 4, 1, 0, 0, 2, 0],
+        [4, 0, 2, 1, 5, 3, 4],
+        [1, 5, 1, 0, 2, 4, 1]
+    ], (3, 6), (5, 1)),
+    ('main-4', [
+        [2, 0, 2, 0, 2, 0, 0, 2, 2, 0],
+        [1, 2, 3, 5, 2, 1, 2, 5, 1, 2],
+        [2, 0, 2, 2, 1, 2, 1, 2, 4, 2],
+        [2, 0, 1, 0, 1, 1, 1, 0, 0, 1],
+        [1, 1, 0, 0, 5, 0, 3, 2, 2, 2],
+        [2, 2, 2, 2, 1, 0, 1, 2, 1, 0],
+        [1, 0, 2, 1, 3, 1, 4, 3, 0, 1],
+        [2, 0, 5, 1, 5, 2, 1, 2, 4, 1],
+        [1, 2, 2, 2, 0, 2, 0, 1, 1, 0],
+        [5, 1, 2, 1, 1, 1, 2, 0, 1, 2]
+    ], (1, 2), (8, 8)),
+    ('main-5', openMaze(10, 10), (0, 0), (4, 4)),
+    ('main-6', serpentineMaze(10, 10), (0, 0), (8, 8)),
+    ('serpentine-41', serpentineMaze(41, 41), (0, 0), (40, 40)),
+    ('open-41', openMaze(41, 41), (0, 0), (40, 40)),
+    generatedScenario('terrain', 64),
+    generatedScenario('rooms', 64),
+]
+
+def runEngine(engine, maze, start, end, heuristic, prepare = None):
+    """Run one query and return (cost, nodes created, seconds, peak bytes)"""
+    query = prepare(maze) if prepare else maze
+    tracemalloc.start()
+    startTime = time.perf_counter()
+    with catch_warnings():
+        simplefilter('ignore')
+        (path, totalNodes) = engine(query, start, end, heuristic)
+    endTime = time.perf_counter()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return (pathCost(maze, path), totalNodes, endTime - startTime, peak)
+
+def tieBreakReport(heuristic = 2):
+    """
+    Nodes expanded and created under every tie-breaking policy
+    The policies order the open list the same way in every engine, so this
+    runs them on astarCompiled: the list scans of astarFix-modified.astar
+    would take minutes on the 41x41 and 64x64 mazes.
+    """
+
+    print(f'{"maze":<15}{"tie-break":>10}{"cost":>8}{"expanded":>10}{"nodes":>9}{"time (ms)":>12}')
+    for (name, maze, start, end) in SCENARIOS:
+        compiled = CompiledMaze(maze)
+        for tieBreak in TIE_BREAKS:
+            stats = {'expanded': 0}
+            startTime = time.perf_counter()
+            with catch_warnings():
+                simplefilter('ignore')
+                (path, totalNodes) = astarCompiled(compiled, start, end, heuristic, tieBreak=tieBreak, stats=stats)
+            seconds = time.perf_counter() - startTime
+            print(f'{name:<15}{tieBreak:>10}{pathCost(maze, path):>8}{stats["expanded"]:>10}{totalNodes:>9}{seconds * 1000:>12.3f}')
+        print()
+
+def main():
+    if sys.argv[1:2] == ['ties']:
+        tieBreakReport(*[int(arg) for arg in sys.argv[2:3]])
+        return
+
+    # name, engine and how to prepare the maze for it outside the timed query
+    engines = [
+        ('astar', loadScript('astarFix-modified').astar, None),
+        ('idastar', idastar, None),
+        ('fringe', fringeSearch, None),
+        ('compiled', astarCompiled, CompiledMaze),
+        ('pruned', astarPruned, PruningTable),
+    ]
+    heuristics = [int(arg) for arg in sys.argv[1:]] or [2]
+
+    print(f'{"maze":<15}{"h":>3}{"engine":>10}{"cost":>8}{"nodes":>9}{"time (ms)":>12}{"peak (KiB)":>12}')
+    for (name, maze, start, end) in SCENARIOS:
+        for heuristic in heuristics:
+            for (engineName, engine, prepare) in engines:
+                (cost, totalNodes, seconds, peak) = runEngine(engine, maze, start, end, heuristic, prepare)
+                print(f'{name:<15}{heuristic:>3}{engineName:>10}{cost:>8}{totalNodes:>9}{seconds * 1000:>12.3f}{peak / 1024:>12.1f}')
+        print()
+
+
+if __name__ == '__main__':
+    main()
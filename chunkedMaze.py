@@ -0,0 +1,181 @@
+"""
+Chunked on-disk storage for mazes too large to hold in memory
+
+A maze directory holds a small header and one file per fixed-size square tile
+of cells stored as unsigned bytes. ChunkedMaze reads the tiles on demand and
+keeps the most recently used ones resident. It supports len(maze) and
+maze[r][c] exactly like a list of lists, so every engine runs on it unchanged
+and only ever loads the tiles around the cells it expands.
+"""
+from array import array
+from collections import OrderedDict
+import json
+import os
+
+HEADER = 'maze.json'
+
+def chunkFile(directory, chunkRow, chunkCol):
+    return os.path.join(directory, f'chunk_{chunkRow}_{chunkCol}.bin')
+
+def writeChunkedMaze(directory, rows, cols, chunkSize, mazeRows, fill = 0):
+    """
+    Writes a maze to a chunk directory, reading it one row at a time
+    Only chunkSize rows are ever buffered, so mazeRows can be a generator for
+    mazes that never exist in memory as a whole. Tiles made only of the fill
+    value are not written at all.
+    :param directory:
+    :param rows:
+    :param cols:
+    :param chunkSize: side of a square tile in cells
+    :param mazeRows: iterable of rows of cols values in 0..255: lists, bytes or uint8 arrays
+    :param fill: value of every cell in a tile that has no file
+    :return:
+    """
+
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, HEADER), 'w') as header:
+        json.dump({'rows': rows, 'cols': cols, 'chunkSize': chunkSize, 'fill': fill}, header)
+
+    band = []
+    chunkRow = 0
+    for row in mazeRows:
+        band.append(row)
+        if len(band) == chunkSize:
+            writeBand(directory, chunkRow, band, cols, chunkSize, fill)
+            band = []
+            chunkRow += 1
+    if band:
+        writeBand(directory, chunkRow, band, cols, chunkSize, fill)
+
+def writeBand(directory, chunkRow, band, cols, chunkSize, fill):
+    """Splits chunkSize rows into tiles and writes the ones that are not pure fill"""
+    for chunkCol in range((cols + chunkSize - 1) // chunkSize):
+        left = chunkCol * chunkSize
+        right = min(left + chunkSize, cols)
+        tile = array('B')
+        for row in band:
+            tile.frombytes(bytes(row[left:right]))
+        if tile.count(fill) == len(tile):
+            continue
+        with open(chunkFile(directory, chunkRow, chunkCol), 'wb') as out:
+            tile.tofile(out)
+
+
+class ChunkedRow:
+    """One row of a ChunkedMaze, indexable like a list"""
+
+    __slots__ = ('maze', 'row')
+
+    def __init__(self, maze, row):
+        self.maze = maze
+        self.row = row
+
+    def __len__(self):
+        return self.maze.cols
+
+    def __getitem__(self, col):
+        return self.maze.cell(self.row, col)
+
+
+class ChunkedMaze:
+    """
+    A maze read tile by tile from a chunk directory, with an LRU of resident tiles
+    loads, hits and evictions count tile accesses since the last resetStats().
+    """
+
+    def __init__(self, directory, maxChunks = 64):
+        with open(os.path.join(directory, HEADER)) as header:
+            info = json.load(header)
+        self.directory = directory
+        self.rows = info['rows']
+        self.cols = info['cols']
+        self.chunkSize = info['chunkSize']
+        self.fill = info['fill']
+        self.maxChunks = maxChunks
+        self.chunks = OrderedDict()
+        self.resetStats()
+
+    def resetStats(self):
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def stats(self):
+        return {'loads': self.loads, 'hits': self.hits, 'evictions': self.evictions, 'resident': len(self.chunks)}
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += self.rows
+        return ChunkedRow(self, row)
+
+    def chunk(self, chunkRow, chunkCol):
+        key = (chunkRow, chunkCol)
+        tile = self.chunks.get(key)
+        if tile is not None:
+            self.hits += 1
+            self.chunks.move_to_end(key)
+            return tile
+
+        self.loads += 1
+        path = chunkFile(self.directory, chunkRow, chunkCol)
+        # a missing tile is all fill and stays resident as an empty array
+        tile = array('B')
+        if os.path.exists(path):
+            with open(path, 'rb') as data:
+                tile.frombytes(data.read())
+        self.chunks[key] = tile
+        if len(self.chunks) > self.maxChunks:
+            self.chunks.popitem(last=False)
+            self.evictions += 1
+        return tile
+
+    def cell(self, row, col):
+        if col < 0:
+            col += self.cols
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            raise IndexError('maze index out of range')
+        size = self.chunkSize
+        chunkRow, r = divmod(row, size)
+        chunkCol, c = divmod(col, size)
+        tile = self.chunk(chunkRow, chunkCol)
+        if not tile:
+            return self.fill
+        width = min(size, self.cols - chunkCol * size)
+        return tile[r * width + c]
+
+    def query(self, engine, start, end, *args, **kwargs):
+        """Runs engine(self, start, end, ...) and returns its result with the tile statistics of that query"""
+        self.resetStats()
+        result = engine(self, start, end, *args, **kwargs)
+        return (result, self.stats())
+
+
+def main():
+    import tempfile
+    from astarLowMem import fringeSearch
+
+    # a 2000 x 2000 serpentine, written one row at a time
+    size = 2000
+    def rows():
+        for r in range(size):
+            if r % 2 == 0:
+                yield [1] * size
+            elif r % 4 == 1:
+                yield [0] * (size - 1) + [1]
+            else:
+                yield [1] + [0] * (size - 1)
+
+    with tempfile.TemporaryDirectory() as directory:
+        writeChunkedMaze(directory, size, size, 256, rows())
+        maze = ChunkedMaze(directory, maxChunks=8)
+        ((path, totalNodes), stats) = maze.query(fringeSearch, (0, 0), (6, 300))
+        print(f'Path length:\n{len(path)}')
+        print(f'Nodes created:\n{totalNodes}')
+        print(f'Chunks:\n{stats}')
+
+
+if __name__ == '__main__':
+    main()
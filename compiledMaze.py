@@ -0,0 +1,192 @@
+"""
+Mazes compiled for fast repeated searching
+
+Compiling pads the maze with a border of walls and flattens it into one list,
+so a neighbour is just index + offset: no bounds checks and no position
+tuples in the inner loop. The offset tables for 4- and 8-connected moves are
+computed once, and the compiled maze can be reused for any number of queries.
+Cells are the cost of entering them and 0 is a wall, as in astarFix-modified.
+"""
+from warnings import warn
+import heapq
+import math
+import random
+
+from astarCommon import adjacentSquares, flatTieKey
+from expansionTrace import END, POP, PUSH
+from movementModels import astarMovement
+
+class CompiledMaze:
+    """
+    A weighted maze padded with walls and flattened row by row
+    Flat indices refer to the padded grid; index() and position() convert
+    from and to the (row, col) positions of the original maze.
+    """
+
+    def __init__(self, maze):
+        self.rows = len(maze)
+        self.cols = len(maze[self.rows - 1])
+        self.width = self.cols + 2
+        border = [0] * self.width
+        cells = list(border)
+        for row in maze:
+            cells.append(0)
+            cells.extend(row)
+            cells.append(0)
+        cells.extend(border)
+        self.cells = cells
+
+        self.offsets4 = tuple(dy * self.width + dx for (dy, dx) in adjacentSquares(False))
+        self.offsets8 = tuple(dy * self.width + dx for (dy, dx) in adjacentSquares(True))
+        # row and column of every flat index, for heuristics
+        self.rowOf = [i // self.width for i in range(len(cells))]
+        self.colOf = [i % self.width for i in range(len(cells))]
+
+    @classmethod
+    def fromOccupancy(cls, maze):
+        """Compiles a 0/1 maze of astar.py / astarFix.py, where 0 is walkable, as unit costs"""
+        return cls([[1 if cell == 0 else 0 for cell in row] for row in maze])
+
+    def offsets(self, allow_diagonal_movement = False):
+        return self.offsets8 if allow_diagonal_movement else self.offsets4
+
+    def index(self, position):
+        return (position[0] + 1) * self.width + position[1] + 1
+
+    def position(self, index):
+        return (self.rowOf[index] - 1, self.colOf[index] - 1)
+
+
+def astarCompiled(maze, start, end, heuristic = 2, allow_diagonal_movement = False, tracer = None, movement = None, blocked = None,
+                  tieBreak = 'g', stats = None):
+    """
+    astarFix-modified.astar over a CompiledMaze; returns (path, totalNodes)
+    A plain list of lists is compiled first, but compiling once and passing the
+    CompiledMaze to every query is what saves the time.
+    :param maze: a CompiledMaze or a weighted maze
+    :param start:
+    :param end:
+    :param heuristic:
+    :param allow_diagonal_movement:
+    :param tracer: optional expansionTrace.ExpansionTracer that records every push and pop
+    :param movement: a movementModels model or model name, searched by movementModels.astarMovement
+    :param blocked: optional set of flat indices this query treats as walls, leaving the maze as it is
+    :param tieBreak: one of astarCommon.TIE_BREAKS; the default 'g' pops the deeper of two nodes of equal f
+    :param stats: optional dict that receives the number of nodes expanded
+    :return:
+    """
+
+    compiled = maze if isinstance(maze, CompiledMaze) else CompiledMaze(maze)
+    if movement is not None:
+        return astarMovement(compiled, start, end, movement, heuristic, tracer, blocked, tieBreak, stats)
+    cells = compiled.cells
+    offsets = compiled.offsets(allow_diagonal_movement)
+    rowOf = compiled.rowOf
+    colOf = compiled.colOf
+    startIndex = compiled.index(start)
+    endIndex = compiled.index(end)
+    endRow = rowOf[endIndex]
+    endCol = colOf[endIndex]
+    tieKey = flatTieKey(tieBreak, rowOf, colOf, startIndex, endIndex)
+
+    # the heuristics of astarCommon, on flat indices
+    match heuristic:
+        case 1:
+            h = lambda i: 0
+        case 3:
+            h = lambda i: (0.5 * cells[i]) * abs(rowOf[i] - endRow) + abs(colOf[i] - endCol)
+        case 4:
+            errors = list(range(-10, 0)) + list(range(1, 11))
+            h = lambda i: max(0, abs(rowOf[i] - endRow) + abs(colOf[i] - endCol) + random.choice(errors))
+        case _:
+            h = lambda i: abs(rowOf[i] - endRow) + abs(colOf[i] - endCol)
+
+    g = {startIndex: 0}
+    parent = {startIndex: -1}
+    closed = set()
+    # by default equal f goes to the deeper node, which saves most work on open ground
+    open_list = [(h(startIndex), 0, 0, startIndex)]
+    counter = 0
+    totalNodes = 0
+    # events are collected here and copied into the tracer once per query
+    trace = None
+    if tracer is not None:
+        tracer.begin(compiled.width, startIndex, 1)
+        trace = []
+
+    while open_list:
+        f, _, _, current = heapq.heappop(open_list)
+        if current in closed:
+            continue
+        closed.add(current)
+        currentG = g[current]
+        if trace is not None:
+            trace += (POP, current, currentG, f)
+
+        # Found the goal
+        if current == endIndex:
+            if stats is not None:
+                stats['expanded'] = len(closed)
+            if trace is not None:
+                trace += (END, current, currentG, 0)
+                tracer.extend(trace)
+            path = []
+            while current != -1:
+                path.append(compiled.position(current))
+                current = parent[current]
+            return (path[::-1], totalNodes)
+
+        for offset in offsets:
+            child = current + offset
+            cost = cells[child]
+            # the border makes walls the only thing to check
+            if cost == 0:
+                continue
+            if blocked is not None and child in blocked:
+                continue
+            totalNodes += 1
+            if child in closed:
+                continue
+            childG = currentG + cost
+            if childG < g.get(child, math.inf):
+                g[child] = childG
+                parent[child] = current
+                counter += 1
+                childH = h(child)
+                f = childG + childH
+                if trace is not None:
+                    trace += (PUSH, child, childG, f)
+                heapq.heappush(open_list, (f, -childG if tieKey is None else tieKey(child, childG, childH, counter), counter, child))
+
+    if stats is not None:
+        stats['expanded'] = len(closed)
+    if trace is not None:
+        trace += (END, endIndex, 0, -1)
+        tracer.extend(trace)
+    warn("Couldn't get a path to destination")
+    return ([], totalNodes)
+
+
+def main():
+    maze = [
+        [2, 0, 2, 0, 2, 0, 0, 2, 2, 0],
+        [1, 2, 3, 5, 2, 1, 2, 5, 1, 2],
+        [2, 0, 2, 2, 1, 2, 1, 2, 4, 2],
+        [2, 0, 1, 0, 1, 1, 1, 0, 0, 1],
+        [1, 1, 0, 0, 5, 0, 3, 2, 2, 2],
+        [2, 2, 2, 2, 1, 0, 1, 2, 1, 0],
+        [1, 0, 2, 1, 3, 1, 4, 3, 0, 1],
+        [2, 0, 5, 1, 5, 2, 1, 2, 4, 1],
+        [1, 2, 2, 2, 0, 2, 0, 1, 1, 0],
+        [5, 1, 2, 1, 1, 1, 2, 0, 1, 2]
+    ]
+    compiled = CompiledMaze(maze)
+    for (start, end) in (((1, 2), (8, 8)), ((9, 0), (0, 8))):
+        (path, totalNodes) = astarCompiled(compiled, start, end)
+        print(f'Path found:\n{path}')
+        print(f'Nodes created:\n{totalNodes}')
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,318 @@
+"""
+Contraction hierarchies for weighted maps that are queried far more often than they change
+
+Preprocessing contracts the nodes of a CSRGraph one at a time, least important
+first. Removing a node adds a shortcut between each pair of its neighbours
+whose shortest connection ran through it, unless a bounded witness search
+finds another path that is as short. Queries then only ever climb: a forward
+search from the start and a backward one from the end each follow edges into
+more important nodes and meet at the top. Shortcuts on the result are unpacked
+back into the original edges, so a grid query gives the same list of cells as
+return_path in astarFix-modified.
+"""
+from warnings import warn
+import heapq
+import math
+import time
+
+from csrGraph import CSRGraph, astarGraph
+
+class ContractionHierarchy:
+    """
+    The upward and downward graphs of a contracted CSRGraph
+    up holds the edges u -> v with rank[v] > rank[u]; down holds each edge
+    v -> u with rank[v] > rank[u] reversed as u -> v, so both searches climb.
+    """
+
+    def __init__(self, graph, witnessLimit = 500, hopLimit = 8):
+        """
+        :param graph: a CSRGraph; it is only read, never modified
+        :param witnessLimit: nodes a witness search may settle before giving up and adding the shortcut
+        :param hopLimit: edges a witness path may have; longer witnesses are not looked for
+        """
+
+        self.graph = graph
+        self.witnessLimit = witnessLimit
+        self.hopLimit = hopLimit
+        # (u, v) -> the contracted node a shortcut u -> v passes through
+        self.middle = {}
+        self.shortcuts = 0
+        startTime = time.perf_counter()
+        self.contract()
+        self.preprocessSeconds = time.perf_counter() - startTime
+
+    @classmethod
+    def fromMaze(cls, maze, allow_diagonal_movement = False, witnessLimit = 500, hopLimit = 8):
+        """A hierarchy over a weighted maze, where a move costs the cell it enters"""
+        return cls(CSRGraph.fromMaze(maze, allow_diagonal_movement), witnessLimit, hopLimit)
+
+    def stats(self):
+        return {
+            'nodes': self.graph.numNodes,
+            'edges': self.graph.numEdges(),
+            'shortcuts': self.shortcuts,
+            'upwardEdges': self.up.numEdges() + self.down.numEdges(),
+            'preprocessSeconds': self.preprocessSeconds,
+        }
+
+    def contract(self):
+        graph = self.graph
+        n = graph.numNodes
+        # the remaining graph, with only the cheapest of any parallel edges
+        self.outEdges = [{} for _ in range(n)]
+        self.inEdges = [{} for _ in range(n)]
+        for u in range(n):
+            for (v, w) in graph.neighbours(u):
+                if v != u and w < self.outEdges[u].get(v, math.inf):
+                    self.outEdges[u][v] = w
+                    self.inEdges[v][u] = w
+
+        self.rank = [0] * n
+        deletedNeighbours = [0] * n
+        # how many contractions deep each node sits, to keep the hierarchy shallow
+        self.level = [0] * n
+        queue = [(self.priority(v, 0, self.shortcutsFor(v)), v) for v in range(n)]
+        heapq.heapify(queue)
+        upEdges = []
+        downEdges = []
+        order = 0
+        while queue:
+            (priority, v) = heapq.heappop(queue)
+            # lazy update: the priority may have grown since it was pushed
+            shortcuts = self.shortcutsFor(v)
+            current = self.priority(v, deletedNeighbours[v], shortcuts)
+            if queue and current > queue[0][0]:
+                heapq.heappush(queue, (current, v))
+                continue
+
+            for (u, x, w) in shortcuts:
+                if w < self.outEdges[u].get(x, math.inf):
+                    self.outEdges[u][x] = w
+                    self.inEdges[x][u] = w
+                    self.middle[(u, x)] = v
+                    self.shortcuts += 1
+
+            # every edge left on v leads to a node contracted later
+            for (x, w) in self.outEdges[v].items():
+                upEdges.append((v, x, w))
+                del self.inEdges[x][v]
+                deletedNeighbours[x] += 1
+                self.level[x] = max(self.level[x], self.level[v] + 1)
+            for (u, w) in self.inEdges[v].items():
+                downEdges.append((v, u, w))
+                del self.outEdges[u][v]
+                deletedNeighbours[u] += 1
+                self.level[u] = max(self.level[u], self.level[v] + 1)
+            self.outEdges[v] = {}
+            self.inEdges[v] = {}
+            self.rank[v] = order
+            order += 1
+
+        del self.outEdges, self.inEdges, self.level
+        self.up = CSRGraph.fromEdges(n, upEdges)
+        self.down = CSRGraph.fromEdges(n, downEdges)
+
+    def priority(self, v, deletedNeighbours, shortcuts):
+        """
+        Edge difference of contracting v, plus its contracted neighbours and its
+        level so that the contraction spreads evenly over the map. The edge
+        difference weighs four times the other terms, which gave the fewest
+        shortcuts and smallest query search spaces on generated terrain.
+        """
+        removed = len(self.outEdges[v]) + len(self.inEdges[v])
+        return 4 * (len(shortcuts) - removed) + deletedNeighbours + self.level[v]
+
+    def shortcutsFor(self, v):
+        """(u, x, weight) of every shortcut contracting v would need"""
+        shortcuts = []
+        outgoing = self.outEdges[v]
+        for (u, wu) in self.inEdges[v].items():
+            targets = {x: wu + wx for (x, wx) in outgoing.items() if x != u}
+            if not targets:
+                continue
+            dist = self.witnessSearch(u, v, targets)
+            for (x, w) in targets.items():
+                if dist.get(x, math.inf) > w:
+                    shortcuts.append((u, x, w))
+        return shortcuts
+
+    def witnessSearch(self, source, avoid, targets):
+        """
+        Dijkstra from source in the remaining graph without avoid, until every
+        target is settled, the largest target weight is passed, witnessLimit
+        nodes are settled or paths would exceed hopLimit edges. Distances it
+        returns are upper bounds, so stopping early only ever adds a shortcut
+        that was not needed.
+        :param targets: dict of target -> weight of the path through avoid
+        """
+
+        limit = max(targets.values())
+        remaining = len(targets)
+        dist = {source: 0}
+        hops = {source: 0}
+        heap = [(0, source)]
+        settled = 0
+        outEdges = self.outEdges
+        while heap and settled < self.witnessLimit:
+            (d, u) = heapq.heappop(heap)
+            if d > limit:
+                break
+            if d > dist[u]:
+                continue
+            settled += 1
+            if u in targets:
+                remaining -= 1
+                if remaining == 0:
+                    break
+            hop = hops[u] + 1
+            if hop > self.hopLimit:
+                continue
+            for (v, w) in outEdges[u].items():
+                if v == avoid:
+                    continue
+                nd = d + w
+                if nd < dist.get(v, math.inf):
+                    dist[v] = nd
+                    hops[v] = hop
+                    heapq.heappush(heap, (nd, v))
+        return dist
+
+    def query(self, start, end):
+        """
+        Bidirectional upward search; returns (path, totalNodes) like csrGraph.astarGraph
+        start, end and the returned path use the graph's labels.
+        """
+
+        graph = self.graph
+        source = graph.ids[start]
+        target = graph.ids[end]
+        sides = (self.up, self.down)
+        dist = ({source: 0}, {target: 0})
+        parent = ({source: -1}, {target: -1})
+        heaps = ([(0, source)], [(0, target)])
+        best = math.inf
+        meeting = -1
+        totalNodes = 0
+        side = 1
+        while True:
+            # a side is done once nothing left on it can beat the best meeting
+            live = [s for s in (0, 1) if heaps[s] and heaps[s][0][0] < best]
+            if not live:
+                break
+            side = live[0] if len(live) == 1 else 1 - side
+            (d, u) = heapq.heappop(heaps[side])
+            if d > dist[side][u]:
+                continue
+            other = dist[1 - side].get(u)
+            if other is not None and d + other < best:
+                best = d + other
+                meeting = u
+
+            # stall on demand: a higher node already reached reaches u more cheaply,
+            # so no shortest path climbs through u on this side
+            edges = sides[1 - side]
+            if any(dist[side].get(edges.targets[i], math.inf) + edges.weights[i] < d for i in range(edges.offsets[u], edges.offsets[u + 1])):
+                continue
+
+            edges = sides[side]
+            for i in range(edges.offsets[u], edges.offsets[u + 1]):
+                v = edges.targets[i]
+                totalNodes += 1
+                nd = d + edges.weights[i]
+                if nd < dist[side].get(v, math.inf):
+                    dist[side][v] = nd
+                    parent[side][v] = u
+                    heapq.heappush(heaps[side], (nd, v))
+
+        if meeting == -1:
+            warn("Couldn't get a path to destination")
+            return ([], totalNodes)
+
+        nodes = []
+        current = meeting
+        while current != -1:
+            nodes.append(current)
+            current = parent[0][current]
+        nodes.reverse()
+        current = parent[1][meeting]
+        while current != -1:
+            nodes.append(current)
+            current = parent[1][current]
+        return ([graph.labels[node] for node in self.unpack(nodes)], totalNodes)
+
+    def unpack(self, nodes):
+        """Replaces every shortcut between consecutive nodes by the original edges it stands for"""
+        middle = self.middle
+        path = [nodes[0]]
+        for (u, v) in zip(nodes, nodes[1:]):
+            stack = [(u, v)]
+            while stack:
+                (a, b) = stack.pop()
+                m = middle.get((a, b))
+                if m is None:
+                    path.append(b)
+                else:
+                    # the second half goes on first so the first half is unpacked first
+                    stack.append((m, b))
+                    stack.append((a, m))
+        return path
+
+
+def measureSpeedup(hierarchy, queries, heuristic = 2):
+    """
+    Runs every (start, end) through the hierarchy and through astarGraph on the
+    original graph and reports both times, the speedup and any cost mismatch.
+    """
+
+    graph = hierarchy.graph
+    def cost(path):
+        total = 0
+        for (a, b) in zip(path, path[1:]):
+            (u, v) = (graph.ids[a], graph.ids[b])
+            total += min(w for (x, w) in graph.neighbours(u) if x == v)
+        return total
+
+    startTime = time.perf_counter()
+    plain = [astarGraph(graph, start, end, heuristic) for (start, end) in queries]
+    plainSeconds = time.perf_counter() - startTime
+    startTime = time.perf_counter()
+    contracted = [hierarchy.query(start, end) for (start, end) in queries]
+    contractedSeconds = time.perf_counter() - startTime
+    mismatches = sum(1 for ((a, _), (b, _)) in zip(plain, contracted) if cost(a) != cost(b))
+    return {
+        'queries': len(queries),
+        'astarSeconds': plainSeconds,
+        'hierarchySeconds': contractedSeconds,
+        'speedup': plainSeconds / contractedSeconds if contractedSeconds else math.inf,
+        'astarNodes': sum(nodes for (_, nodes) in plain),
+        'hierarchyNodes': sum(nodes for (_, nodes) in contracted),
+        'mismatches': mismatches,
+    }
+
+
+def main():
+    from warnings import catch_warnings, simplefilter
+    from mazeGenerators import generate, pickEndpoints
+
+    maze = [
+        [2, 4, 2, 1, 4, 5, 2],
+        [0, 1, 2, 3, 5, 3, 1],
+        [2, 0, 4, 4, 1, 2, 4],
+        [2, 5, 5, 3, 2, 0, 1],
+        [4, 3, 3, 2, 1, 0, 1]
+    ]
+    hierarchy = ContractionHierarchy.fromMaze(maze)
+    print(f'Path found:\n{hierarchy.query((1, 2), (4, 3))[0]}')
+
+    terrain = generate('terrain', 64, 64, seed=7)
+    hierarchy = ContractionHierarchy.fromMaze(terrain.tolist())
+    stats = hierarchy.stats()
+    print(f'Preprocessing:\n{stats["preprocessSeconds"]:.2f} s, {stats["shortcuts"]} shortcuts over {stats["edges"]} edges')
+    print(stats)
+    with catch_warnings():
+        simplefilter('ignore')
+        print(f'Queries:\n{measureSpeedup(hierarchy, pickEndpoints(terrain, 200, seed=7))}')
+
+
+if __name__ == '__main__':
+    main()
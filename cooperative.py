@@ -0,0 +1,288 @@
+"""
+Cooperative multi-agent pathfinding (Windowed Hierarchical Cooperative A*)
+
+Agents are planned one after another in (cell, time) space against a shared
+reservation table, so later agents route around the cells and moves that
+earlier ones have claimed. Each search only looks window steps ahead; beyond
+that it trusts the true distance to the goal, which a resumable backward
+search per goal works out only for the cells that are asked about. Plans are
+redone every tick with a rotating priority order. Cells are the cost of
+entering them and 0 is a wall, as in astarFix-modified.
+"""
+from collections import OrderedDict
+import heapq
+import math
+import time
+
+from astarCommon import adjacentSquares
+
+class ReservationTable:
+    """Cells and moves claimed by agents at each time step of the current window"""
+
+    def __init__(self):
+        self.cells = {}
+        self.moves = {}
+
+    def clear(self):
+        self.cells.clear()
+        self.moves.clear()
+
+    def reserve(self, agent, path):
+        for t, position in enumerate(path):
+            self.cells[(position, t)] = agent
+            if t:
+                self.moves[(path[t - 1], position, t)] = agent
+
+    def free(self, agent, position, nextPosition, t):
+        """Whether agent may move from position at t - 1 to nextPosition at t"""
+        owner = self.cells.get((nextPosition, t), agent)
+        if owner != agent:
+            return False
+        # two agents may not swap cells through each other
+        owner = self.moves.get((nextPosition, position, t), agent)
+        return owner == agent
+
+
+class ResumableDistance:
+    """
+    True cost from any cell to one goal, computed lazily (Reverse Resumable A*)
+    A backward A* search runs from the goal towards the first cell asked about
+    and is resumed whenever a cell that is not closed yet is queried, so only
+    the part of the map the agents actually cross is ever searched.
+    """
+
+    def __init__(self, maze, goal, target, allow_diagonal_movement = False):
+        self.maze = maze
+        self.goal = goal
+        self.target = target
+        self.allow_diagonal_movement = allow_diagonal_movement
+        self.adjacent_squares = adjacentSquares(allow_diagonal_movement)
+        self.rows = len(maze)
+        self.cols = len(maze[self.rows - 1])
+        self.g = {goal: 0}
+        self.closed = {}
+        self.open_list = [(self.heuristic(goal), 0, goal)]
+
+    def heuristic(self, position):
+        # every move costs at least 1, so this stays consistent
+        dy = abs(position[0] - self.target[0])
+        dx = abs(position[1] - self.target[1])
+        if self.allow_diagonal_movement:
+            return max(dy, dx)
+        return dy + dx
+
+    def __call__(self, position):
+        distance = self.closed.get(position)
+        if distance is not None:
+            return distance
+        maze = self.maze
+        while self.open_list:
+            f, g, current = heapq.heappop(self.open_list)
+            if current in self.closed:
+                continue
+            self.closed[current] = g
+            # stepping from a neighbour into current costs the cost of current
+            newG = g + maze[current[0]][current[1]]
+            for (dy, dx) in self.adjacent_squares:
+                neighbour = (current[0] + dy, current[1] + dx)
+                if neighbour[0] > (self.rows - 1) or neighbour[0] < 0 or neighbour[1] > (self.cols - 1) or neighbour[1] < 0:
+                    continue
+                if maze[neighbour[0]][neighbour[1]] == 0 or neighbour in self.closed:
+                    continue
+                if newG < self.g.get(neighbour, math.inf):
+                    self.g[neighbour] = newG
+                    heapq.heappush(self.open_list, (newG + self.heuristic(neighbour), newG, neighbour))
+            if current == position:
+                return g
+        return math.inf
+
+
+class CooperativePlanner:
+    """
+    Plans collision-free windows for many agents on one maze
+    history holds one dict of timing and search statistics per tick.
+    """
+
+    def __init__(self, maze, window = 8, allow_diagonal_movement = False, cacheSize = 4096):
+        self.maze = maze
+        self.window = window
+        self.allow_diagonal_movement = allow_diagonal_movement
+        self.moves = adjacentSquares(allow_diagonal_movement) + ((0, 0),)
+        self.rows = len(maze)
+        self.cols = len(maze[self.rows - 1])
+        self.cacheSize = cacheSize
+        self.heuristics = OrderedDict()
+        self.reservations = ReservationTable()
+        self.history = []
+        self.ticks = 0
+
+    def distances(self, goal, start):
+        """True cost-to-goal lookup for a goal, kept in an LRU across ticks"""
+        distance = self.heuristics.get(goal)
+        if distance is None:
+            distance = ResumableDistance(self.maze, goal, start, self.allow_diagonal_movement)
+            self.heuristics[goal] = distance
+            if len(self.heuristics) > self.cacheSize:
+                self.heuristics.popitem(last=False)
+        else:
+            self.heuristics.move_to_end(goal)
+        return distance
+
+    def search(self, agent, start, goal):
+        """
+        Space-time A* for one agent over the next window steps
+        Returns the window + 1 positions the agent will occupy and the number of
+        states expanded. Waiting costs 1 except at the goal, so an agent that
+        has arrived is happy to stay put.
+        """
+
+        maze = self.maze
+        window = self.window
+        distance = self.distances(goal, start)
+        reservations = self.reservations
+
+        if not math.isfinite(distance(start)):
+            # the goal cannot be reached at all: stand still
+            return ([start] * (window + 1), 0)
+
+        startState = (start, 0)
+        g = {startState: 0}
+        parent = {startState: None}
+        open_list = [(distance(start), 0, startState)]
+        counter = 0
+        expanded = 0
+        while open_list:
+            f, _, state = heapq.heappop(open_list)
+            (position, t) = state
+            expanded += 1
+
+            if t == window:
+                path = []
+                while state is not None:
+                    path.append(state[0])
+                    state = parent[state]
+                return (path[::-1], expanded)
+
+            for (dy, dx) in self.moves:
+                nextPosition = (position[0] + dy, position[1] + dx)
+                if nextPosition[0] > (self.rows - 1) or nextPosition[0] < 0 or nextPosition[1] > (self.cols - 1) or nextPosition[1] < 0:
+                    continue
+                cost = maze[nextPosition[0]][nextPosition[1]]
+                if cost == 0 or not reservations.free(agent, position, nextPosition, t + 1):
+                    continue
+                if nextPosition == position:
+                    cost = 0 if position == goal else 1
+
+                nextState = (nextPosition, t + 1)
+                newG = g[state] + cost
+                if newG < g.get(nextState, math.inf):
+                    h = distance(nextPosition)
+                    if not math.isfinite(h):
+                        continue
+                    g[nextState] = newG
+                    parent[nextState] = state
+                    counter += 1
+                    heapq.heappush(open_list, (newG + h, counter, nextState))
+
+        # boxed in by reservations: wait and hope a higher priority agent moves
+        return ([start] * (window + 1), expanded)
+
+    def plan(self, positions, goals):
+        """
+        Reserves and returns a window of moves for every agent
+        :param positions: dict of agent -> current cell
+        :param goals: dict of agent -> goal cell
+        :return: dict of agent -> list of window + 1 cells, starting at the current one
+        """
+
+        startTime = time.perf_counter()
+        self.reservations.clear()
+        agents = list(positions)
+        # rotate priorities so no agent is always planned last
+        if agents:
+            shift = self.ticks % len(agents)
+            agents = agents[shift:] + agents[:shift]
+
+        # every agent holds its own cell until it has planned
+        for agent in agents:
+            self.reservations.cells[(positions[agent], 0)] = agent
+
+        plans = {}
+        expanded = 0
+        for agent in agents:
+            (path, agentExpanded) = self.search(agent, positions[agent], goals[agent])
+            self.reservations.reserve(agent, path)
+            plans[agent] = path
+            expanded += agentExpanded
+
+        self.history.append({
+            'tick': self.ticks,
+            'agents': len(agents),
+            'seconds': time.perf_counter() - startTime,
+            'expanded': expanded,
+            'cachedGoals': len(self.heuristics),
+        })
+        self.ticks += 1
+        return plans
+
+    def tick(self, positions, goals):
+        """
+        Plans a window for every agent and advances each of them one step
+        An agent that was boxed in waits, and anyone whose step would run into
+        a waiting agent waits too, so the executed step never collides.
+        """
+        plans = self.plan(positions, goals)
+        nextPositions = {agent: path[1] for agent, path in plans.items()}
+        conflicts = 0
+        while True:
+            occupants = {}
+            for agent, position in nextPositions.items():
+                occupants.setdefault(position, []).append(agent)
+            stuck = set()
+            for agent, position in nextPositions.items():
+                if len(occupants[position]) > 1:
+                    stuck.update(other for other in occupants[position] if nextPositions[other] != positions[other])
+                for other in occupants.get(positions[agent], ()):
+                    # two agents swapping cells pass through each other
+                    if other != agent and nextPositions[other] == positions[agent] and positions[other] == position:
+                        stuck.add(agent)
+            if not stuck:
+                break
+            conflicts += len(stuck)
+            for agent in stuck:
+                nextPositions[agent] = positions[agent]
+        self.history[-1]['conflicts'] = conflicts
+        return nextPositions
+
+    def run(self, positions, goals, maxTicks = 1000):
+        """Ticks until every agent stands on its goal; returns the cells visited by each agent"""
+        routes = {agent: [position] for agent, position in positions.items()}
+        for _ in range(maxTicks):
+            if all(positions[agent] == goals[agent] for agent in positions):
+                break
+            positions = self.tick(positions, goals)
+            for agent, position in positions.items():
+                routes[agent].append(position)
+        return routes
+
+
+def main():
+    maze = [[1] * 12 for _ in range(12)]
+    for r in range(2, 10):
+        maze[r][6] = 0
+    # agents swap sides through the two gaps at the top and bottom of the wall
+    positions = {f'a{r}': (r, 0) for r in range(12)}
+    goals = {f'a{r}': (11 - r, 11) for r in range(12)}
+
+    planner = CooperativePlanner(maze, window=8)
+    routes = planner.run(positions, goals)
+    ticks = planner.ticks
+    seconds = sum(stats['seconds'] for stats in planner.history)
+    print(f'Agents:\n{len(routes)}')
+    print(f'Ticks:\n{ticks}')
+    print(f'All arrived:\n{all(routes[agent][-1] == goals[agent] for agent in routes)}')
+    print(f'Mean planning time per tick (ms):\n{seconds / max(ticks, 1) * 1000:.3f}')
+
+
+if __name__ == '__main__':
+    main()
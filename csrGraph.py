@@ -0,0 +1,293 @@
+"""
+Graphs in compressed sparse row (CSR) form, for maps that are not grids
+
+The out-edges of node u are targets[offsets[u]:offsets[u + 1]] with the
+matching weights. Nodes are numbered 0..n-1 internally; labels maps them
+back to whatever the caller uses (cell positions for grids, the ids of an
+edge-list file) and coordinates, when present, feed the heuristics.
+A grid is just the special case built by CSRGraph.fromMaze.
+
+Heuristic 2 measures coordinates with the graph's metric: Manhattan on a
+4-connected grid, Chebyshev on an 8-connected one, octile on a grid built
+with an octile movement model and the straight-line distance on everything
+else, where an edge is never shorter than the line between its ends.
+"""
+from array import array
+from warnings import warn
+import heapq
+import math
+import random
+
+from movementModels import chebyshev, getMovement, manhattan, octile
+
+# the distance heuristic 2 measures between the coordinates of two nodes, by graph metric
+METRICS = {
+    'manhattan': manhattan,
+    'chebyshev': chebyshev,
+    'octile': octile,
+    'euclidean': math.hypot,
+}
+
+class CSRGraph:
+    """
+    A weighted directed graph in CSR form
+    Undirected graphs store every edge once in each direction.
+    """
+
+    def __init__(self, offsets, targets, weights, labels = None, coordinates = None, costs = None, metric = 'euclidean'):
+        if coordinates is not None:
+            if len(coordinates) != len(offsets) - 1:
+                raise ValueError(f'{len(coordinates)} coordinates for {len(offsets) - 1} nodes')
+            missing = [node if labels is None else labels[node] for (node, position) in enumerate(coordinates) if position is None]
+            if missing:
+                raise ValueError(f'no coordinates for {len(missing)} nodes, e.g. {missing[:10]}')
+        if metric not in METRICS:
+            raise ValueError(f'unknown metric {metric!r}, expected one of {", ".join(METRICS)}')
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.numNodes = len(offsets) - 1
+        self.labels = labels if labels is not None else list(range(self.numNodes))
+        self.ids = {label: node for node, label in enumerate(self.labels)}
+        self.coordinates = coordinates
+        # cell cost per node, only for graphs built from a weighted maze
+        self.costs = costs
+        self.metric = metric
+
+    def __len__(self):
+        return self.numNodes
+
+    def numEdges(self):
+        return len(self.targets)
+
+    def neighbours(self, node):
+        """(target, weight) pairs of the out-edges of node"""
+        lo = self.offsets[node]
+        hi = self.offsets[node + 1]
+        return zip(self.targets[lo:hi], self.weights[lo:hi])
+
+    @classmethod
+    def fromEdges(cls, numNodes, edges, directed = True, labels = None, coordinates = None, metric = 'euclidean'):
+        """
+        Builds the CSR arrays from (u, v, w) triples with a counting sort
+        :param numNodes:
+        :param edges: iterable of (source, target, weight) with nodes in 0..numNodes-1
+        :param directed: if False every edge is also added in reverse
+        :param metric: a name in METRICS, how heuristic 2 measures coordinates
+        :return:
+        """
+
+        sources = array('q')
+        targets = array('q')
+        weights = array('d')
+        for (u, v, w) in edges:
+            sources.append(u)
+            targets.append(v)
+            weights.append(w)
+            if not directed:
+                sources.append(v)
+                targets.append(u)
+                weights.append(w)
+
+        degree = [0] * (numNodes + 1)
+        for u in sources:
+            degree[u + 1] += 1
+        for i in range(numNodes):
+            degree[i + 1] += degree[i]
+        offsets = array('q', degree)
+
+        fill = list(degree[:numNodes])
+        sortedTargets = array('q', bytes(8 * len(targets)))
+        sortedWeights = array('d', bytes(8 * len(weights)))
+        for (u, v, w) in zip(sources, targets, weights):
+            i = fill[u]
+            sortedTargets[i] = v
+            sortedWeights[i] = w
+            fill[u] = i + 1
+        return cls(offsets, sortedTargets, sortedWeights, labels, coordinates, None, metric)
+
+    @classmethod
+    def fromMaze(cls, maze, allow_diagonal_movement = False, movement = None):
+        """
+        A weighted maze as a graph: one node per cell, an edge into every walkable
+        neighbour weighing that neighbour's cost, and the cell position as label
+        and coordinates, so paths come back in the usual cell format.
+        A movementModels model or model name in movement replaces
+        allow_diagonal_movement: its moves, move costs and distance are used.
+        """
+
+        movement = getMovement(movement, allow_diagonal_movement)
+        metric = next((name for (name, distance) in METRICS.items() if distance is movement.distance), None)
+        if metric is None:
+            raise ValueError(f'no graph metric matches the distance of {movement!r}')
+        rows = len(maze)
+        cols = len(maze[rows - 1])
+        offsets = array('q', [0])
+        targets = array('q')
+        weights = array('d')
+        for r in range(rows):
+            for c in range(cols):
+                if maze[r][c] != 0:
+                    for ((nr, nc), weight) in movement.neighbours(maze, (r, c)):
+                        targets.append(nr * cols + nc)
+                        weights.append(weight)
+                offsets.append(len(targets))
+        positions = [(r, c) for r in range(rows) for c in range(cols)]
+        costs = [maze[r][c] for r in range(rows) for c in range(cols)]
+        return cls(offsets, targets, weights, positions, positions, costs, metric)
+
+
+def loadEdgeList(path, directed = False, coordinatesPath = None, metric = 'euclidean'):
+    """
+    Reads an edge-list file into a CSRGraph
+    Each line is "source target [weight]" with any hashable tokens as node ids;
+    weights default to 1 and lines starting with # are skipped. The optional
+    coordinates file has lines "id x y" and must give every node of the edges;
+    a node it leaves out raises ValueError.
+    :param path:
+    :param directed:
+    :param coordinatesPath:
+    :param metric: a name in METRICS, how heuristic 2 measures coordinates
+    :return:
+    """
+
+    ids = {}
+    labels = []
+    def nodeId(token):
+        node = ids.get(token)
+        if node is None:
+            node = ids[token] = len(labels)
+            labels.append(token)
+        return node
+
+    edges = []
+    with open(path) as edgeFile:
+        for line in edgeFile:
+            fields = line.split()
+            if not fields or fields[0].startswith('#'):
+                continue
+            weight = float(fields[2]) if len(fields) > 2 else 1.0
+            edges.append((nodeId(fields[0]), nodeId(fields[1]), weight))
+
+    coordinates = None
+    if coordinatesPath is not None:
+        coordinates = [None] * len(labels)
+        with open(coordinatesPath) as coordinateFile:
+            for line in coordinateFile:
+                fields = line.split()
+                if not fields or fields[0].startswith('#') or fields[0] not in ids:
+                    continue
+                coordinates[ids[fields[0]]] = (float(fields[1]), float(fields[2]))
+
+    # labels that look like integers are handed back as integers
+    if all(label.lstrip('-').isdigit() for label in labels):
+        labels = [int(label) for label in labels]
+    return CSRGraph.fromEdges(len(labels), edges, directed, labels, coordinates, metric)
+
+
+def graphHeuristic(graph, heuristic, goal):
+    """
+    h(node) for a heuristic number of astarFix-modified, measured on graph coordinates
+    Distances use the graph's metric. A callable heuristic(graph, node, goal)
+    is used as is; without coordinates every number falls back to the zero
+    heuristic.
+    """
+
+    if callable(heuristic):
+        return lambda node: heuristic(graph, node, goal)
+    coordinates = graph.coordinates
+    if coordinates is None or heuristic == 1:
+        return lambda node: 0
+    (gy, gx) = coordinates[goal]
+    distance = METRICS[graph.metric]
+    match heuristic:
+        case 3 if graph.costs is not None:
+            costs = graph.costs
+            return lambda node: (0.5 * costs[node]) * abs(coordinates[node][0] - gy) + abs(coordinates[node][1] - gx)
+        case 4:
+            errors = list(range(-10, 0)) + list(range(1, 11))
+            return lambda node: max(0, distance(abs(coordinates[node][0] - gy), abs(coordinates[node][1] - gx)) + random.choice(errors))
+        case _:
+            return lambda node: distance(abs(coordinates[node][0] - gy), abs(coordinates[node][1] - gx))
+
+def euclideanHeuristic(graph, node, goal):
+    """Straight-line distance; admissible when no edge is shorter than its length"""
+    (y1, x1) = graph.coordinates[node]
+    (y2, x2) = graph.coordinates[goal]
+    return math.hypot(y1 - y2, x1 - x2)
+
+def astarGraph(graph, start, end, heuristic = 2):
+    """
+    A* over a CSRGraph; returns (path, totalNodes) like astarFix-modified.astar
+    start, end and the returned path use the graph's labels.
+    :param graph:
+    :param start:
+    :param end:
+    :param heuristic: a heuristic number or a callable heuristic(graph, node, goal)
+    :return:
+    """
+
+    offsets = graph.offsets
+    targets = graph.targets
+    weights = graph.weights
+    startNode = graph.ids[start]
+    endNode = graph.ids[end]
+    h = graphHeuristic(graph, heuristic, endNode)
+
+    g = {startNode: 0}
+    parent = {startNode: -1}
+    closed = set()
+    open_list = [(h(startNode), 0, startNode)]
+    totalNodes = 0
+
+    while open_list:
+        f, _, current = heapq.heappop(open_list)
+        if current in closed:
+            continue
+        closed.add(current)
+
+        # Found the goal
+        if current == endNode:
+            path = []
+            while current != -1:
+                path.append(graph.labels[current])
+                current = parent[current]
+            return (path[::-1], totalNodes)
+
+        currentG = g[current]
+        for i in range(offsets[current], offsets[current + 1]):
+            child = targets[i]
+            totalNodes += 1
+            if child in closed:
+                continue
+            childG = currentG + weights[i]
+            if childG < g.get(child, math.inf):
+                g[child] = childG
+                parent[child] = current
+                heapq.heappush(open_list, (childG + h(child), -childG, child))
+
+    warn("Couldn't get a path to destination")
+    return ([], totalNodes)
+
+
+def main():
+    maze = [
+        [2, 4, 2, 1, 4, 5, 2],
+        [0, 1, 2, 3, 5, 3, 1],
+        [2, 0, 4, 4, 1, 2, 4],
+        [2, 5, 5, 3, 2, 0, 1],
+        [4, 3, 3, 2, 1, 0, 1]
+    ]
+    graph = CSRGraph.fromMaze(maze)
+    print(f'Nodes:\n{len(graph)}')
+    print(f'Edges:\n{graph.numEdges()}')
+    print(f'Path found:\n{astarGraph(graph, (1, 2), (4, 3))[0]}')
+
+    # a small road graph: 4 junctions on a square with one diagonal shortcut
+    edges = [(0, 1, 1.0), (1, 2, 1.0), (2, 3, 1.0), (3, 0, 1.0), (0, 2, 1.5)]
+    roads = CSRGraph.fromEdges(4, edges, directed=False, coordinates=[(0, 0), (0, 1), (1, 1), (1, 0)])
+    print(f'Road path:\n{astarGraph(roads, 0, 2)[0]}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+"""
+Flow fields for many agents heading to the same goal on a weighted maze
+
+One backward Dijkstra search from the goal gives every cell its cost to reach
+the goal; the next step of every cell is then picked for the whole grid at
+once with NumPy. An agent moves by looking up its own cell, so any number of
+agents costs one search. Cells are the cost of entering them and 0 is a wall,
+as in astarFix-modified.
+"""
+import heapq
+
+import numpy as np
+
+from astarCommon import adjacentSquares
+
+NO_STEP = -1
+
+class FlowField:
+    """
+    Distance and next-step grids towards a single goal
+    distance[r][c] is the cost of the cheapest path from (r, c) to the goal and
+    direction[r][c] is the index into directions of its first move, or NO_STEP
+    at the goal and on cells that cannot reach it.
+    """
+
+    def __init__(self, maze, goal, allow_diagonal_movement = False):
+        self.rows = len(maze)
+        self.cols = len(maze[self.rows - 1])
+        self.directions = adjacentSquares(allow_diagonal_movement)
+        # pad with a wall border so neighbours never need bounds checks
+        self.costs = np.zeros((self.rows + 2, self.cols + 2), dtype=np.int64)
+        self.costs[1:-1, 1:-1] = np.asarray(maze, dtype=np.int64)
+        self.width = self.cols + 2
+        self.offsets = [dy * self.width + dx for (dy, dx) in self.directions]
+        self.setGoal(goal)
+
+    def setGoal(self, goal):
+        """
+        Moves the goal and repairs the field; returns the cells settled
+        A cell whose route ran through the new goal keeps that route, now
+        shorter by what the new goal cost to reach from it. Every other cell
+        is re-settled from those, as updateCells() re-settles the cells behind
+        a dearer one. The first goal and a goal the old field cannot reach get
+        a full backward search.
+        """
+
+        goalIndex = self.index(goal)
+        if self.costs.flat[goalIndex] == 0:
+            raise ValueError(f'goal {goal} is a wall')
+        oldGoal = getattr(self, 'goal', None)
+        self.goal = goal
+        if oldGoal is None or not np.isfinite(self.dist[goalIndex]):
+            self.dist = np.full(self.costs.size, np.inf)
+            self.dist[goalIndex] = 0
+            self.searched = self.propagate([(0, goalIndex)])
+            self.computeDirections()
+            return self.searched
+
+        dist = self.dist
+        kept = self.upstream([goalIndex])
+        kept.add(goalIndex)
+        kept = np.fromiter(kept, dtype=np.int64)
+        stale = np.isfinite(dist)
+        stale[kept] = False
+        dist[kept] -= dist[goalIndex]
+        dist[stale] = np.inf
+        settled = self.propagate(self.reseed(np.flatnonzero(stale)))
+        self.computeDirections()
+        return settled
+
+    def index(self, position):
+        return (position[0] + 1) * self.width + position[1] + 1
+
+    def propagate(self, heap):
+        """Backward Dijkstra from the seeded cells; returns how many cells were settled"""
+        # plain lists are much faster than NumPy scalars for one element at a time
+        dist = self.dist.tolist()
+        costs = self.costs.ravel().tolist()
+        offsets = self.offsets
+        heapq.heapify(heap)
+        settled = 0
+        while heap:
+            d, v = heapq.heappop(heap)
+            if d > dist[v]:
+                continue
+            settled += 1
+            # stepping from a neighbour u into v costs the cost of v
+            nd = d + costs[v]
+            for offset in offsets:
+                u = v - offset
+                if costs[u] and nd < dist[u]:
+                    dist[u] = nd
+                    heapq.heappush(heap, (nd, u))
+        self.dist[:] = dist
+        return settled
+
+    def computeDirections(self):
+        """Picks the cheapest next step of every cell in one vectorised pass"""
+        rows, cols = self.rows, self.cols
+        dist = self.dist.reshape(self.costs.shape)
+        # what it costs to finish the route through each cell once you step into it
+        through = np.where(self.costs > 0, dist + self.costs, np.inf)
+        candidates = np.stack([through[1 + dy:rows + 1 + dy, 1 + dx:cols + 1 + dx] for (dy, dx) in self.directions])
+        best = candidates.argmin(axis=0)
+        reachable = np.isfinite(candidates.min(axis=0)) & (self.costs[1:-1, 1:-1] > 0)
+        direction = np.where(reachable, best, NO_STEP).astype(np.int8)
+        direction[self.goal] = NO_STEP
+        self.direction = direction
+        self.distance = dist[1:-1, 1:-1]
+
+    def nextStep(self, position):
+        """The cell an agent at position should move to next, or None at the goal or when stuck"""
+        k = self.direction[position]
+        if k == NO_STEP:
+            return None
+        (dy, dx) = self.directions[k]
+        return (position[0] + dy, position[1] + dx)
+
+    def path(self, start):
+        """Follows the field from start; an empty list if the goal cannot be reached"""
+        if not np.isfinite(self.distance[start]):
+            return []
+        path = [start]
+        position = self.nextStep(start)
+        while position is not None:
+            path.append(position)
+            position = self.nextStep(position)
+        return path
+
+    def updateCells(self, changes):
+        """
+        Applies new costs to a few cells and repairs the field around them
+        Only cells whose route ran through a cell that got dearer are reset;
+        they and the cells near cheaper or newly opened cells are then
+        re-settled from their intact neighbours. Returns the cells settled.
+        :param changes: dict of (row, col) -> new cost, 0 for a new wall
+        :return:
+        """
+
+        costs = self.costs.ravel()
+        dist = self.dist
+        dearer = []
+        cheaper = []
+        for (position, cost) in changes.items():
+            i = self.index(position)
+            old = costs[i]
+            costs[i] = cost
+            if cost == 0 or (old and cost > old):
+                dearer.append(i)
+            elif cost < old or not old:
+                cheaper.append(i)
+
+        # everything whose chain of next steps leads into a dearer cell
+        stale = self.upstream(dearer)
+        for i in dearer:
+            if costs[i] == 0:
+                stale.add(i)
+        goalIndex = self.index(self.goal)
+        stale.discard(goalIndex)
+        if costs[goalIndex] == 0:
+            raise ValueError(f'goal {self.goal} is a wall')
+
+        staleList = list(stale)
+        dist[staleList] = np.inf
+        # reseed reset and newly opened cells from the intact part of the field
+        heap = self.reseed(np.array(staleList + [i for i in cheaper if not np.isfinite(dist[i])], dtype=np.int64))
+        # cheaper cells make their neighbours cheaper in turn
+        for i in cheaper:
+            if np.isfinite(dist[i]):
+                heap.append((dist[i], i))
+
+        settled = self.propagate(heap)
+        self.computeDirections()
+        return settled
+
+    def upstream(self, roots):
+        """Flat padded indices of the cells whose chain of next steps leads into one of roots"""
+        nxt = self.nextIndices()
+        order = np.argsort(nxt, kind='stable')
+        sortedNext = nxt[order]
+        found = set()
+        stack = list(roots)
+        while stack:
+            v = stack.pop()
+            lo, hi = np.searchsorted(sortedNext, [v, v + 1])
+            for u in order[lo:hi].tolist():
+                if u not in found:
+                    found.add(u)
+                    stack.append(u)
+        return found
+
+    def reseed(self, cells):
+        """
+        Heap entries for cells from their neighbours' distances
+        cells must hold inf and their neighbours outside cells their final
+        distances; walls among cells stay inf.
+        """
+
+        costs = self.costs.ravel()
+        dist = self.dist
+        if not cells.size:
+            return []
+        through = np.where(costs > 0, dist + costs, np.inf)
+        best = np.min([through[cells + offset] for offset in self.offsets], axis=0)
+        best[costs[cells] == 0] = np.inf
+        better = best < dist[cells]
+        dist[cells[better]] = best[better]
+        return list(zip(best[better].tolist(), cells[better].tolist()))
+
+    def nextIndices(self):
+        """Flat padded index of every cell's next step, -1 where there is none"""
+        nxt = np.full(self.costs.shape, -1, dtype=np.int64)
+        inner = self.direction
+        offsets = np.array(self.offsets + [0], dtype=np.int64)
+        base = np.arange(self.costs.size, dtype=np.int64).reshape(self.costs.shape)[1:-1, 1:-1]
+        nxt[1:-1, 1:-1] = np.where(inner >= 0, base + offsets[inner], -1)
+        return nxt.ravel()
+
+
+def main():
+    maze = [
+        [2, 0, 2, 0, 2, 0, 0, 2, 2, 0],
+        [1, 2, 3, 5, 2, 1, 2, 5, 1, 2],
+        [2, 0, 2, 2, 1, 2, 1, 2, 4, 2],
+        [2, 0, 1, 0, 1, 1, 1, 0, 0, 1],
+        [1, 1, 0, 0, 5, 0, 3, 2, 2, 2],
+        [2, 2, 2, 2, 1, 0, 1, 2, 1, 0],
+        [1, 0, 2, 1, 3, 1, 4, 3, 0, 1],
+        [2, 0, 5, 1, 5, 2, 1, 2, 4, 1],
+        [1, 2, 2, 2, 0, 2, 0, 1, 1, 0],
+        [5, 1, 2, 1, 1, 1, 2, 0, 1, 2]
+    ]
+    field = FlowField(maze, (8, 8))
+    for start in ((1, 2), (9, 0), (0, 8)):
+        print(f'{start}: {field.path(start)}')
+    settled = field.updateCells({(6, 7): 0, (4, 4): 1})
+    print(f'Cells re-settled after two changes:\n{settled}')
+    print(f'(1, 2): {field.path((1, 2))}')
+    settled = field.setGoal((7, 6))
+    print(f'Cells re-settled after moving the goal to (7, 6):\n{settled}')
+    print(f'(1, 2): {field.path((1, 2))}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""
+How good is each heuristic of astarCommon.HEURISTICS, measured over many generated mazes
+
+Every registered heuristic drives the same A* over the same queries, spread
+over a process pool. A backward Dijkstra from the end gives the true
+remaining cost h* of every cell, against which each query records:
+
+- expansions: nodes taken off the open list
+- excess: how much dearer the path found is than the optimal one
+- violations: heuristic values above h*, i.e. where admissibility fails
+
+The report ranks the heuristics that stay within the accepted excess by
+expansions, fastest first, followed by the ones that do not.
+
+    python heuristicQuality.py [MAZES] [SIZE] [WORKERS] [TOLERANCE]
+"""
+from concurrent.futures import ProcessPoolExecutor
+import heapq
+import math
+import os
+import random
+import sys
+import time
+
+from astarCommon import HEURISTICS, Node
+from compiledMaze import CompiledMaze
+from mazeGenerators import generate, pickEndpoints
+
+# generators the mazes are drawn from in turn, with the options that make costs vary
+KINDS = (
+    ('random', {'density': 0.25, 'maxCost': 5}),
+    ('terrain', {}),
+    ('rooms', {}),
+    ('backtracker', {}),
+)
+
+def optimalCosts(compiled, endIndex, offsets):
+    """h* of every flat index that can reach the end: a backward Dijkstra where entering a cell costs its value"""
+    cells = compiled.cells
+    dist = {endIndex: 0}
+    heap = [(0, endIndex)]
+    while heap:
+        (d, index) = heapq.heappop(heap)
+        if d > dist[index]:
+            continue
+        # stepping from a neighbour into index costs the cell at index
+        cost = cells[index]
+        for offset in offsets:
+            neighbour = index - offset
+            if cells[neighbour] != 0 and d + cost < dist.get(neighbour, math.inf):
+                dist[neighbour] = d + cost
+                heapq.heappush(heap, (d + cost, neighbour))
+    return dist
+
+def measuredSearch(compiled, start, end, heuristic, hStar, offsets):
+    """
+    A* with one heuristic function of astarCommon, checking every value it gives against h*
+    :return: (cost or None, expansions, evaluations, violations)
+    """
+
+    cells = compiled.cells
+    startIndex = compiled.index(start)
+    endIndex = compiled.index(end)
+    endNode = Node(None, end)
+    evaluations = 0
+    violations = 0
+
+    def h(index):
+        nonlocal evaluations, violations
+        value = heuristic(Node(None, compiled.position(index), cells[index]), endNode)
+        evaluations += 1
+        if value > hStar.get(index, math.inf):
+            violations += 1
+        return value
+
+    g = {startIndex: 0}
+    closed = set()
+    open_list = [(h(startIndex), 0, startIndex)]
+    counter = 0
+    while open_list:
+        (f, _, current) = heapq.heappop(open_list)
+        if current in closed:
+            continue
+        closed.add(current)
+        if current == endIndex:
+            return (g[current], len(closed), evaluations, violations)
+        currentG = g[current]
+        for offset in offsets:
+            child = current + offset
+            cost = cells[child]
+            if cost == 0 or child in closed:
+                continue
+            childG = currentG + cost
+            if childG < g.get(child, math.inf):
+                g[child] = childG
+                counter += 1
+                heapq.heappush(open_list, (childG + h(child), counter, child))
+    return (None, len(closed), evaluations, violations)
+
+def evaluateMaze(task):
+    """
+    Worker: every heuristic on the queries of one generated maze
+    :param task: (kind, options, size, seed, queries, allow_diagonal_movement)
+    :return: {heuristic number: [queries, expansions, excess, worst excess, evaluations, violations, seconds]}
+    """
+
+    (kind, options, size, seed, queries, allow_diagonal_movement) = task
+    maze = generate(kind, size, size, seed, **options)
+    compiled = CompiledMaze(maze.tolist())
+    offsets = compiled.offsets(allow_diagonal_movement)
+    totals = {number: [0, 0, 0.0, 0.0, 0, 0, 0.0] for number in HEURISTICS}
+    for (query, (start, end)) in enumerate(pickEndpoints(maze, queries, seed)):
+        hStar = optimalCosts(compiled, compiled.index(end), offsets)
+        optimal = hStar.get(compiled.index(start))
+        if optimal is None or start == end:
+            continue
+        for (number, heuristic) in HEURISTICS.items():
+            # the error heuristic draws from random: same seed, same draws in any worker
+            random.seed(seed * 1000 + query)
+            startTime = time.perf_counter()
+            (cost, expansions, evaluations, violations) = measuredSearch(compiled, start, end, heuristic, hStar, offsets)
+            seconds = time.perf_counter() - startTime
+            excess = (cost - optimal) / optimal if optimal else 0.0
+            row = totals[number]
+            row[0] += 1
+            row[1] += expansions
+            row[2] += excess
+            row[3] = max(row[3], excess)
+            row[4] += evaluations
+            row[5] += violations
+            row[6] += seconds
+    return totals
+
+def evaluate(mazes = 1000, size = 32, workers = None, queries = 2, allow_diagonal_movement = False, seed = 0):
+    """Runs evaluateMaze over mazes generated mazes in a process pool and sums the results per heuristic"""
+    tasks = [(*KINDS[i % len(KINDS)], size, seed + i, queries, allow_diagonal_movement) for i in range(mazes)]
+    totals = {number: [0, 0, 0.0, 0.0, 0, 0, 0.0] for number in HEURISTICS}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for result in pool.map(evaluateMaze, tasks, chunksize=max(1, mazes // (4 * (workers or os.cpu_count() or 1)))):
+            for (number, row) in result.items():
+                total = totals[number]
+                for k in (0, 1, 2, 4, 5, 6):
+                    total[k] += row[k]
+                total[3] = max(total[3], row[3])
+    return totals
+
+def rankHeuristics(totals, tolerance = 0.0):
+    """
+    One summary dict per heuristic, the acceptable ones (mean excess within
+    tolerance) first and each group by mean expansions
+    """
+
+    report = []
+    for (number, (queries, expansions, excess, worst, evaluations, violations, seconds)) in totals.items():
+        queries = max(queries, 1)
+        report.append({
+            'heuristic': number,
+            'name': HEURISTICS[number].__name__,
+            'expansions': expansions / queries,
+            'meanExcess': excess / queries,
+            'worstExcess': worst,
+            'violationRate': violations / evaluations if evaluations else 0.0,
+            'milliseconds': seconds * 1000 / queries,
+            'acceptable': excess / queries <= tolerance,
+        })
+    report.sort(key=lambda row: (not row['acceptable'], row['expansions']))
+    return report
+
+def printReport(report):
+    print(f'{"rank":<6}{"h":>3}{"name":>26}{"expansions":>12}{"excess":>10}{"worst":>9}{"h > h*":>9}{"ms":>9}  verdict')
+    for (rank, row) in enumerate(report, 1):
+        verdict = 'ok' if row['acceptable'] else 'too costly'
+        print(f'{rank:<6}{row["heuristic"]:>3}{row["name"]:>26}{row["expansions"]:>12.1f}{row["meanExcess"]:>10.2%}'
+              f'{row["worstExcess"]:>9.2%}{row["violationRate"]:>9.2%}{row["milliseconds"]:>9.3f}  {verdict}')
+
+
+def main():
+    args = sys.argv[1:]
+    mazes = int(args[0]) if len(args) > 0 else 1000
+    size = int(args[1]) if len(args) > 1 else 32
+    workers = int(args[2]) if len(args) > 2 else None
+    tolerance = float(args[3]) if len(args) > 3 else 0.0
+    startTime = time.perf_counter()
+    totals = evaluate(mazes, size, workers)
+    print(f'{mazes} mazes of {size} x {size} in {time.perf_counter() - startTime:.1f} s')
+    printReport(rankHeuristics(totals, tolerance))
+
+
+if __name__ == '__main__':
+    main()
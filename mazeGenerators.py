@@ -0,0 +1,222 @@
+"""
+Seeded maze and terrain generators for load testing
+
+Every generator produces a weighted maze (cell = cost of entering it, 0 = wall)
+as a uint8 NumPy array, built in bands of BAND rows so a 10k x 10k map never
+needs more than a band of temporaries. The same seed always gives the same
+maze, whatever the size of the bands written to disk.
+
+    python mazeGenerators.py KIND ROWS COLS SEED DIRECTORY
+
+writes a maze straight into the chunked format read by chunkedMaze.ChunkedMaze.
+"""
+from array import array
+from itertools import permutations
+import sys
+
+import numpy as np
+
+from chunkedMaze import writeChunkedMaze
+
+# rows generated per step; part of the seed contract, so do not change it
+BAND = 256
+
+# every order in which the backtracker can try the four neighbours of a room
+NEIGHBOUR_ORDERS = tuple(permutations(((-1, 0), (1, 0), (0, -1), (0, 1))))
+
+def randomObstacles(rows, cols, seed = 0, density = 0.3, maxCost = 1):
+    """
+    Walls scattered independently with the given density
+    Walkable cells cost 1, or a uniform 1..maxCost.
+    """
+
+    rng = np.random.default_rng(seed)
+    for top in range(0, rows, BAND):
+        height = min(BAND, rows - top)
+        walls = rng.random((height, cols)) < density
+        costs = rng.integers(1, maxCost + 1, (height, cols), dtype=np.uint8) if maxCost > 1 else np.ones((height, cols), dtype=np.uint8)
+        costs[walls] = 0
+        yield costs
+
+def noiseTerrain(rows, cols, seed = 0, scale = 32, octaves = 3, waterLevel = 0.3):
+    """
+    Smooth weighted terrain from layered value noise
+    Noise below waterLevel becomes wall; the rest is split evenly into costs 1 to 5.
+    """
+
+    # every lattice row has its own seed, so a band only draws the rows it needs
+    # and the map does not depend on how many rows are generated after it
+    def latticeRows(octave, step, first, last):
+        return np.stack([np.random.default_rng([seed, octave, i]).random(cols // step + 2) for i in range(first, last + 1)])
+
+    def smoothstep(t):
+        return t * t * (3 - 2 * t)
+
+    weights = [0.5 ** octave for octave in range(octaves)]
+    total = sum(weights)
+    colsIndex = np.arange(cols)
+    for top in range(0, rows, BAND):
+        height = min(BAND, rows - top)
+        rowsIndex = np.arange(top, top + height)
+        noise = np.zeros((height, cols))
+        for octave in range(octaves):
+            # each octave is twice as fine as the last
+            step = max(1, scale >> octave)
+            (y0, fy) = np.divmod(rowsIndex, step)
+            (x0, fx) = np.divmod(colsIndex, step)
+            ty = smoothstep(fy / step)[:, None]
+            tx = smoothstep(fx / step)[None, :]
+            lattice = latticeRows(octave, step, y0[0], y0[-1] + 1)
+            # along the columns on the few lattice rows first, then between rows
+            across = lattice[:, x0] * (1 - tx) + lattice[:, x0 + 1] * tx
+            y0 = y0 - y0[0]
+            noise += weights[octave] * (across[y0] * (1 - ty) + across[y0 + 1] * ty)
+        noise /= total
+        land = (noise - waterLevel) / (1 - waterLevel)
+        costs = np.clip(np.floor(land * 5) + 1, 1, 5).astype(np.uint8)
+        costs[noise < waterLevel] = 0
+        yield costs
+
+def roomsAndCorridors(rows, cols, seed = 0, roomSize = (4, 12), cellSize = 16):
+    """
+    Rectangular rooms, one per cellSize x cellSize block, joined by L-shaped corridors
+    Rooms are linked block by block along each row of blocks and down the first
+    column, so every room is reachable. All cells are walls or cost 1.
+    """
+
+    rng = np.random.default_rng(seed)
+    blockRows = max(1, rows // cellSize)
+    blockCols = max(1, cols // cellSize)
+    count = blockRows * blockCols
+    low, high = roomSize
+    high = min(high, cellSize - 1)
+    low = min(low, high)
+    heights = rng.integers(low, high + 1, count)
+    widths = rng.integers(low, high + 1, count)
+    tops = np.arange(count) // blockCols * cellSize + rng.integers(0, cellSize - heights + 1)
+    lefts = np.arange(count) % blockCols * cellSize + rng.integers(0, cellSize - widths + 1)
+    tops = np.minimum(tops, rows - heights).clip(0)
+    lefts = np.minimum(lefts, cols - widths).clip(0)
+    bottoms = np.minimum(tops + heights, rows)
+    rights = np.minimum(lefts + widths, cols)
+    centreRows = (tops + bottoms) // 2
+    centreCols = (lefts + rights) // 2
+
+    # every rectangle to carve, rooms first, as (top, bottom, left, right)
+    rects = [np.stack([tops, bottoms, lefts, rights], axis=1)]
+    blocks = np.arange(count)
+    links = [(blocks[blocks % blockCols != blockCols - 1], 1), (blocks[(blocks % blockCols == 0) & (blocks < count - blockCols)], blockCols)]
+    for (sources, stride) in links:
+        targets = sources + stride
+        (r1, c1, r2, c2) = (centreRows[sources], centreCols[sources], centreRows[targets], centreCols[targets])
+        # horizontal leg along the source row, then vertical leg along the target column
+        rects.append(np.stack([r1, r1 + 1, np.minimum(c1, c2), np.maximum(c1, c2) + 1], axis=1))
+        rects.append(np.stack([np.minimum(r1, r2), np.maximum(r1, r2) + 1, c2, c2 + 1], axis=1))
+    rects = np.concatenate(rects)
+    order = np.argsort(rects[:, 0], kind='stable')
+    rects = rects[order]
+
+    for top in range(0, rows, BAND):
+        height = min(BAND, rows - top)
+        band = np.zeros((height, cols), dtype=np.uint8)
+        # only rectangles starting above the band's end can reach into it
+        last = np.searchsorted(rects[:, 0], top + height)
+        candidates = rects[:last]
+        candidates = candidates[candidates[:, 1] > top]
+        for (r1, r2, c1, c2) in candidates.tolist():
+            band[max(r1, top) - top:min(r2, top + height) - top, c1:c2] = 1
+        yield band
+
+def recursiveBacktracker(rows, cols, seed = 0):
+    """
+    A perfect maze carved by randomised depth-first search
+    Cells on even rows and columns are rooms; the carving itself is inherently
+    sequential, so this is the one generator that loops in Python over every room.
+    Its state is a few bytes per room in bytearrays and an array of room numbers,
+    which stays within a few hundred MB at 10k x 10k.
+    """
+
+    rng = np.random.default_rng(seed)
+    roomRows = (rows + 1) // 2
+    roomCols = (cols + 1) // 2
+    rooms = roomRows * roomCols
+    maze = bytearray(rows * cols)
+    visited = bytearray(rooms)
+    # one of the 24 neighbour orders per room, drawn up front in bulk as one byte each
+    orders = rng.integers(len(NEIGHBOUR_ORDERS), size=rooms, dtype=np.uint8).tobytes()
+    tried = bytearray(rooms)
+    visited[0] = 1
+    maze[0] = 1
+    stack = array('q', [0])
+    while stack:
+        room = stack[-1]
+        (r, c) = divmod(room, roomCols)
+        order = NEIGHBOUR_ORDERS[orders[room]]
+        k = tried[room]
+        while k < 4:
+            (dr, dc) = order[k]
+            k += 1
+            nr = r + dr
+            nc = c + dc
+            if 0 <= nr < roomRows and 0 <= nc < roomCols and not visited[nr * roomCols + nc]:
+                visited[nr * roomCols + nc] = 1
+                # open the wall between the two rooms and the new room itself
+                maze[(2 * r + dr) * cols + 2 * c + dc] = 1
+                maze[2 * nr * cols + 2 * nc] = 1
+                stack.append(nr * roomCols + nc)
+                break
+        else:
+            stack.pop()
+        tried[room] = k
+    maze = np.frombuffer(maze, dtype=np.uint8).reshape(rows, cols)
+    for top in range(0, rows, BAND):
+        yield maze[top:top + BAND]
+
+GENERATORS = {
+    'random': randomObstacles,
+    'terrain': noiseTerrain,
+    'rooms': roomsAndCorridors,
+    'backtracker': recursiveBacktracker,
+}
+
+def generate(kind, rows, cols, seed = 0, **options):
+    """A whole maze as a rows x cols uint8 array"""
+    return np.concatenate(list(GENERATORS[kind](rows, cols, seed, **options)))
+
+def generateToDisk(kind, directory, rows, cols, seed = 0, chunkSize = 256, **options):
+    """Streams a maze into a chunk directory band by band without keeping it in memory"""
+    def mazeRows():
+        for band in GENERATORS[kind](rows, cols, seed, **options):
+            yield from band
+    writeChunkedMaze(directory, rows, cols, chunkSize, mazeRows())
+
+def toOccupancy(maze):
+    """The 0/1 form of astar.py and astarFix.py, where 0 is walkable and 1 a wall"""
+    return (np.asarray(maze) == 0).astype(np.uint8)
+
+def pickEndpoints(maze, count = 1, seed = 0):
+    """count (start, end) pairs of distinct walkable cells"""
+    rng = np.random.default_rng(seed)
+    (walkRows, walkCols) = np.nonzero(np.asarray(maze))
+    if len(walkRows) < 2:
+        raise ValueError('a maze needs at least two walkable cells for distinct endpoints')
+    picks = rng.choice(len(walkRows), size=(count, 2), replace=True)
+    same = picks[:, 0] == picks[:, 1]
+    while same.any():
+        picks[same, 1] = rng.choice(len(walkRows), size=int(same.sum()))
+        same = picks[:, 0] == picks[:, 1]
+    return [((int(walkRows[a]), int(walkCols[a])), (int(walkRows[b]), int(walkCols[b]))) for (a, b) in picks]
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) != 5:
+        print(f'USAGE: mazeGenerators.py KIND ROWS COLS SEED DIRECTORY (KIND IS ONE OF {", ".join(GENERATORS)})')
+    elif args[0] not in GENERATORS:
+        print(f'UNKNOWN GENERATOR {args[0]} (KIND IS ONE OF {", ".join(GENERATORS)})')
+    else:
+        generateToDisk(args[0], args[4], int(args[1]), int(args[2]), int(args[3]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+"""
+Movement models: which moves a search may make, what they cost and the heuristic that fits
+
+The engines only knew allow_diagonal_movement, with a diagonal move costing
+as much as an orthogonal one and Manhattan distance as h even when it
+overestimates diagonal paths. A MovementModel carries all three pieces, so an
+engine given one gets the same moves, costs and an admissible, consistent
+heuristic as any other engine given the same model.
+
+- four: the 4-connected moves of allow_diagonal_movement=False, Manhattan h
+- eight: astarFix's 8-connected moves, diagonals at the orthogonal price and
+  free to cut wall corners, Chebyshev h
+- octile: 8-connected with a diagonal costing sqrt(2) times an orthogonal
+  move, as the integers 99 and 70, octile h
+- octile-no-corners: octile, but a diagonal move needs both cells it passes
+  between to be walkable
+
+A move costs the cell it enters times the model's multiplier for the move,
+so octile costs come out in units of 1/70 of a cell; divide by scale to
+compare with the other models.
+"""
+from warnings import warn
+import heapq
+import math
+
+from astarCommon import flatTieKey
+from expansionTrace import END, POP, PUSH
+
+# sqrt(2) as a ratio of integers: 99 / 70 = 1.414285...
+ORTHOGONAL = 70
+DIAGONAL = 99
+
+def manhattan(dr, dc):
+    return dr + dc
+
+def chebyshev(dr, dc):
+    return max(dr, dc)
+
+def octile(dr, dc):
+    return ORTHOGONAL * max(dr, dc) + (DIAGONAL - ORTHOGONAL) * min(dr, dc)
+
+
+class MovementModel:
+    """
+    The moves of a grid search as (dy, dx, cost multiplier) and the matching heuristic
+    distance(dr, dc) takes the absolute row and column differences and never
+    exceeds the cost of a path between the cells as long as every cell costs
+    at least 1.
+    """
+
+    def __init__(self, name, moves, distance, cutsCorners = True, scale = 1):
+        self.name = name
+        self.moves = moves
+        self.distance = distance
+        self.cutsCorners = cutsCorners
+        self.scale = scale
+        # width of a flat grid -> its steps, see steps()
+        self.stepTables = {}
+
+    def __repr__(self):
+        return f'MovementModel({self.name!r})'
+
+    def steps(self, width):
+        """
+        (offset, multiplier, sideA, sideB) per move on a flat grid of the given width
+        sideA and sideB are the offsets of the two cells a diagonal move passes
+        between when the model forbids cutting corners, otherwise 0.
+        """
+
+        table = self.stepTables.get(width)
+        if table is None:
+            table = []
+            for (dy, dx, multiplier) in self.moves:
+                (sideA, sideB) = (0, 0)
+                if not self.cutsCorners and dy != 0 and dx != 0:
+                    (sideA, sideB) = (dy * width, dx)
+                table.append((dy * width + dx, multiplier, sideA, sideB))
+            table = self.stepTables[width] = tuple(table)
+        return table
+
+    def neighbours(self, maze, position):
+        """(position, cost) of every cell one move from position in a weighted maze"""
+        rows = len(maze)
+        cols = len(maze[rows - 1])
+        (row, col) = position
+        for (dy, dx, multiplier) in self.moves:
+            (r, c) = (row + dy, col + dx)
+            if not (0 <= r < rows and 0 <= c < cols) or maze[r][c] == 0:
+                continue
+            if not self.cutsCorners and dy != 0 and dx != 0 and (maze[row + dy][col] == 0 or maze[row][col + dx] == 0):
+                continue
+            yield ((r, c), maze[r][c] * multiplier)
+
+    def heuristic(self, position, end):
+        return self.distance(abs(position[0] - end[0]), abs(position[1] - end[1]))
+
+    def pathCost(self, maze, path):
+        """Cost of path under this model, start cell excluded as in the searches, or -1 if there is none"""
+        if not path:
+            return -1
+        multipliers = {(dy, dx): multiplier for (dy, dx, multiplier) in self.moves}
+        return sum(maze[b[0]][b[1]] * multipliers[(b[0] - a[0], b[1] - a[1])] for (a, b) in zip(path, path[1:]))
+
+
+ORTHOGONAL_MOVES = ((0, -1), (0, 1), (-1, 0), (1, 0))
+DIAGONAL_MOVES = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+
+MODELS = {
+    'four': MovementModel('four', tuple((dy, dx, 1) for (dy, dx) in ORTHOGONAL_MOVES), manhattan),
+    'eight': MovementModel('eight', tuple((dy, dx, 1) for (dy, dx) in ORTHOGONAL_MOVES + DIAGONAL_MOVES), chebyshev),
+    'octile': MovementModel('octile', tuple((dy, dx, ORTHOGONAL) for (dy, dx) in ORTHOGONAL_MOVES)
+                            + tuple((dy, dx, DIAGONAL) for (dy, dx) in DIAGONAL_MOVES), octile, True, ORTHOGONAL),
+    'octile-no-corners': MovementModel('octile-no-corners', tuple((dy, dx, ORTHOGONAL) for (dy, dx) in ORTHOGONAL_MOVES)
+                                       + tuple((dy, dx, DIAGONAL) for (dy, dx) in DIAGONAL_MOVES), octile, False, ORTHOGONAL),
+}
+
+def getMovement(movement, allow_diagonal_movement = False):
+    """The MovementModel for a model or model name; None means the model allow_diagonal_movement picks"""
+    if isinstance(movement, MovementModel):
+        return movement
+    if movement is None:
+        movement = 'eight' if allow_diagonal_movement else 'four'
+    if movement not in MODELS:
+        raise ValueError(f'unknown movement model {movement!r}, expected one of {", ".join(MODELS)}')
+    return MODELS[movement]
+
+
+def astarMovement(compiled, start, end, movement, heuristic = 2, tracer = None, blocked = None, tieBreak = 'g', stats = None):
+    """
+    A* over a CompiledMaze under a movement model; returns (path, totalNodes)
+    :param compiled: a compiledMaze.CompiledMaze
+    :param start:
+    :param end:
+    :param movement: a MovementModel or a name in MODELS
+    :param heuristic: 1 for none, anything else for the model's distance
+    :param tracer: optional expansionTrace.ExpansionTracer that records every push and pop
+    :param blocked: optional set of flat indices this query treats as walls
+    :param tieBreak: one of astarCommon.TIE_BREAKS; the default 'g' pops the deeper of two nodes of equal f
+    :param stats: optional dict that receives the number of nodes expanded
+    :return:
+    """
+
+    movement = getMovement(movement)
+    cells = compiled.cells
+    steps = movement.steps(compiled.width)
+    rowOf = compiled.rowOf
+    colOf = compiled.colOf
+    startIndex = compiled.index(start)
+    endIndex = compiled.index(end)
+    endRow = rowOf[endIndex]
+    endCol = colOf[endIndex]
+    distance = movement.distance
+    if heuristic == 1:
+        h = lambda i: 0
+    else:
+        h = lambda i: distance(abs(rowOf[i] - endRow), abs(colOf[i] - endCol))
+    tieKey = flatTieKey(tieBreak, rowOf, colOf, startIndex, endIndex)
+
+    g = {startIndex: 0}
+    parent = {startIndex: -1}
+    closed = set()
+    open_list = [(h(startIndex), 0, 0, startIndex)]
+    counter = 0
+    totalNodes = 0
+    # events are collected here and copied into the tracer once per query
+    trace = None
+    if tracer is not None:
+        tracer.begin(compiled.width, startIndex, 1)
+        trace = []
+
+    while open_list:
+        f, _, _, current = heapq.heappop(open_list)
+        if current in closed:
+            continue
+        closed.add(current)
+        currentG = g[current]
+        if trace is not None:
+            trace += (POP, current, currentG, f)
+
+        # Found the goal
+        if current == endIndex:
+            if stats is not None:
+                stats['expanded'] = len(closed)
+            if trace is not None:
+                trace += (END, current, currentG, 0)
+                tracer.extend(trace)
+            path = []
+            while current != -1:
+                path.append(compiled.position(current))
+                current = parent[current]
+            return (path[::-1], totalNodes)
+
+        for (offset, multiplier, sideA, sideB) in steps:
+            child = current + offset
+            cost = cells[child]
+            if cost == 0:
+                continue
+            if blocked is not None and child in blocked:
+                continue
+            # a diagonal move that may not squeeze past a wall corner
+            if sideA and (cells[current + sideA] == 0 or cells[current + sideB] == 0):
+                continue
+            totalNodes += 1
+            if child in closed:
+                continue
+            childG = currentG + cost * multiplier
+            if childG < g.get(child, math.inf):
+                g[child] = childG
+                parent[child] = current
+                counter += 1
+                childH = h(child)
+                f = childG + childH
+                if trace is not None:
+                    trace += (PUSH, child, childG, f)
+                heapq.heappush(open_list, (f, -childG if tieKey is None else tieKey(child, childG, childH, counter), counter, child))
+
+    if stats is not None:
+        stats['expanded'] = len(closed)
+    if trace is not None:
+        trace += (END, endIndex, 0, -1)
+        tracer.extend(trace)
+    warn("Couldn't get a path to destination")
+    return ([], totalNodes)
+
+
+def main():
+    from warnings import catch_warnings, simplefilter
+    from compiledMaze import CompiledMaze
+    from mazeGenerators import generate, pickEndpoints
+
+    maze = [
+        [1, 1, 1, 1, 1, 1, 1],
+        [1, 1, 0, 1, 1, 1, 1],
+        [1, 1, 1, 0, 1, 1, 1],
+        [1, 1, 1, 1, 1, 1, 1],
+    ]
+    compiled = CompiledMaze(maze)
+    for (name, movement) in MODELS.items():
+        (path, totalNodes) = astarMovement(compiled, (0, 1), (3, 5), movement)
+        print(f'{name}: cost {movement.pathCost(maze, path) / movement.scale:g} cells, {path}')
+
+    terrain = generate('terrain', 96, 96, seed=6)
+    maze = terrain.tolist()
+    compiled = CompiledMaze(maze)
+    queries = pickEndpoints(terrain, 30, seed=6)
+    print(f'{"model":<20}{"h":>3}{"expanded":>10}{"total cost":>13}')
+    with catch_warnings():
+        simplefilter('ignore')
+        for (name, movement) in MODELS.items():
+            for heuristic in (1, 2):
+                nodes = 0
+                cost = 0
+                for (start, end) in queries:
+                    (path, totalNodes) = astarMovement(compiled, start, end, movement, heuristic)
+                    nodes += totalNodes
+                    cost += max(movement.pathCost(maze, path), 0)
+                print(f'{name:<20}{heuristic:>3}{nodes:>10}{cost / movement.scale:>13.1f}')
+
+
+if __name__ == '__main__':
+    main()
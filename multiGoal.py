@@ -0,0 +1,232 @@
+"""
+Nearest-of-many-goals and nearest-of-many-sources queries on weighted mazes
+
+One search replaces a query per goal: A* runs toward the whole goal set with
+h = the distance to the nearest goal and stops at the first goal it settles,
+which is the cheapest one to reach. The nearest goal of a cell comes from a
+GoalIndex, a grid of buckets searched in rings outwards from the cell, so a
+heuristic value looks at the goals nearby instead of at all of them. A min of
+consistent heuristics is consistent, so the result stays optimal.
+
+Starting from several sources at once works the same way: every source
+enters the open list at g = 0, as if a super-source linked to all of them,
+and the path found starts at the source nearest to the end. Cells are the
+cost of entering them and 0 is a wall, as in astarFix-modified.
+"""
+from warnings import warn
+import heapq
+import math
+import time
+
+from compiledMaze import CompiledMaze, astarCompiled
+from movementModels import getMovement
+
+class GoalIndex:
+    """
+    Goal positions bucketed on a grid of bucketSize x bucketSize cells
+    nearest() looks at the bucket of the query first and then at rings of
+    buckets around it, and stops once no goal in the next ring can be closer.
+    """
+
+    def __init__(self, goals, bucketSize = 8):
+        self.bucketSize = bucketSize
+        self.buckets = {}
+        for goal in goals:
+            self.buckets.setdefault((goal[0] // bucketSize, goal[1] // bucketSize), []).append(goal)
+        if not self.buckets:
+            raise ValueError('a GoalIndex needs at least one goal')
+        rows = [bucket[0] for bucket in self.buckets]
+        cols = [bucket[1] for bucket in self.buckets]
+        self.bounds = (min(rows), max(rows), min(cols), max(cols))
+
+    def __len__(self):
+        return sum(len(goals) for goals in self.buckets.values())
+
+    def ring(self, bucketRow, bucketCol, k):
+        """The buckets at Chebyshev distance k around (bucketRow, bucketCol) that can hold goals"""
+        (top, bottom, left, right) = self.bounds
+        if k == 0:
+            return [(bucketRow, bucketCol)]
+        found = []
+        firstCol = max(bucketCol - k, left)
+        lastCol = min(bucketCol + k, right)
+        for row in (bucketRow - k, bucketRow + k):
+            if top <= row <= bottom:
+                found.extend((row, col) for col in range(firstCol, lastCol + 1))
+        for col in (bucketCol - k, bucketCol + k):
+            if left <= col <= right:
+                found.extend((row, col) for row in range(max(bucketRow - k + 1, top), min(bucketRow + k - 1, bottom) + 1))
+        return found
+
+    def nearest(self, position, allow_diagonal_movement = False, movement = None):
+        """
+        (distance, goal) of the goal nearest to position
+        Distance is that of the movement model: Manhattan, or Chebyshev when diagonal
+        moves are allowed, unless movement names another. It never overestimates a
+        maze path whose every cell costs at least 1.
+        """
+
+        modelDistance = getMovement(movement, allow_diagonal_movement).distance
+        (row, col) = position
+        size = self.bucketSize
+        (bucketRow, bucketCol) = (row // size, col // size)
+        (top, bottom, left, right) = self.bounds
+        lastRing = max(bucketRow - top, bottom - bucketRow, bucketCol - left, right - bucketCol)
+        best = math.inf
+        bestGoal = None
+        for k in range(lastRing + 1):
+            # every cell of ring k is at least this far away along one axis
+            if k > 0 and modelDistance((k - 1) * size + 1, 0) >= best:
+                break
+            for bucket in self.ring(bucketRow, bucketCol, k):
+                for goal in self.buckets.get(bucket, ()):
+                    distance = modelDistance(abs(goal[0] - row), abs(goal[1] - col))
+                    if distance < best:
+                        best = distance
+                        bestGoal = goal
+        return (best, bestGoal)
+
+
+def astarMany(maze, sources, goals, heuristic = 2, allow_diagonal_movement = False, index = None, stats = None, movement = None):
+    """
+    The cheapest path from any of sources to any of goals; returns (path, totalNodes)
+    path[0] is the source it starts from and path[-1] the goal it reaches.
+    :param maze: a CompiledMaze or a weighted maze
+    :param sources: start positions, all searched from at once
+    :param goals: goal positions; the search stops at the first one settled
+    :param heuristic: 1 for none (Dijkstra), anything else for the distance to the nearest goal
+    :param allow_diagonal_movement:
+    :param index: a GoalIndex of goals, to share between queries toward the same goals
+    :param stats: optional dict that receives the nodes expanded and the heuristic values computed
+    :param movement: a movementModels model or model name; its moves, move costs and
+        distance replace allow_diagonal_movement
+    :return:
+    """
+
+    compiled = maze if isinstance(maze, CompiledMaze) else CompiledMaze(maze)
+    cells = compiled.cells
+    movement = getMovement(movement, allow_diagonal_movement)
+    steps = movement.steps(compiled.width)
+    goalIndices = {compiled.index(goal) for goal in goals}
+    if heuristic == 1:
+        h = lambda i: 0
+    else:
+        if index is None:
+            index = GoalIndex(goals)
+        nearest = index.nearest
+        position = compiled.position
+        # a cell may be pushed several times; its nearest goal never changes
+        known = {}
+        def h(i):
+            value = known.get(i)
+            if value is None:
+                value = known[i] = nearest(position(i), movement=movement)[0]
+            return value
+
+    g = {}
+    parent = {}
+    open_list = []
+    counter = 0
+    for source in sources:
+        sourceIndex = compiled.index(source)
+        if cells[sourceIndex] != 0 and sourceIndex not in g:
+            g[sourceIndex] = 0
+            parent[sourceIndex] = -1
+            counter += 1
+            open_list.append((h(sourceIndex), 0, counter, sourceIndex))
+    heapq.heapify(open_list)
+    closed = set()
+    totalNodes = 0
+
+    while open_list:
+        f, negG, _, current = heapq.heappop(open_list)
+        if current in closed:
+            continue
+        closed.add(current)
+
+        # Found the nearest goal
+        if current in goalIndices:
+            if stats is not None:
+                stats['expanded'] = len(closed)
+                stats['heuristicValues'] = 0 if heuristic == 1 else len(known)
+            path = []
+            while current != -1:
+                path.append(compiled.position(current))
+                current = parent[current]
+            return (path[::-1], totalNodes)
+
+        currentG = g[current]
+        for (offset, multiplier, sideA, sideB) in steps:
+            child = current + offset
+            cost = cells[child]
+            if cost == 0:
+                continue
+            # a diagonal move that may not squeeze past a wall corner
+            if sideA and (cells[current + sideA] == 0 or cells[current + sideB] == 0):
+                continue
+            totalNodes += 1
+            if child in closed:
+                continue
+            childG = currentG + cost * multiplier
+            if childG < g.get(child, math.inf):
+                g[child] = childG
+                parent[child] = current
+                counter += 1
+                heapq.heappush(open_list, (childG + h(child), -childG, counter, child))
+
+    if stats is not None:
+        stats['expanded'] = len(closed)
+        stats['heuristicValues'] = 0 if heuristic == 1 else len(known)
+    warn("Couldn't get a path to destination")
+    return ([], totalNodes)
+
+def astarNearestGoal(maze, start, goals, heuristic = 2, allow_diagonal_movement = False, index = None, stats = None,
+                     movement = None):
+    """The cheapest path from start to whichever of goals is cheapest to reach; returns (path, totalNodes)"""
+    return astarMany(maze, (start,), goals, heuristic, allow_diagonal_movement, index, stats, movement)
+
+def astarNearestSource(maze, sources, end, heuristic = 2, allow_diagonal_movement = False, stats = None, movement = None):
+    """
+    The cheapest path to end from whichever of sources reaches it most cheaply,
+    e.g. the nearest agent to a cell; returns (path, totalNodes), path[0] being that source
+    """
+    return astarMany(maze, sources, (end,), heuristic, allow_diagonal_movement, None, stats, movement)
+
+
+def main():
+    from warnings import catch_warnings, simplefilter
+    import random
+    from astarCommon import pathCost
+    from mazeGenerators import generate
+
+    terrain = generate('terrain', 128, 128, seed=11)
+    maze = terrain.tolist()
+    compiled = CompiledMaze(maze)
+    walkable = [(r, c) for r in range(len(maze)) for c in range(len(maze[0])) if maze[r][c] != 0]
+    rng = random.Random(11)
+    depots = rng.sample(walkable, 500)
+    start = rng.choice(walkable)
+
+    startTime = time.perf_counter()
+    index = GoalIndex(depots)
+    stats = {}
+    (path, totalNodes) = astarNearestGoal(compiled, start, depots, index=index, stats=stats)
+    seconds = time.perf_counter() - startTime
+    print(f'Nearest of {len(depots)} depots from {start}: {path[-1]}, cost {pathCost(maze, path)}')
+    print(f'One multi-goal search:\n{seconds} ({stats["expanded"]} expanded, {stats["heuristicValues"]} heuristic values)')
+
+    startTime = time.perf_counter()
+    with catch_warnings():
+        simplefilter('ignore')
+        costs = [pathCost(maze, astarCompiled(compiled, start, depot)[0]) for depot in depots]
+    seconds = time.perf_counter() - startTime
+    best = min(cost for cost in costs if cost >= 0)
+    print(f'{len(depots)} single-goal searches:\n{seconds} (cheapest cost {best})')
+
+    agents = rng.sample(walkable, 50)
+    (path, totalNodes) = astarNearestSource(compiled, agents, start)
+    print(f'Nearest of {len(agents)} agents to {start}: {path[0]}, cost {pathCost(maze, path)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""
+Compact grid storage in place of lists of lists of Python ints
+
+OccupancyGrid packs the 0/1 mazes of astar.py and astarFix.py into one bit per
+cell; CostGrid keeps the weighted mazes of astarFix-modified as one unsigned
+byte (or two, for costs over 255) per cell. Both answer len(maze) and
+maze[r][c] like the nested lists they replace, so every engine takes them as
+they are, and maze[r] can be sliced to read a run of cells at once.
+"""
+from array import array
+
+class CostGrid:
+    """
+    Weighted maze in one flat unsigned array
+    maze[r] is a memoryview of the row, so reading a cell or a slice of a row
+    never copies the grid.
+    """
+
+    def __init__(self, rows, cols, cells):
+        self.rows = rows
+        self.cols = cols
+        self.cells = cells
+        self.view = memoryview(cells)
+
+    @classmethod
+    def fromMaze(cls, maze):
+        """Packs a list of lists, a NumPy array or anything else indexable by row"""
+        rows = len(maze)
+        cols = len(maze[rows - 1])
+        typecode = 'B'
+        if hasattr(maze, 'max'):
+            if int(maze.max()) > 255:
+                typecode = 'H'
+            cells = array(typecode, maze.astype('u1' if typecode == 'B' else 'u2').tobytes())
+            return cls(rows, cols, cells)
+        if max(max(row) for row in maze) > 255:
+            typecode = 'H'
+        cells = array(typecode)
+        for row in maze:
+            cells.extend(row)
+        return cls(rows, cols, cells)
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += self.rows
+        if not 0 <= row < self.rows:
+            raise IndexError('maze index out of range')
+        return self.view[row * self.cols:(row + 1) * self.cols]
+
+    def __iter__(self):
+        for row in range(self.rows):
+            yield self[row]
+
+    def __array__(self, dtype = None, copy = None):
+        import numpy as np
+        grid = np.frombuffer(self.cells, dtype=np.uint8 if self.cells.typecode == 'B' else np.uint16).reshape(self.rows, self.cols)
+        return grid.astype(dtype) if dtype is not None else grid
+
+    def nbytes(self):
+        return len(self.cells) * self.cells.itemsize
+
+    def toList(self):
+        return [list(row) for row in self]
+
+
+class BitRow:
+    """One row of an OccupancyGrid, indexable and sliceable like a list"""
+
+    __slots__ = ('bits', 'base', 'cols')
+
+    def __init__(self, bits, base, cols):
+        self.bits = bits
+        self.base = base
+        self.cols = cols
+
+    def __len__(self):
+        return self.cols
+
+    def __getitem__(self, col):
+        if isinstance(col, slice):
+            return [self[c] for c in range(*col.indices(self.cols))]
+        if col < 0:
+            col += self.cols
+        if not 0 <= col < self.cols:
+            raise IndexError('maze index out of range')
+        return (self.bits[self.base + (col >> 3)] >> (col & 7)) & 1
+
+    def __iter__(self):
+        for col in range(self.cols):
+            yield self[col]
+
+
+class OccupancyGrid:
+    """
+    0/1 maze with one bit per cell
+    Every row starts on a byte boundary, so rows can be handed out without
+    shifting bits around.
+    """
+
+    def __init__(self, rows, cols, bits = None):
+        self.rows = rows
+        self.cols = cols
+        self.rowBytes = (cols + 7) // 8
+        self.bits = bits if bits is not None else bytearray(rows * self.rowBytes)
+
+    @classmethod
+    def fromMaze(cls, maze):
+        """Packs any maze indexable by row; every non-zero cell becomes a 1"""
+        rows = len(maze)
+        cols = len(maze[rows - 1])
+        if hasattr(maze, 'astype'):
+            import numpy as np
+            packed = np.packbits(maze != 0, axis=1, bitorder='little')
+            return cls(rows, cols, bytearray(packed.tobytes()))
+        grid = cls(rows, cols)
+        bits = grid.bits
+        for r, row in enumerate(maze):
+            base = r * grid.rowBytes
+            for c, cell in enumerate(row):
+                if cell:
+                    bits[base + (c >> 3)] |= 1 << (c & 7)
+        return grid
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += self.rows
+        if not 0 <= row < self.rows:
+            raise IndexError('maze index out of range')
+        return BitRow(self.bits, row * self.rowBytes, self.cols)
+
+    def __iter__(self):
+        for row in range(self.rows):
+            yield self[row]
+
+    def __array__(self, dtype = None, copy = None):
+        import numpy as np
+        packed = np.frombuffer(bytes(self.bits), dtype=np.uint8).reshape(self.rows, self.rowBytes)
+        grid = np.unpackbits(packed, axis=1, count=self.cols, bitorder='little')
+        return grid.astype(dtype) if dtype is not None else grid
+
+    def set(self, row, col, value):
+        index = row * self.rowBytes + (col >> 3)
+        if value:
+            self.bits[index] |= 1 << (col & 7)
+        else:
+            self.bits[index] &= ~(1 << (col & 7)) & 0xff
+
+    def nbytes(self):
+        return len(self.bits)
+
+    def toList(self):
+        return [list(row) for row in self]
+
+
+def main():
+    import astarFix
+    from compiledMaze import astarCompiled
+
+    maze = [
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+    ]
+    occupancy = OccupancyGrid.fromMaze(maze)
+    print(f'Occupancy bytes:\n{occupancy.nbytes()}')
+    print(f'Path found:\n{astarFix.astar(occupancy, (0, 0), (7, 6))}')
+
+    costs = CostGrid.fromMaze([
+        [2, 4, 2, 1, 4, 5, 2],
+        [0, 1, 2, 3, 5, 3, 1],
+        [2, 0, 4, 4, 1, 2, 4],
+        [2, 5, 5, 3, 2, 0, 1],
+        [4, 3, 3, 2, 1, 0, 1]
+    ])
+    print(f'Cost grid bytes:\n{costs.nbytes()}')
+    print(f'Path found:\n{astarCompiled(costs, (1, 2), (4, 3))[0]}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+One importable entry point to every A* engine of the repository
+
+    import pathfinding
+    (path, totalNodes) = pathfinding.astar(maze, (0, 0), (7, 6), heuristic=2)
+    (path, totalNodes) = pathfinding.astar(grid, (0, 0), (7, 6), engine='wavefront')
+
+Importing the package loads none of the engines: each one is imported the
+first time a query asks for it, so a run only pays for the engines it uses
+and never for the demo main() of any script. Structures that are worth
+building once per maze (a CompiledMaze, a PruningTable, ...) come from
+prepare() and can be passed to astar() in place of the maze.
+
+    python -m pathfinding --help
+"""
+from pathfinding.engines import ENGINES, availableEngines, loadScript, numpyAvailable
+
+DEFAULT_ENGINE = 'astar'
+
+def getEngine(name):
+    if name not in ENGINES:
+        raise ValueError(f'unknown engine {name!r}, expected one of {", ".join(ENGINES)}')
+    found = ENGINES[name]
+    if found.needsNumpy and not numpyAvailable():
+        raise ImportError(f'engine {name!r} needs NumPy')
+    return found
+
+def astar(maze, start, end, heuristic = 2, allow_diagonal_movement = False, engine = DEFAULT_ENGINE, **options):
+    """
+    Returns (path, totalNodes) for a query on the named engine; path is [] if there is none
+    :param maze: a maze in the engine's model, or what prepare() built from one
+    :param start:
+    :param end:
+    :param heuristic: a heuristic number of astarCommon.HEURISTICS; engines for 0/1 mazes ignore it
+    :param allow_diagonal_movement:
+    :param engine: one of ENGINES
+    :param options: passed on to the engine, e.g. tieBreak, stats or tracer for 'astar'; a
+        movement model only for the engines that take one
+    :return:
+    """
+
+    found = getEngine(engine)
+    if options.get('movement') is not None and not found.movement:
+        raise ValueError(f'engine {engine!r} does not take a movement model; these do: {", ".join(movementEngines())}')
+    return found.run(maze, start, end, heuristic, allow_diagonal_movement, **options)
+
+def prepare(maze, engine = DEFAULT_ENGINE, allow_diagonal_movement = False, movement = None):
+    """
+    The structure the engine reuses between queries on maze, or the maze itself if it has none
+    A movement model given here is built into the structure ('pruned' and 'graph'); the other
+    engines that take one take it per query instead.
+    """
+    found = getEngine(engine)
+    if movement is not None and not found.movement:
+        raise ValueError(f'engine {engine!r} does not take a movement model; these do: {", ".join(movementEngines())}')
+    if found.prepare is None:
+        if movement is not None:
+            raise ValueError(f'engine {engine!r} takes its movement per query; pass movement to astar()')
+        return maze
+    return found.prepare(maze, allow_diagonal_movement, movement)
+
+def movementEngines():
+    """Names of the engines that take a movement model"""
+    return [name for (name, engine) in ENGINES.items() if engine.movement]
+
+def model(engine = DEFAULT_ENGINE):
+    """'weighted' or 'occupancy': which kind of maze the engine reads"""
+    return getEngine(engine).model
@@ -0,0 +1,3 @@
+from pathfinding.cli import main
+
+main()
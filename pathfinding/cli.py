@@ -0,0 +1,196 @@
+"""
+The single command line of the repository
+
+    python -m pathfinding find MAZE START END [-e ENGINE] [-H HEURISTIC] [-d] [-m MOVEMENT]
+    python -m pathfinding engines
+    python -m pathfinding startup [ENGINE ...] [-r REPEAT]
+    python -m pathfinding case CASE HEURISTIC      astarFix-modified test case
+    python -m pathfinding TOOL [ARGS ...]          the main() of a tool, see TOOLS
+
+MAZE is a text file with one row of cells per line (spaces, commas and
+brackets are ignored) or a generated maze as KIND:SIZE[:SEED], e.g.
+terrain:64:7. Generated mazes are weighted; engines for 0/1 mazes get their
+occupancy form. START and END are ROW,COL.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+import pathfinding
+from pathfinding.engines import ENGINES, ROOT, availableEngines, loadScript
+
+# subcommand, module and what it does; the module's main() reads the remaining arguments
+TOOLS = {
+    'bench': ('benchmark', 'engines side by side on the test mazes'),
+    'quality': ('heuristicQuality', 'heuristics ranked over generated mazes'),
+    'trace': ('expansionTrace', 'summary or replay of a dumped expansion trace'),
+    'metrics': ('searchMetrics', 'OpenMetrics snapshot of a batch of queries'),
+    'generate': ('mazeGenerators', 'a generated maze written to chunk files'),
+}
+
+# test case 4 of astarFix-modified.main, the query every startup measurement runs
+STARTUP_MAZE = [
+    [2, 0, 2, 0, 2, 0, 0, 2, 2, 0],
+    [1, 2, 3, 5, 2, 1, 2, 5, 1, 2],
+    [2, 0, 2, 2, 1, 2, 1, 2, 4, 2],
+    [2, 0, 1, 0, 1, 1, 1, 0, 0, 1],
+    [1, 1, 0, 0, 5, 0, 3, 2, 2, 2],
+    [2, 2, 2, 2, 1, 0, 1, 2, 1, 0],
+    [1, 0, 2, 1, 3, 1, 4, 3, 0, 1],
+    [2, 0, 5, 1, 5, 2, 1, 2, 4, 1],
+    [1, 2, 2, 2, 0, 2, 0, 1, 1, 0],
+    [5, 1, 2, 1, 1, 1, 2, 0, 1, 2]
+]
+STARTUP_QUERY = ((1, 2), (8, 8))
+
+# run in a fresh interpreter: times the import and the first two queries of one engine
+STARTUP_SCRIPT = '''
+import json, sys, time, warnings
+warnings.simplefilter('ignore')
+began = time.perf_counter()
+sys.path.insert(0, {root!r})
+import pathfinding
+imported = time.perf_counter()
+maze = {maze!r}
+if pathfinding.model({engine!r}) == 'occupancy':
+    maze = [[0 if cell else 1 for cell in row] for row in maze]
+pathfinding.astar(maze, {start!r}, {end!r}, engine={engine!r})
+first = time.perf_counter()
+pathfinding.astar(maze, {start!r}, {end!r}, engine={engine!r})
+second = time.perf_counter()
+print(json.dumps([imported - began, first - imported, second - first, len(sys.modules)]))
+'''
+
+def parsePosition(text):
+    (row, col) = text.replace('(', '').replace(')', '').split(',')
+    return (int(row), int(col))
+
+def loadMaze(source, model):
+    """A maze in the given model from a text file or a KIND:SIZE[:SEED] generator spec"""
+    kind = source.split(':')[0]
+    if ':' in source and kind not in ('', 'file'):
+        from mazeGenerators import generate, toOccupancy
+        parts = source.split(':')
+        size = int(parts[1])
+        maze = generate(kind, size, size, int(parts[2]) if len(parts) > 2 else 0)
+        return (toOccupancy(maze) if model == 'occupancy' else maze).tolist()
+    with open(source.removeprefix('file:')) as text:
+        rows = [line.replace(',', ' ').replace('[', ' ').replace(']', ' ').split() for line in text]
+    return [[int(cell) for cell in row] for row in rows if row]
+
+def measureStartup(engines, repeat = 3):
+    """
+    Best of repeat fresh interpreters per engine
+    :return: {engine: (process seconds, import seconds, first query seconds, second query seconds, modules loaded)}
+    """
+
+    results = {}
+    for name in engines:
+        script = STARTUP_SCRIPT.format(root=ROOT, maze=STARTUP_MAZE, start=STARTUP_QUERY[0], end=STARTUP_QUERY[1], engine=name)
+        runs = []
+        for _ in range(repeat):
+            startTime = time.perf_counter()
+            output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout
+            process = time.perf_counter() - startTime
+            runs.append((process, *json.loads(output)))
+        results[name] = min(runs)
+    return results
+
+def find(args):
+    model = pathfinding.model(args.engine)
+    maze = loadMaze(args.maze, model)
+    options = {}
+    if args.movement:
+        # pathfinding.astar rejects it for the engines that take no movement model
+        options['movement'] = args.movement
+    startTime = time.perf_counter()
+    (path, totalNodes) = pathfinding.astar(maze, parsePosition(args.start), parsePosition(args.end),
+                                           args.heuristic, args.diagonal, args.engine, **options)
+    endTime = time.perf_counter()
+    if path and args.movement:
+        from movementModels import getMovement
+        cost = getMovement(args.movement).pathCost(maze, path)
+    elif path and args.engine == 'theta':
+        # waypoints joined by straight segments
+        from astarTheta import pathLength
+        cost = pathLength(path)
+    elif path and model == 'weighted':
+        cost = sum(maze[r][c] for (r, c) in path[1:])
+    elif path:
+        cost = len(path) - 1
+    else:
+        cost = -1
+    print(f'Engine:\n{args.engine}')
+    print(f'Cost of path:\n{cost}')
+    print(f'Path found:\n{path or "NULL"}')
+    print(f'Nodes created:\n{totalNodes}')
+    print(f'Execution time:\n{endTime - startTime}')
+
+def listEngines(args):
+    available = availableEngines()
+    for (name, engine) in ENGINES.items():
+        note = '' if name in available else '  (needs NumPy)'
+        print(f'{name:<11}{engine.model:<11}{engine.description}{note}')
+
+def startup(args):
+    unknown = [name for name in args.engines if name not in ENGINES]
+    if unknown:
+        sys.exit(f'unknown engines: {", ".join(unknown)}')
+    results = measureStartup(args.engines or availableEngines(), args.repeat)
+    print(f'{"engine":<11}{"process (ms)":>14}{"import (ms)":>13}{"1st query (ms)":>16}{"2nd query (ms)":>16}{"modules":>9}')
+    for (name, (process, imported, first, second, modules)) in results.items():
+        print(f'{name:<11}{process * 1000:>14.1f}{imported * 1000:>13.2f}{first * 1000:>16.2f}{second * 1000:>16.3f}{modules:>9}')
+
+def testCase(args):
+    loadScript('astarFix-modified').termMain(args.case, args.heuristic)
+
+def runTool(name, arguments):
+    (moduleName, _) = TOOLS[name]
+    module = __import__(moduleName)
+    if not callable(getattr(module, 'main', None)):
+        sys.exit(f'{name}: {moduleName} has no main() to run')
+    # the tools read their arguments positionally; their docstrings say which
+    if arguments[:1] in (['-h'], ['--help']):
+        print(module.__doc__.strip())
+        return
+    sys.argv = [f'{moduleName}.py', *arguments]
+    module.main()
+
+
+def main(argv = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in TOOLS:
+        runTool(argv[0], argv[1:])
+        return
+
+    parser = argparse.ArgumentParser(prog='python -m pathfinding', description='A* pathfinding engines',
+                                     epilog='tools: ' + ', '.join(f'{name} ({what})' for (name, (_, what)) in TOOLS.items()))
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('find', help='one query')
+    command.add_argument('maze', help='a maze file or KIND:SIZE[:SEED]')
+    command.add_argument('start', help='ROW,COL')
+    command.add_argument('end', help='ROW,COL')
+    command.add_argument('-e', '--engine', default=pathfinding.DEFAULT_ENGINE, choices=list(ENGINES))
+    command.add_argument('-H', '--heuristic', type=int, default=2)
+    command.add_argument('-d', '--diagonal', action='store_true', help='allow diagonal moves')
+    command.add_argument('-m', '--movement', help='a movementModels model: four, eight, octile or octile-no-corners')
+    command.set_defaults(run=find)
+
+    command = commands.add_parser('engines', help='every engine and the maze model it reads')
+    command.set_defaults(run=listEngines)
+
+    command = commands.add_parser('startup', help='cold start and first query latency per engine')
+    command.add_argument('engines', nargs='*', metavar='ENGINE', help='default: every engine that can run here')
+    command.add_argument('-r', '--repeat', type=int, default=3)
+    command.set_defaults(run=startup)
+
+    command = commands.add_parser('case', help='a test case of astarFix-modified')
+    command.add_argument('case', choices=[str(case) for case in range(6)])
+    command.add_argument('heuristic', type=int, choices=range(1, 5))
+    command.set_defaults(run=testCase)
+
+    args = parser.parse_args(argv)
+    args.run(args)
@@ -0,0 +1,166 @@
+"""
+The engines behind pathfinding.astar, each imported only when first used
+
+Every entry adapts one engine of the repository to the same call,
+run(maze, start, end, heuristic, allow_diagonal_movement, **options), which
+returns (path, totalNodes) with an empty path when there is none. Weighted
+engines take the mazes of astarFix-modified, where a cell is the cost of
+entering it and 0 is a wall; occupancy engines take the 0/1 mazes of astarFix,
+where 0 is walkable. Engines without a node count report the nodes they
+expanded. Options an engine does not take raise TypeError; a movement model
+(movementModels) is only taken by the engines marked movement=True.
+"""
+from collections import namedtuple
+from functools import cache
+import importlib.util
+import os
+import sys
+
+# where the engine modules live: the directory holding this package
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# run(maze, start, end, heuristic, allow_diagonal_movement, **options) answers a query;
+# prepare(maze, allow_diagonal_movement, movement), if any, builds what run() can take in place
+# of the maze; movement says whether the engine takes a movement option
+Engine = namedtuple('Engine', ('model', 'needsNumpy', 'run', 'prepare', 'description', 'movement'), defaults=(False,))
+
+def loadScript(name):
+    """
+    Imports one of the scripts whose file name is not a valid module name
+    The module is kept in sys.modules, so every caller shares one copy.
+    """
+
+    moduleName = name.replace('-', '_')
+    module = sys.modules.get(moduleName)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(moduleName, os.path.join(ROOT, f'{name}.py'))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[moduleName] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[moduleName]
+            raise
+    return module
+
+def counted(path, stats):
+    return (path or [], stats.get('expanded', 0))
+
+def withStats(options):
+    """The stats dict of options, added if the caller gave none, so counted() can read it"""
+    if options.get('stats') is None:
+        options['stats'] = {}
+    return options['stats']
+
+
+def runAstar(maze, start, end, heuristic, allow_diagonal_movement, **options):
+    return loadScript('astarFix-modified').astar(maze, start, end, heuristic, allow_diagonal_movement, **options)
+
+def prepareCompiled(maze, allow_diagonal_movement = False, movement = None):
+    from compiledMaze import CompiledMaze
+    if movement is not None:
+        raise ValueError('a CompiledMaze takes its movement per query; pass movement to astar()')
+    return CompiledMaze(maze)
+
+def runCompiled(maze, start, end, heuristic, allow_diagonal_movement, **options):
+    from compiledMaze import astarCompiled
+    return astarCompiled(maze, start, end, heuristic, allow_diagonal_movement, **options)
+
+def runIdastar(maze, start, end, heuristic, allow_diagonal_movement, **options):
+    from astarLowMem import idastar
+    return idastar(maze, start, end, heuristic, allow_diagonal_movement, **options)
+
+def runFringe(maze, start, end, heuristic, allow_diagonal_movement, **options):
+    from astarLowMem import fringeSearch
+    return fringeSearch(maze, start, end, heuristic, allow_diagonal_movement, **options)
+
+def preparedMovement(options):
+    """Pops the movement option of a query on a prepared structure, which already has its moves"""
+    if options.pop('movement', None) is not None:
+        raise ValueError('a prepared maze searches with the movement it was prepared with; pass movement to prepare()')
+
+def preparePruned(maze, allow_diagonal_movement = False, movement = None):
+    from pruning import PruningTable
+    return PruningTable(maze, allow_diagonal_movement, movement=movement)
+
+def runPruned(maze, start, end, heuristic, allow_diagonal_movement, **options):
+    from pruning import PruningTable, astarPruned
+    if isinstance(maze, PruningTable):
+        preparedMovement(options)
+        table = maze
+    else:
+        table = PruningTable(maze, allow_diagonal_movement, movement=options.pop('movement', None))
+    return astarPruned(table, start, end, heuristic, **options)
+
+def prepareGraph(maze, allow_diagonal_movement = False, movement = None):
+    from csrGraph import CSRGraph
+    return CSRGraph.fromMaze(maze, allow_diagonal_movement, movement)
+
+def runGraph(maze, start, end, heuristic, allow_diagonal_movement, **options):
+    from csrGraph import CSRGraph, astarGraph
+    if isinstance(maze, CSRGraph):
+        preparedMovement(options)
+        graph = maze
+    else:
+        graph = CSRGraph.fromMaze(maze, allow_diagonal_movement, options.pop('movement', None))
+    return astarGraph(graph, start, end, heuristic, **options)
+
+def runOccupancy(maze, start, end, heuristic, allow_diagonal_movement, **options):
+    from astarFix import astar
+    stats = withStats(options)
+    path = astar(maze, start, end, allow_diagonal_movement, **options)
+    # astarFix hands back the partial path it has when it gives up
+    if path and path[-1] != end:
+        path = []
+    return counted(path, stats)
+
+def runWavefront(maze, start, end, heuristic, allow_diagonal_movement, **options):
+    from wavefront import wavefrontBFS
+    stats = withStats(options)
+    return counted(wavefrontBFS(maze, start, end, allow_diagonal_movement, **options), stats)
+
+def prepareSubgoal(maze, allow_diagonal_movement = True, movement = None):
+    from subgoalGraph import SubgoalGraph
+    if not allow_diagonal_movement:
+        raise ValueError('subgoal graphs are built for 8-connected queries; pass allow_diagonal_movement=True')
+    return SubgoalGraph(maze)
+
+def runSubgoal(maze, start, end, heuristic, allow_diagonal_movement, **options):
+    from compiledMaze import CompiledMaze, astarCompiled
+    from subgoalGraph import SubgoalGraph
+    if allow_diagonal_movement:
+        stats = withStats(options)
+        graph = maze if isinstance(maze, SubgoalGraph) else SubgoalGraph(maze)
+        return counted(graph.findPath(start, end, **options), stats)
+    # subgoalGraph.astar without diagonal moves, keeping the compiled search's node count
+    if isinstance(maze, SubgoalGraph):
+        maze = (~maze.free).astype('uint8').tolist()
+    return astarCompiled(CompiledMaze.fromOccupancy(maze), start, end, 1, **options)
+
+def runTheta(maze, start, end, heuristic, allow_diagonal_movement, **options):
+    from astarTheta import thetastar
+    stats = withStats(options)
+    return counted(thetastar(maze, start, end, allow_diagonal_movement=allow_diagonal_movement, **options), stats)
+
+
+ENGINES = {
+    'astar': Engine('weighted', False, runAstar, None, 'astarFix-modified.astar, the reference engine', movement=True),
+    'compiled': Engine('weighted', False, runCompiled, prepareCompiled, 'A* over a padded, flattened maze', movement=True),
+    'idastar': Engine('weighted', False, runIdastar, None, 'iterative deepening A*, little memory'),
+    'fringe': Engine('weighted', False, runFringe, None, 'Fringe Search, no priority queue'),
+    'pruned': Engine('weighted', False, runPruned, preparePruned, 'compiled A* skipping dead ends and swamps', movement=True),
+    'graph': Engine('weighted', False, runGraph, prepareGraph, 'A* over a CSR graph of the maze', movement=True),
+    'occupancy': Engine('occupancy', False, runOccupancy, None, 'astarFix.astar; max_nodes runs SMA*'),
+    'wavefront': Engine('occupancy', True, runWavefront, None, 'NumPy breadth-first wavefront, unit costs'),
+    'subgoal': Engine('occupancy', True, runSubgoal, prepareSubgoal, 'simple subgoal graph, 8-connected'),
+    'theta': Engine('occupancy', False, runTheta, None, 'any-angle Theta*; returns waypoints'),
+}
+
+@cache
+def numpyAvailable():
+    return importlib.util.find_spec('numpy') is not None
+
+def availableEngines():
+    """Names of the engines that can run here: the NumPy ones only when NumPy is installed"""
+    hasNumpy = numpyAvailable()
+    return [name for (name, engine) in ENGINES.items() if hasNumpy or not engine.needsNumpy]
@@ -0,0 +1,365 @@
+"""
+Dead-end and swamp pruning for the weighted mazes of astarFix-modified
+
+A search between two cells never needs most of a maze full of corridors and
+pockets. Preprocessing records two kinds of region in a side table:
+
+- dead ends: corridors and pockets that hang off the rest of the maze by a
+  single cell. They form a tree around the core of the maze, and a path only
+  enters one to reach a start or end inside it.
+- swamps: small regions of what is left such that any two cells around a
+  region are joined just as cheaply without it, so a shortest path between
+  outside cells can always go around.
+
+A query blocks every dead end that does not lead to start or end and every
+swamp that neither lies in, then runs an ordinary search that treats the
+blocked cells as walls.
+"""
+from bisect import bisect_left
+from collections import deque
+import heapq
+import math
+import time
+
+from compiledMaze import CompiledMaze, astarCompiled
+from movementModels import getMovement
+
+class PruningTable:
+    """
+    The dead ends and swamps of one weighted maze
+    Swamps are numbered in the order they were found and each one is only
+    known to be avoidable with the earlier ones gone, so a start or end in
+    swamp k keeps every swamp from k on in the search.
+    """
+
+    def __init__(self, maze, allow_diagonal_movement = False, maxSwampSize = 16, maxBoundary = 8, movement = None):
+        """
+        :param maze: a weighted maze or a CompiledMaze
+        :param allow_diagonal_movement: the moves the searches will use
+        :param maxSwampSize: cells a swamp may grow to
+        :param maxBoundary: cells a swamp may have around it; each is a pair of local searches to check
+        :param movement: a movementModels model or model name the searches will use in place
+            of allow_diagonal_movement; dead ends and swamps depend on its moves and costs
+        """
+
+        startTime = time.perf_counter()
+        self.compiled = maze if isinstance(maze, CompiledMaze) else CompiledMaze(maze)
+        self.allow_diagonal_movement = allow_diagonal_movement
+        self.movement = movement
+        self.steps = getMovement(movement, allow_diagonal_movement).steps(self.compiled.width)
+        self.maxSwampSize = maxSwampSize
+        self.maxBoundary = maxBoundary
+        size = len(self.compiled.cells)
+        self.removed = [False] * size
+        # swamp number of every swamp cell; dead ends are 0 and everything else is not in it
+        self.level = {}
+        self.deadEnds = []
+        self.swampCells = []
+        self.swampLevels = []
+        self.findDeadEnds()
+        self.deadEndSeconds = time.perf_counter() - startTime
+        self.numSwamps = self.findSwamps()
+        self.preprocessSeconds = time.perf_counter() - startTime
+        del self.removed
+
+    def stats(self):
+        return {
+            'deadEndCells': len(self.deadEnds),
+            'swamps': self.numSwamps,
+            'swampCells': len(self.swampCells),
+            'deadEndSeconds': self.deadEndSeconds,
+            'preprocessSeconds': self.preprocessSeconds,
+        }
+
+    def neighbours(self, index):
+        cells = self.compiled.cells
+        removed = self.removed
+        return [index + offset for (offset, _, sideA, sideB) in self.steps
+                if cells[index + offset] != 0 and not removed[index + offset]
+                and not (sideA and (cells[index + sideA] == 0 or cells[index + sideB] == 0))]
+
+    def findDeadEnds(self):
+        """
+        Splits the maze into blocks, the parts that stay connected after removing
+        any one cell, joined at cut cells. The largest block of each connected
+        part is its core; every other block and cut cell hangs off it in a tree.
+        """
+
+        blocks = self.findBlocks()
+        cutOf = {}
+        for (block, members) in enumerate(blocks):
+            for index in members:
+                cutOf.setdefault(index, []).append(block)
+        cutOf = {index: owners for (index, owners) in cutOf.items() if len(owners) > 1}
+        # tree nodes: blocks are 0..len(blocks) - 1, then one node per cut cell
+        cutNode = {index: len(blocks) + number for (number, index) in enumerate(cutOf)}
+        self.cutCell = {node: index for (index, node) in cutNode.items()}
+
+        # the first block reached in each connected part is its largest and becomes its core
+        self.treeParent = {}
+        core = set()
+        for root in sorted(range(len(blocks)), key=lambda block: -len(blocks[block])):
+            if root in self.treeParent or root in core:
+                continue
+            core.add(root)
+            queue = deque([root])
+            while queue:
+                node = queue.popleft()
+                if node < len(blocks):
+                    children = [cutNode[index] for index in blocks[node] if index in cutNode]
+                else:
+                    children = cutOf[self.cutCell[node]]
+                for child in children:
+                    if child not in core and child not in self.treeParent:
+                        self.treeParent[child] = node
+                        queue.append(child)
+
+        coreCells = set()
+        for block in core:
+            coreCells.update(blocks[block])
+        # tree node of every cell outside the cores
+        self.nodeOf = {}
+        for (block, members) in enumerate(blocks):
+            if block not in core:
+                for index in members:
+                    if index not in coreCells:
+                        self.nodeOf[index] = cutNode.get(index, block)
+        # the cut cells on the edge of every dead-end block, which go wherever the block goes
+        self.blockCuts = {block: [cutNode[index] for index in blocks[block] if index in cutNode] for block in range(len(blocks)) if block not in core}
+        for index in self.nodeOf:
+            self.removed[index] = True
+            self.level[index] = 0
+        self.deadEnds = list(self.nodeOf.items())
+
+    def findBlocks(self):
+        """Tarjan's biconnected components over the walkable cells, as sets of cells"""
+        cells = self.compiled.cells
+        disc = {}
+        low = {}
+        blocks = []
+        counter = 0
+        for root in range(len(cells)):
+            if cells[root] == 0 or root in disc:
+                continue
+            disc[root] = low[root] = counter
+            counter += 1
+            if not self.neighbours(root):
+                blocks.append({root})
+                continue
+            stack = [(root, -1, iter(self.neighbours(root)))]
+            edges = []
+            while stack:
+                (v, parent, children) = stack[-1]
+                advanced = False
+                for w in children:
+                    if w not in disc:
+                        disc[w] = low[w] = counter
+                        counter += 1
+                        edges.append((v, w))
+                        stack.append((w, v, iter(self.neighbours(w))))
+                        advanced = True
+                        break
+                    if w != parent and disc[w] < disc[v]:
+                        low[v] = min(low[v], disc[w])
+                        edges.append((v, w))
+                if advanced:
+                    continue
+                stack.pop()
+                if stack:
+                    u = stack[-1][0]
+                    low[u] = min(low[u], low[v])
+                    if low[v] >= disc[u]:
+                        # u separates everything found below v: pop that block's edges
+                        block = set()
+                        while True:
+                            edge = edges.pop()
+                            block.update(edge)
+                            if edge == (u, v):
+                                break
+                        blocks.append(block)
+        return blocks
+
+    def findSwamps(self):
+        """Grows swamps greedily from the most expensive cells first; returns how many were found"""
+        cells = self.compiled.cells
+        seeds = sorted((index for (index, cost) in enumerate(cells) if cost != 0 and not self.removed[index]), key=lambda index: -cells[index])
+        count = 0
+        for seed in seeds:
+            if self.removed[seed] or not self.isSwamp({seed}):
+                continue
+            region = {seed}
+            tried = {seed}
+            frontier = deque(self.neighbours(seed))
+            while frontier and len(region) < self.maxSwampSize:
+                index = frontier.popleft()
+                if index in tried:
+                    continue
+                tried.add(index)
+                region.add(index)
+                if self.isSwamp(region):
+                    frontier.extend(self.neighbours(index))
+                else:
+                    region.discard(index)
+            count += 1
+            for index in sorted(region):
+                self.removed[index] = True
+                self.level[index] = count
+                self.swampCells.append(index)
+                self.swampLevels.append(count)
+        return count
+
+    def isSwamp(self, region):
+        """
+        True if every cell around region reaches every other one as cheaply
+        without region as with it, in what is left of the maze
+        """
+
+        boundary = set()
+        for index in region:
+            boundary.update(neighbour for neighbour in self.neighbours(index) if neighbour not in region)
+        if len(boundary) > self.maxBoundary:
+            return False
+        if len(boundary) <= 1:
+            return True
+        for source in boundary:
+            through = self.distances(source, boundary, (), math.inf)
+            around = self.distances(source, boundary, region, max(through[target] for target in boundary))
+            if any(around.get(target, math.inf) > through[target] for target in boundary):
+                return False
+        return True
+
+    def distances(self, source, targets, excluded, limit):
+        """
+        Dijkstra from source over cells not removed or excluded until every target
+        is settled or the distance passes limit; settled distances are exact and
+        the rest are upper bounds
+        """
+
+        cells = self.compiled.cells
+        removed = self.removed
+        dist = {source: 0}
+        heap = [(0, source)]
+        remaining = set(targets)
+        while heap and remaining:
+            (d, index) = heapq.heappop(heap)
+            if d > dist[index]:
+                continue
+            if d > limit:
+                break
+            remaining.discard(index)
+            for (offset, multiplier, sideA, sideB) in self.steps:
+                child = index + offset
+                cost = cells[child]
+                if cost == 0 or removed[child] or child in excluded:
+                    continue
+                if sideA and (cells[index + sideA] == 0 or cells[index + sideB] == 0):
+                    continue
+                childD = d + cost * multiplier
+                if childD < dist.get(child, math.inf):
+                    dist[child] = childD
+                    heapq.heappush(heap, (childD, child))
+        return dist
+
+    def prunedIndices(self, start, end):
+        """Flat indices of the compiled maze that a search from start to end can skip"""
+        compiled = self.compiled
+        # walk each endpoint up the tree of dead ends to the core cell it hangs from
+        chains = []
+        for position in (start, end):
+            chain = []
+            index = compiled.index(position)
+            node = self.nodeOf.get(index)
+            while node is not None:
+                chain.append(node)
+                if node in self.cutCell:
+                    index = self.cutCell[node]
+                node = self.treeParent.get(node)
+            chains.append((chain, index))
+        ((startChain, startTop), (endChain, endTop)) = chains
+        # in the same dead end only the chains up to where they meet are needed
+        onStart = {node: depth for (depth, node) in enumerate(startChain)}
+        for (depth, node) in enumerate(endChain):
+            if node in onStart:
+                startChain = startChain[:onStart[node] + 1]
+                endChain = endChain[:depth]
+                break
+        keep = set(startChain)
+        keep.update(endChain)
+        for node in list(keep):
+            keep.update(self.blockCuts.get(node, ()))
+
+        threshold = min(self.level.get(startTop, math.inf), self.level.get(endTop, math.inf))
+        pruned = [index for (index, node) in self.deadEnds if node not in keep]
+        pruned.extend(self.swampCells[:bisect_left(self.swampLevels, threshold)])
+        return pruned
+
+    def mazeFor(self, start, end):
+        """A copy of the maze with every skippable cell turned into a wall, for any engine"""
+        compiled = self.compiled
+        maze = [compiled.cells[(r + 1) * compiled.width + 1:(r + 2) * compiled.width - 1] for r in range(compiled.rows)]
+        for index in self.prunedIndices(start, end):
+            (r, c) = compiled.position(index)
+            maze[r][c] = 0
+        return maze
+
+
+def astarPruned(table, start, end, heuristic = 2, stats = None):
+    """
+    astarCompiled on the table's compiled maze with the skippable cells treated
+    as walls for this query only; returns (path, totalNodes)
+    The maze itself is never written to, so queries can share a table, and they
+    search with the movement model the table was built for.
+    :param stats: optional dict that receives the number of nodes expanded
+    """
+
+    blocked = frozenset(table.prunedIndices(start, end))
+    return astarCompiled(table.compiled, start, end, heuristic, table.allow_diagonal_movement, movement=table.movement,
+                         blocked=blocked, stats=stats)
+
+
+def main():
+    from warnings import catch_warnings, simplefilter
+    from benchmark import serpentineMaze
+    from mazeGenerators import generate, pickEndpoints
+    from pathfinding.engines import loadScript
+
+    # the serpentine of astarFix-modified.main, through the original engine
+    astarModule = loadScript('astarFix-modified')
+    maze = serpentineMaze(10, 10)
+    table = PruningTable(maze)
+    for (name, query) in (('plain', maze), ('pruned', table.mazeFor((6, 6), (0, 0)))):
+        stats = {}
+        (path, totalNodes) = astarModule.astar(query, (6, 6), (0, 0), 2, stats=stats)
+        print(f'{name}: cost {sum(maze[r][c] for (r, c) in path)}, expanded {stats["expanded"]}, nodes created {totalNodes}')
+    print()
+
+    # a long single corridor like serpentineMaze(41, 41) has nothing to prune:
+    # every cell of it is on the way between most pairs of endpoints
+    mazes = (
+        ('backtracker', generate('backtracker', 81, 81, 3).tolist()),
+        ('rooms', generate('rooms', 96, 96, 3).tolist()),
+        ('random', generate('random', 96, 96, 3, density=0.35, maxCost=5).tolist()),
+    )
+    for (name, maze) in mazes:
+        table = PruningTable(maze)
+        print(f'{name}:\n{table.stats()}')
+        plain = CompiledMaze(maze)
+        totals = {'plain': [0, 0, 0, 0.0], 'pruned': [0, 0, 0, 0.0]}
+        with catch_warnings():
+            simplefilter('ignore')
+            for (start, end) in pickEndpoints(maze, 100, seed=4):
+                for (engineName, engine, query) in (('plain', astarCompiled, plain), ('pruned', astarPruned, table)):
+                    stats = {}
+                    startTime = time.perf_counter()
+                    (path, totalNodes) = engine(query, start, end, 2, stats=stats)
+                    totals[engineName][3] += time.perf_counter() - startTime
+                    totals[engineName][0] += sum(maze[r][c] for (r, c) in path)
+                    totals[engineName][1] += stats['expanded']
+                    totals[engineName][2] += totalNodes
+        for (engineName, (cost, expanded, totalNodes, seconds)) in totals.items():
+            print(f'{engineName}: total cost {cost}, expanded {expanded}, nodes created {totalNodes}, time {seconds}')
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+"""
+Search statistics in the OpenMetrics text format
+
+A MetricsRegistry counts queries per engine: histograms of latency, nodes
+expanded and path length, and counters of failed queries and of queries that
+ran out of their budget. Every thread adds into a shard of its own, so
+recording a query takes no lock; the shards are only summed when a snapshot
+is taken. A thread's shards are folded into a retired total once it exits,
+so threads that come and go do not pile up shards. snapshot() gives the
+text a Prometheus-style scraper reads, writeSnapshot() keeps it in a file
+for a file exporter and serve() answers scrapes over HTTP.
+
+    python searchMetrics.py [QUERIES] [THREADS] [FILE]
+"""
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import math
+import os
+import sys
+import threading
+import time
+import weakref
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+# key, metric name, unit, help, upper bounds of the buckets
+HISTOGRAMS = (
+    ('latency', 'astar_query_seconds', 'seconds', 'Wall time of a query',
+     (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)),
+    ('expansions', 'astar_query_expansions', '', 'Nodes expanded by a query',
+     tuple(4 ** k for k in range(12))),
+    ('pathLength', 'astar_path_length', '', 'Cells on the path found',
+     tuple(2 ** k for k in range(14))),
+)
+# key, metric name, help
+COUNTERS = (
+    ('failures', 'astar_failures', 'Queries that found no path'),
+    ('exhausted', 'astar_budget_exhausted', 'Queries stopped by a node, memory or cost budget'),
+)
+
+class MetricShard:
+    """The counts of one thread for one engine; only that thread ever writes to it"""
+
+    def __init__(self):
+        # one count per bucket plus one for +Inf, then the sum of every observation
+        self.buckets = {key: [0] * (len(bounds) + 1) for (key, _, _, _, bounds) in HISTOGRAMS}
+        self.sums = {key: 0.0 for (key, _, _, _, _) in HISTOGRAMS}
+        self.counters = {key: 0 for (key, _, _) in COUNTERS}
+
+    def add(self, other):
+        """Adds the counts of other into this shard"""
+        for (key, counts) in other.buckets.items():
+            summed = self.buckets[key]
+            for (i, count) in enumerate(list(counts)):
+                summed[i] += count
+            self.sums[key] += other.sums[key]
+        for (key, count) in other.counters.items():
+            self.counters[key] += count
+
+
+class ShardOwner:
+    """
+    Held only by a thread's thread-local storage, so it is collected when the
+    thread exits, which retires the thread's shards
+    """
+
+    def __init__(self):
+        self.shards = {}
+
+
+class MetricsRegistry:
+    """
+    Per-engine search metrics, safe to record into from any number of threads
+    Snapshots read the shards of other threads without stopping them, so a
+    snapshot taken during queries may miss the query in flight but never
+    counts one twice.
+    """
+
+    def __init__(self):
+        self.local = threading.local()
+        # (engine, shard) of every live thread and {engine: MetricShard} of the
+        # threads that have exited; the lock guards adding and retiring shards
+        self.shards = []
+        self.retired = {}
+        self.shardLock = threading.Lock()
+
+    def shard(self, engine):
+        owner = getattr(self.local, 'owner', None)
+        if owner is None:
+            owner = self.local.owner = ShardOwner()
+            weakref.finalize(owner, self.retire, owner.shards)
+        shard = owner.shards.get(engine)
+        if shard is None:
+            shard = owner.shards[engine] = MetricShard()
+            with self.shardLock:
+                self.shards.append((engine, shard))
+        return shard
+
+    def retire(self, shards):
+        """Folds the {engine: shard} of a thread that has exited into the retired totals"""
+        with self.shardLock:
+            for (engine, shard) in shards.items():
+                total = self.retired.get(engine)
+                if total is None:
+                    total = self.retired[engine] = MetricShard()
+                total.add(shard)
+            self.shards = [(engine, shard) for (engine, shard) in self.shards if shards.get(engine) is not shard]
+
+    def observe(self, engine, seconds, expanded, pathLength = 0, failed = False, exhausted = False):
+        """
+        Records one query
+        :param engine: label the query is counted under
+        :param seconds: wall time of the query
+        :param expanded: nodes expanded, or created when the engine counts only those
+        :param pathLength: cells on the path; not observed for failed queries
+        :param failed: no path was found
+        :param exhausted: the query stopped on a budget rather than searching everything
+        """
+
+        shard = self.shard(engine)
+        values = {'latency': seconds, 'expansions': expanded}
+        if failed:
+            shard.counters['failures'] += 1
+        else:
+            values['pathLength'] = pathLength
+        if exhausted:
+            shard.counters['exhausted'] += 1
+        for (key, _, _, _, bounds) in HISTOGRAMS:
+            if key in values:
+                shard.buckets[key][bisect_left(bounds, values[key])] += 1
+                shard.sums[key] += values[key]
+
+    def timed(self, engine, function, *args, **kwargs):
+        """
+        Runs one query through function, records it under engine and returns its result
+        function returns (path, totalNodes) like astarFix-modified.astar, or just
+        the path. When a stats dict is passed on, its 'expanded' count is used
+        in place of totalNodes and a true 'budgetExhausted' counts the query as
+        stopped by its budget.
+        """
+
+        startTime = time.perf_counter()
+        result = function(*args, **kwargs)
+        seconds = time.perf_counter() - startTime
+        (path, totalNodes) = result if isinstance(result, tuple) else (result, 0)
+        stats = kwargs.get('stats') or {}
+        self.observe(engine, seconds, stats.get('expanded', totalNodes), len(path) if path else 0,
+                     not path, bool(stats.get('budgetExhausted')))
+        return result
+
+    def totals(self):
+        """{engine: MetricShard} with the shards of every thread summed"""
+        totals = {}
+        with self.shardLock:
+            shards = list(self.shards)
+            for (engine, retired) in self.retired.items():
+                totals[engine] = MetricShard()
+                totals[engine].add(retired)
+        for (engine, shard) in shards:
+            total = totals.get(engine)
+            if total is None:
+                total = totals[engine] = MetricShard()
+            total.add(shard)
+        return totals
+
+    def snapshot(self):
+        """Every metric in the OpenMetrics text format"""
+        totals = sorted(self.totals().items())
+        lines = []
+        for (key, name, unit, help, bounds) in HISTOGRAMS:
+            lines.append(f'# TYPE {name} histogram')
+            if unit:
+                lines.append(f'# UNIT {name} {unit}')
+            lines.append(f'# HELP {name} {help}')
+            for (engine, total) in totals:
+                label = f'engine="{escapeLabel(engine)}"'
+                cumulative = 0
+                for (bound, count) in zip(bounds + (math.inf,), total.buckets[key]):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{label},le="{formatBound(bound)}"}} {cumulative}')
+                lines.append(f'{name}_count{{{label}}} {cumulative}')
+                lines.append(f'{name}_sum{{{label}}} {total.sums[key]!r}')
+        for (key, name, help) in COUNTERS:
+            lines.append(f'# TYPE {name} counter')
+            lines.append(f'# HELP {name} {help}')
+            for (engine, total) in totals:
+                lines.append(f'{name}_total{{engine="{escapeLabel(engine)}"}} {total.counters[key]}')
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def writeSnapshot(self, path):
+        """Replaces path with a snapshot in one step, so a reader never sees half of one"""
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as out:
+            out.write(self.snapshot())
+        os.replace(temporary, path)
+
+    def serve(self, port = 9464, host = '127.0.0.1'):
+        """Answers scrapes of /metrics from a daemon thread; returns the server, shutdown() stops it"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.snapshot().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def escapeLabel(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def formatBound(bound):
+    if bound == math.inf:
+        return '+Inf'
+    return repr(float(bound))
+
+
+def main():
+    from concurrent.futures import ThreadPoolExecutor
+    from warnings import catch_warnings, simplefilter
+    from compiledMaze import CompiledMaze, astarCompiled
+    from mazeGenerators import generate, pickEndpoints
+
+    args = sys.argv[1:]
+    queries = int(args[0]) if len(args) > 0 else 200
+    threads = int(args[1]) if len(args) > 1 else 4
+    terrain = generate('terrain', 96, 96, seed=3)
+    compiled = CompiledMaze(terrain.tolist())
+    endpoints = pickEndpoints(terrain, queries, seed=3)
+    registry = MetricsRegistry()
+
+    def query(endpoint):
+        (start, end) = endpoint
+        with catch_warnings():
+            simplefilter('ignore')
+            registry.timed('compiled', astarCompiled, compiled, start, end, 2)
+
+    startTime = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(query, endpoints))
+    print(f'{queries} queries on {threads} threads in {time.perf_counter() - startTime:.2f} s')
+    if len(args) > 2:
+        registry.writeSnapshot(args[2])
+        print(f'Snapshot written to {args[2]}')
+    else:
+        print(registry.snapshot(), end='')
+
+
+if __name__ == '__main__':
+    main()
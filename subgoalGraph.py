@@ -0,0 +1,287 @@
+"""
+Simple subgoal graphs for 8-connected 0/1 mazes
+
+In the movement model of astarFix every move costs 1 and diagonal moves may
+cut corners, so in open space the distance between two cells is just the
+larger of their row and column differences (h). A cell is h-reachable from
+another when a path of exactly that length exists. Shortest paths only need
+to bend next to the ends of obstacles, so preprocessing marks those cells as
+subgoals and links the h-reachable pairs that no path of that length through
+a third subgoal already connects. A query links start and end into that much
+smaller graph, searches it and refines each edge back into cells. 0 is
+walkable and anything else is a wall, as in astarFix.
+"""
+from warnings import warn
+import heapq
+import time
+
+import numpy as np
+
+from compiledMaze import CompiledMaze, astarCompiled
+
+# the eight neighbours in circular order; even positions are orthogonal
+RING = ((-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1))
+
+def chebyshev(a, b):
+    return max(abs(a[0] - b[0]), abs(a[1] - b[1]))
+
+def spread(cells):
+    """A row of cells grown by one column either way"""
+    grown = cells.copy()
+    grown[1:] |= cells[:-1]
+    grown[:-1] |= cells[1:]
+    return grown
+
+
+class SubgoalGraph:
+    """
+    Subgoals of a 0/1 maze and the h-reachable links between them
+    Build it once per maze and pass it to astar() in place of the maze.
+    """
+
+    def __init__(self, maze):
+        startTime = time.perf_counter()
+        grid = np.asarray(maze)
+        (self.rows, self.cols) = grid.shape
+        self.free = grid == 0
+        self.isSubgoal = self.findSubgoals()
+        # a sweep runs along the rows of one of four views of the maze, one per
+        # main direction, each with its maps from and to maze positions
+        (rows, cols) = (self.rows, self.cols)
+        (free, isSubgoal) = (self.free, self.isSubgoal)
+        self.views = (
+            (free, isSubgoal, lambda r, c: (r, c), lambda i, j: (i, j)),
+            (free[::-1], isSubgoal[::-1],
+             lambda r, c: (rows - 1 - r, c), lambda i, j: (rows - 1 - i, j)),
+            (free.T, isSubgoal.T, lambda r, c: (c, r), lambda i, j: (j, i)),
+            (free.T[::-1], isSubgoal.T[::-1],
+             lambda r, c: (cols - 1 - c, r), lambda i, j: (j, cols - 1 - i)),
+        )
+        self.subgoals = [(int(r), int(c)) for (r, c) in zip(*np.nonzero(self.isSubgoal))]
+        self.edges = {subgoal: self.reachableSubgoals(subgoal) for subgoal in self.subgoals}
+        self.preprocessSeconds = time.perf_counter() - startTime
+
+    def stats(self):
+        return {
+            'subgoals': len(self.subgoals),
+            'edges': sum(len(links) for links in self.edges.values()) // 2,
+            'preprocessSeconds': self.preprocessSeconds,
+        }
+
+    def findSubgoals(self):
+        """
+        A free cell is a subgoal when a run of walls around it ends on an
+        orthogonal neighbour, or is a single diagonal neighbour: the cell is then
+        at the end of an obstacle and a path may have to turn there. The border
+        counts as wall, so walls touching it have no false ends.
+        """
+
+        blocked = np.ones((self.rows + 2, self.cols + 2), dtype=bool)
+        blocked[1:-1, 1:-1] = ~self.free
+        ring = [blocked[1 + dr:self.rows + 1 + dr, 1 + dc:self.cols + 1 + dc] for (dr, dc) in RING]
+        subgoal = np.zeros((self.rows, self.cols), dtype=bool)
+        for k in range(8):
+            before = ring[k - 1]
+            here = ring[k]
+            after = ring[(k + 1) % 8]
+            if k % 2 == 0:
+                # a run of walls starts or stops on this orthogonal neighbour
+                subgoal |= here & ~(before & after)
+            else:
+                # a lone wall on this diagonal neighbour
+                subgoal |= here & ~before & ~after
+        return subgoal & self.free
+
+    def reachableSubgoals(self, position):
+        """
+        Subgoals directly h-reachable from position, as (subgoal, distance)
+        Each view is swept row by row: the cells reachable in k moves that all
+        advance one row are the cells reachable in k - 1 moves, spread by one
+        column either way and masked by the free cells of the next row. A
+        subgoal that some such path reaches through another subgoal is left out,
+        since the two shorter links already cover it.
+        """
+
+        found = {}
+        for (free, isSubgoal, toView, toMaze) in self.views:
+            (height, width) = free.shape
+            (i, j) = toView(*position)
+            reach = np.zeros(width, dtype=bool)
+            reach[j] = True
+            # cells reached through a subgoal on the way
+            through = np.zeros(width, dtype=bool)
+            for row in range(i + 1, height):
+                reach = spread(reach) & free[row]
+                through = spread(through) & free[row]
+                hits = reach & isSubgoal[row] & ~through
+                for col in np.flatnonzero(hits).tolist():
+                    found[toMaze(row, col)] = row - i
+                through |= reach & isSubgoal[row]
+                if not (reach & ~through).any():
+                    break
+        found.pop(position, None)
+        return list(found.items())
+
+    def hPath(self, a, b):
+        """The cells of a path of length chebyshev(a, b) from a to b, or None if there is none"""
+        (dr, dc) = (b[0] - a[0], b[1] - a[1])
+        if abs(dr) >= abs(dc):
+            view = self.views[0] if dr >= 0 else self.views[1]
+        else:
+            view = self.views[2] if dc > 0 else self.views[3]
+        (free, _, toView, toMaze) = view
+        (i, j) = toView(*a)
+        (targetRow, targetCol) = toView(*b)
+        width = free.shape[1]
+        reach = np.zeros(width, dtype=bool)
+        reach[j] = True
+        layers = [reach]
+        for row in range(i + 1, targetRow + 1):
+            reach = spread(reach) & free[row]
+            layers.append(reach)
+        if not reach[targetCol]:
+            return None
+        # walk back through the layers: every reached cell leads back to the start
+        path = [b]
+        col = targetCol
+        for row in range(targetRow - 1, i - 1, -1):
+            layer = layers[row - i]
+            for step in (0, -1, 1):
+                if 0 <= col + step < width and layer[col + step]:
+                    col += step
+                    break
+            path.append(toMaze(row, col))
+        return path[::-1]
+
+    def walkable(self, position):
+        (row, col) = position
+        return 0 <= row < self.rows and 0 <= col < self.cols and bool(self.free[row, col])
+
+    def findPath(self, start, end, stats = None):
+        """
+        Returns a list of tuples as a shortest path from start to end, or None
+        :param start:
+        :param end:
+        :param stats: optional dict that receives the subgoal graph nodes expanded
+        :return:
+        """
+
+        if not (self.walkable(start) and self.walkable(end)):
+            warn("Couldn't get a path to destination")
+            return None
+        direct = self.hPath(start, end)
+        if direct is not None:
+            if stats is not None:
+                stats['expanded'] = 0
+            return direct
+
+        # link start and end into the graph for this query only
+        startLinks = self.edges[start] if start in self.edges else self.reachableSubgoals(start)
+        endLinks = dict(self.edges[end] if end in self.edges else self.reachableSubgoals(end))
+
+        g = {start: 0}
+        parent = {start: None}
+        closed = set()
+        open_list = [(chebyshev(start, end), 0, start)]
+        expanded = 0
+        while open_list:
+            (f, negG, current) = heapq.heappop(open_list)
+            if current in closed:
+                continue
+            closed.add(current)
+            expanded += 1
+            if current == end:
+                break
+            links = startLinks if current == start else self.edges.get(current, ())
+            if current in endLinks:
+                links = list(links) + [(end, endLinks[current])]
+            for (child, cost) in links:
+                childG = g[current] + cost
+                if child not in closed and childG < g.get(child, float('inf')):
+                    g[child] = childG
+                    parent[child] = current
+                    heapq.heappush(open_list, (childG + chebyshev(child, end), -childG, child))
+
+        if stats is not None:
+            stats['expanded'] = expanded
+        if end not in closed:
+            warn("Couldn't get a path to destination")
+            return None
+
+        # refine every subgoal to subgoal edge back into cells
+        waypoints = []
+        current = end
+        while current is not None:
+            waypoints.append(current)
+            current = parent[current]
+        waypoints.reverse()
+        path = [start]
+        for (a, b) in zip(waypoints, waypoints[1:]):
+            path.extend(self.hPath(a, b)[1:])
+        return path
+
+
+def astar(maze, start, end, allow_diagonal_movement = True):
+    """
+    astarFix.astar through a subgoal graph; returns a list of tuples or None
+    Pass a SubgoalGraph built once instead of the maze to reuse the preprocessing.
+    Without diagonal moves the query runs on a compiled maze instead.
+    :param maze: a 0/1 maze or a SubgoalGraph
+    :param start:
+    :param end:
+    :param allow_diagonal_movement:
+    :return:
+    """
+
+    if not allow_diagonal_movement:
+        if isinstance(maze, SubgoalGraph):
+            maze = (~maze.free).astype(np.uint8).tolist()
+        (path, totalNodes) = astarCompiled(CompiledMaze.fromOccupancy(maze), start, end, 1)
+        return path or None
+    graph = maze if isinstance(maze, SubgoalGraph) else SubgoalGraph(maze)
+    return graph.findPath(start, end)
+
+
+def main():
+    from mazeGenerators import generate, toOccupancy, pickEndpoints
+    from wavefront import wavefrontBFS
+
+    maze = [
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+    ]
+    print(f'Path found:\n{astar(maze, (0, 0), (7, 6))}')
+
+    terrain = generate('terrain', 256, 256, seed=5)
+    occupancy = toOccupancy(terrain)
+    graph = SubgoalGraph(occupancy)
+    print(f'Preprocessing:\n{graph.stats()}')
+    queries = pickEndpoints(terrain, 50, seed=5)
+    startTime = time.perf_counter()
+    expanded = 0
+    for (start, end) in queries:
+        stats = {}
+        graph.findPath(start, end, stats)
+        expanded += stats['expanded']
+    seconds = time.perf_counter() - startTime
+    print(f'Subgoal graph queries:\n{seconds} ({expanded} subgoals expanded)')
+    compiled = CompiledMaze(terrain.tolist())
+    startTime = time.perf_counter()
+    expanded = sum(astarCompiled(compiled, start, end, 2, True)[1] for (start, end) in queries)
+    print(f'Compiled A* queries:\n{time.perf_counter() - startTime} ({expanded} nodes created)')
+    startTime = time.perf_counter()
+    for (start, end) in queries:
+        wavefrontBFS(occupancy, start, end, True)
+    print(f'Wavefront BFS queries:\n{time.perf_counter() - startTime}')
+
+
+if __name__ == '__main__':
+    main()
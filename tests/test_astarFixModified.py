@@ -0,0 +1,70 @@
+"""
+The reference engine: the test matrix in and out of a process pool, and the
+queries the budget and region options turn down before searching
+"""
+from warnings import catch_warnings, simplefilter
+
+import pytest
+
+from pathfinding.engines import loadScript
+
+astarModule = loadScript('astarFix-modified')
+
+MAZE = [
+    [2, 0, 2, 0, 2, 0, 0, 2, 2, 0],
+    [1, 2, 3, 5, 2, 1, 2, 5, 1, 2],
+    [2, 0, 2, 2, 1, 2, 1, 2, 4, 2],
+    [2, 0, 1, 0, 1, 1, 1, 0, 0, 1],
+    [1, 1, 0, 0, 5, 0, 3, 2, 2, 2],
+    [2, 2, 2, 2, 1, 0, 1, 2, 1, 0],
+    [1, 0, 2, 1, 3, 1, 4, 3, 0, 1],
+    [2, 0, 5, 1, 5, 2, 1, 2, 4, 1],
+    [1, 2, 2, 2, 0, 2, 0, 1, 1, 0],
+    [5, 1, 2, 1, 1, 1, 2, 0, 1, 2]
+]
+START = (1, 2)
+END = (8, 8)
+
+def withoutTimes(results):
+    return [{key: value for (key, value) in result.items() if key != 'seconds'} for result in results]
+
+def astar(*args, **kwargs):
+    with catch_warnings():
+        simplefilter('ignore')
+        return astarModule.astar(*args, **kwargs)
+
+def testMatrixIsTheSameInAPool():
+    with catch_warnings():
+        simplefilter('ignore')
+        serial = astarModule.runMatrix(workers=1, seed=5)
+    pooled = astarModule.runMatrix(workers=2, seed=5)
+    assert withoutTimes(serial) == withoutTimes(pooled)
+    assert [(result['scenario'], result['heuristic']) for result in pooled] == \
+        [(scenario, heuristic) for scenario in range(len(astarModule.SCENARIOS)) for heuristic in (1, 2, 3, 4)]
+
+@pytest.mark.parametrize('options', (
+    {'bounds': (0, 0, 5, 5)},
+    {'bounds': (2, 3, 9, 9)},
+    {'region': [[(r, c) != END for c in range(10)] for r in range(10)]},
+    {'region': [[(r, c) != START for c in range(10)] for r in range(10)]},
+))
+def testEndpointsOutsideTheRegionFailWithoutSearching(options):
+    stats = {}
+    assert astar(MAZE, START, END, 2, stats=stats, **options) == ([], 0)
+    assert stats == {'expanded': 0, 'budgetExhausted': False}
+
+def testBudgetBelowTheDistanceFailsWithoutSearching():
+    stats = {}
+    # the end is 13 moves away, each costing at least 1
+    assert astar(MAZE, START, END, 2, stats=stats, maxCost=12) == ([], 0)
+    assert stats == {'expanded': 0, 'budgetExhausted': True}
+
+def testBudgetOfTheCheapestPathStillFindsIt():
+    (path, _) = astar(MAZE, START, END, 2)
+    cost = sum(MAZE[r][c] for (r, c) in path[1:])
+    stats = {}
+    (budgeted, _) = astar(MAZE, START, END, 2, stats=stats, maxCost=cost)
+    assert sum(MAZE[r][c] for (r, c) in budgeted[1:]) == cost
+    stats = {}
+    assert astar(MAZE, START, END, 2, stats=stats, maxCost=cost - 1)[0] == []
+    assert stats['budgetExhausted'] is True
@@ -0,0 +1,180 @@
+"""
+Every engine of the pathfinding facade against a plain Dijkstra on small seeded mazes
+"""
+import heapq
+import math
+from warnings import catch_warnings, simplefilter
+
+import pytest
+
+import pathfinding
+from astarCommon import adjacentSquares
+from astarTheta import LineOfSight, pathLength
+from mazeGenerators import generate, pickEndpoints, toOccupancy
+from movementModels import getMovement
+
+SEEDS = (1, 2, 3)
+QUERIES = 6
+
+def dijkstra(maze, start, end, allow_diagonal_movement, weighted = True, cutsCorners = True, diagonalCost = 1):
+    """
+    Cost of the cheapest path, or None; a move costs the cell it enters, or 1 on a 0/1 maze
+    diagonalCost multiplies the cost of diagonal moves.
+    """
+    rows = len(maze)
+    cols = len(maze[0])
+    walkable = (lambda r, c: maze[r][c] != 0) if weighted else (lambda r, c: maze[r][c] == 0)
+    dist = {start: 0}
+    heap = [(0, start)]
+    while heap:
+        (d, (r, c)) = heapq.heappop(heap)
+        if (r, c) == end:
+            return d
+        if d > dist[(r, c)]:
+            continue
+        for (dr, dc) in adjacentSquares(allow_diagonal_movement):
+            (nr, nc) = (r + dr, c + dc)
+            if not (0 <= nr < rows and 0 <= nc < cols and walkable(nr, nc)):
+                continue
+            if dr and dc and not cutsCorners and not (walkable(r + dr, c) and walkable(r, c + dc)):
+                continue
+            nd = d + (maze[nr][nc] if weighted else 1) * (diagonalCost if dr and dc else 1)
+            if nd < dist.get((nr, nc), math.inf):
+                dist[(nr, nc)] = nd
+                heapq.heappush(heap, (nd, (nr, nc)))
+    return None
+
+def cases():
+    for seed in SEEDS:
+        weighted = generate('random', 14, 14, seed, density=0.25, maxCost=5).tolist()
+        for (start, end) in pickEndpoints(weighted, QUERIES, seed=seed):
+            yield (weighted, start, end)
+
+def checkSteps(maze, path, start, end, allow_diagonal_movement, weighted):
+    assert path[0] == start and path[-1] == end
+    for (r, c) in path:
+        assert (maze[r][c] != 0) if weighted else (maze[r][c] == 0)
+    for (a, b) in zip(path, path[1:]):
+        assert (b[0] - a[0], b[1] - a[1]) in adjacentSquares(allow_diagonal_movement)
+
+def query(maze, start, end, engine, allow_diagonal_movement):
+    # Manhattan distance overestimates once diagonal moves are allowed
+    heuristic = 1 if allow_diagonal_movement else 2
+    with catch_warnings():
+        simplefilter('ignore')
+        return pathfinding.astar(maze, start, end, heuristic, allow_diagonal_movement, engine)[0]
+
+WEIGHTED = [name for name in pathfinding.availableEngines() if pathfinding.model(name) == 'weighted']
+OPTIMAL_OCCUPANCY = [name for name in ('wavefront', 'subgoal') if name in pathfinding.availableEngines()]
+
+@pytest.mark.parametrize('allow_diagonal_movement', (False, True))
+@pytest.mark.parametrize('engine', WEIGHTED)
+def testWeightedEnginesFindCheapestPaths(engine, allow_diagonal_movement):
+    for (maze, start, end) in cases():
+        expected = dijkstra(maze, start, end, allow_diagonal_movement)
+        path = query(maze, start, end, engine, allow_diagonal_movement)
+        if expected is None:
+            assert path == []
+            continue
+        checkSteps(maze, path, start, end, allow_diagonal_movement, True)
+        assert sum(maze[r][c] for (r, c) in path[1:]) == expected
+
+@pytest.mark.parametrize('allow_diagonal_movement', (False, True))
+@pytest.mark.parametrize('engine', OPTIMAL_OCCUPANCY)
+def testOccupancyEnginesFindShortestPaths(engine, allow_diagonal_movement):
+    for (weighted, start, end) in cases():
+        maze = toOccupancy(weighted).tolist()
+        expected = dijkstra(maze, start, end, allow_diagonal_movement, weighted=False)
+        path = query(maze, start, end, engine, allow_diagonal_movement)
+        if expected is None:
+            assert path == []
+            continue
+        checkSteps(maze, path, start, end, allow_diagonal_movement, False)
+        assert len(path) - 1 == expected
+
+@pytest.mark.parametrize('allow_diagonal_movement', (False, True))
+def testOccupancyEngineFindsValidPaths(allow_diagonal_movement):
+    # astarFix ranks nodes by squared distance and gives up after a fixed number
+    # of iterations, so its paths are only checked for being paths
+    for (weighted, start, end) in cases():
+        maze = toOccupancy(weighted).tolist()
+        expected = dijkstra(maze, start, end, allow_diagonal_movement, weighted=False)
+        path = query(maze, start, end, 'occupancy', allow_diagonal_movement)
+        if expected is None:
+            assert path == []
+        elif path:
+            checkSteps(maze, path, start, end, allow_diagonal_movement, False)
+            assert len(path) - 1 >= expected
+
+@pytest.mark.parametrize('allow_diagonal_movement', (False, True))
+def testThetaFindsVisibleWaypoints(allow_diagonal_movement):
+    for (weighted, start, end) in cases():
+        maze = toOccupancy(weighted).tolist()
+        # theta never squeezes a diagonal step past a wall corner
+        expected = dijkstra(maze, start, end, allow_diagonal_movement, weighted=False, cutsCorners=False,
+                            diagonalCost=math.sqrt(2))
+        path = query(maze, start, end, 'theta', allow_diagonal_movement)
+        if expected is None:
+            assert path == []
+            continue
+        los = LineOfSight(maze)
+        assert path[0] == start and path[-1] == end
+        assert all(los(a, b) for (a, b) in zip(path, path[1:]))
+        # straight segments are never longer than the grid moves they replace
+        assert pathLength(path) <= expected + 1e-9
+
+def testPreparedStructuresGiveTheSameCosts():
+    for (maze, start, end) in cases():
+        expected = dijkstra(maze, start, end, False)
+        for engine in ('compiled', 'pruned', 'graph'):
+            prepared = pathfinding.prepare(maze, engine)
+            path = query(prepared, start, end, engine, False)
+            assert (sum(maze[r][c] for (r, c) in path[1:]) if path else None) == expected
+
+@pytest.mark.parametrize('movement', ('octile', 'octile-no-corners'))
+@pytest.mark.parametrize('engine', [name for name in pathfinding.movementEngines() if name in WEIGHTED])
+def testMovementEnginesFindCheapestPaths(engine, movement):
+    # octile costs 70 per straight and 99 per diagonal move, times the cell entered
+    for (maze, start, end) in cases():
+        expected = dijkstra(maze, start, end, True, cutsCorners=movement == 'octile', diagonalCost=99 / 70)
+        queries = [(maze, {'movement': movement})]
+        if engine in ('pruned', 'graph'):
+            # these build the movement into what prepare() returns
+            queries.append((pathfinding.prepare(maze, engine, movement=movement), {}))
+        for (searched, options) in queries:
+            with catch_warnings():
+                simplefilter('ignore')
+                path = pathfinding.astar(searched, start, end, 2, engine=engine, **options)[0]
+            if expected is None:
+                assert path == []
+                continue
+            checkSteps(maze, path, start, end, True, True)
+            assert getMovement(movement).pathCost(maze, path) == pytest.approx(70 * expected)
+
+@pytest.mark.parametrize('engine', ('idastar', 'fringe', 'subgoal', 'theta'))
+def testOtherEnginesRejectMovement(engine):
+    maze = generate('random', 8, 8, 1).tolist()
+    if pathfinding.model(engine) == 'occupancy':
+        maze = toOccupancy(maze).tolist()
+    (start, end) = pickEndpoints(maze, 1, seed=1)[0]
+    with pytest.raises(ValueError, match='does not take a movement model'):
+        pathfinding.astar(maze, start, end, engine=engine, movement='octile')
+
+def testPreparedMovementIsFixed():
+    maze = generate('random', 8, 8, 1).tolist()
+    (start, end) = pickEndpoints(maze, 1, seed=1)[0]
+    with pytest.raises(ValueError):
+        pathfinding.astar(pathfinding.prepare(maze, 'graph'), start, end, engine='graph', movement='octile')
+    with pytest.raises(ValueError):
+        pathfinding.prepare(maze, 'compiled', movement='octile')
+
+def testSubgoalRejectsFourConnectedPreparation():
+    maze = toOccupancy(generate('random', 8, 8, 1)).tolist()
+    with pytest.raises(ValueError):
+        pathfinding.prepare(maze, 'subgoal', allow_diagonal_movement=False)
+
+def testUnknownOptionsRaise():
+    maze = generate('random', 8, 8, 1).tolist()
+    (start, end) = pickEndpoints(maze, 1, seed=1)[0]
+    with pytest.raises(TypeError):
+        pathfinding.astar(maze, start, end, engine='idastar', tracer=object())
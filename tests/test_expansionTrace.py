@@ -0,0 +1,44 @@
+"""
+Traces written by dump() and read back by readTrace()
+"""
+from compiledMaze import CompiledMaze, astarCompiled
+from expansionTrace import BEGIN, END, POP, PUSH, ExpansionTracer, readTrace
+from mazeGenerators import generate, pickEndpoints
+
+def tracedQueries(capacity, count = 3):
+    maze = generate('random', 20, 20, 4, density=0.25, maxCost=5).tolist()
+    compiled = CompiledMaze(maze)
+    tracer = ExpansionTracer(capacity)
+    queries = pickEndpoints(maze, count, seed=4)
+    results = [astarCompiled(compiled, start, end, 2, tracer=tracer) for (start, end) in queries]
+    return (maze, tracer, queries, results)
+
+def testRoundTrip(tmp_path):
+    (maze, tracer, queries, results) = tracedQueries(1 << 16)
+    tracer.dump(tmp_path / 'trace.bin')
+    (header, events) = readTrace(tmp_path / 'trace.bin')
+    assert not header['full']
+    assert header['count'] == len(events) == len(tracer)
+    begins = [i for (i, event) in enumerate(events) if event[0] == BEGIN]
+    assert len(begins) == len(queries)
+    for (first, ((start, end), (path, _))) in zip(begins, zip(queries, results)):
+        assert events[first][1] == start
+        # a query's events run to its end record
+        last = next(i for i in range(first, len(events)) if events[i][0] == END)
+        assert all(event[0] in (PUSH, POP) for event in events[first + 1:last])
+        assert events[last][1] == end
+        if path:
+            assert events[last][2] == sum(maze[r][c] for (r, c) in path[1:])
+        else:
+            assert events[last][3] == -1
+
+def testFullRingKeepsTheNewestRecords(tmp_path):
+    (_, whole, _, _) = tracedQueries(1 << 16)
+    whole.dump(tmp_path / 'whole.bin')
+    (_, expected) = readTrace(tmp_path / 'whole.bin')
+    (_, ring, _, _) = tracedQueries(50)
+    ring.dump(tmp_path / 'ring.bin')
+    (header, events) = readTrace(tmp_path / 'ring.bin')
+    assert header['full'] and header['count'] == 50
+    # cells map back to positions with the layout of the last query, the same for all three here
+    assert events == expected[-50:]
@@ -0,0 +1,113 @@
+"""
+Vectorised breadth-first search for the unit-cost 0/1 mazes of astarFix
+
+With every move costing 1, shortest paths are just BFS layers. Each step here
+expands the whole frontier at once with NumPy: the neighbours of all frontier
+cells are formed with one broadcast add of the offset table, filtered against
+the walkable and unvisited masks and deduplicated without sorting. The path is
+recovered afterwards by walking the layer numbers back from the end.
+0 is walkable terrain and anything else is a wall, as in astarFix.
+"""
+from warnings import warn
+
+import numpy as np
+
+from astarCommon import adjacentSquares
+
+def wavefrontBFS(maze, start, end, allow_diagonal_movement = False, stats = None):
+    """
+    Returns a shortest list of tuples from start to end, or None if there is none
+    Diagonal moves are allowed between any two walkable cells, as in astarFix.
+    :param maze:
+    :param start:
+    :param end:
+    :param allow_diagonal_movement:
+    :param stats: optional dict that receives the cells reached and the number of layers
+    :return:
+    """
+
+    grid = np.asarray(maze)
+    (rows, cols) = grid.shape
+    width = cols + 2
+    # pad with walls so neighbour indices never leave the array
+    walkable = np.zeros((rows + 2, width), dtype=bool)
+    walkable[1:-1, 1:-1] = grid == 0
+    unvisited = walkable.ravel().copy()
+    layer = np.full(unvisited.size, -1, dtype=np.int32)
+    offsets = np.array([dy * width + dx for (dy, dx) in adjacentSquares(allow_diagonal_movement)], dtype=np.int64)
+    # scratch array for deduplicating a step's candidates without sorting them
+    owner = np.zeros(unvisited.size, dtype=np.int64)
+
+    startIndex = (start[0] + 1) * width + start[1] + 1
+    endIndex = (end[0] + 1) * width + end[1] + 1
+    if not (unvisited[startIndex] and unvisited[endIndex]):
+        warn("Couldn't get a path to destination")
+        return None
+
+    frontier = np.array([startIndex], dtype=np.int64)
+    unvisited[startIndex] = False
+    layer[startIndex] = 0
+    step = 0
+    reached = 1
+    while frontier.size and unvisited[endIndex]:
+        step += 1
+        candidates = (frontier[:, None] + offsets[None, :]).ravel()
+        candidates = candidates[unvisited[candidates]]
+        # several frontier cells can share a neighbour: keep the last writer only
+        order = np.arange(candidates.size)
+        owner[candidates] = order
+        frontier = candidates[owner[candidates] == order]
+        unvisited[frontier] = False
+        layer[frontier] = step
+        reached += frontier.size
+
+    if stats is not None:
+        stats['expanded'] = reached
+        stats['layers'] = step
+
+    if unvisited[endIndex]:
+        warn("Couldn't get a path to destination")
+        return None
+
+    # walk back down the layers: any neighbour one layer closer will do
+    path = [end]
+    current = endIndex
+    for depth in range(layer[endIndex] - 1, -1, -1):
+        for offset in offsets.tolist():
+            if layer[current - offset] == depth:
+                current -= offset
+                break
+        path.append((current // width - 1, current % width - 1))
+    return path[::-1]
+
+
+def main():
+    import time
+    from compiledMaze import CompiledMaze, astarCompiled
+    from mazeGenerators import generate, toOccupancy
+
+    maze = toOccupancy(generate('random', 400, 400, seed=3, density=0.2))
+    maze[0, 0] = maze[-1, -1] = 0
+    start = (0, 0)
+    end = (399, 399)
+
+    for diagonal in (False, True):
+        stats = {}
+        startTime = time.perf_counter()
+        path = wavefrontBFS(maze, start, end, diagonal, stats)
+        endTime = time.perf_counter()
+        print(f'{"8" if diagonal else "4"}-connected')
+        print(f'Path length:\n{len(path) if path else "NULL"}')
+        print(f'Cells reached:\n{stats["expanded"]}')
+        print(f'Execution time:\n{endTime - startTime}')
+        print()
+
+    # the same query through the fastest heap based search for comparison
+    compiled = CompiledMaze.fromOccupancy(maze.tolist())
+    startTime = time.perf_counter()
+    (path, totalNodes) = astarCompiled(compiled, start, end)
+    print(f'Heap A* on a compiled maze, 4-connected:\n{time.perf_counter() - startTime}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+"""
+Tours through many waypoints of a weighted maze
+
+A tour takes three phases:
+1. The matrix: one Dijkstra per waypoint that stops once every other waypoint
+   is settled, instead of a separate A* per pair. Matrices are cached per
+   waypoint list until the maze changes.
+2. The order: nearest neighbour, then 2-opt until no reversal of a stretch of
+   the tour makes it cheaper.
+3. The stitch: one search per leg of the chosen order joins the legs into one
+   path of cells.
+
+Costs need not be symmetric (a move costs the cell it enters), and 2-opt
+accounts for that. Cells are the cost of entering them and 0 is a wall, as in
+astarFix-modified.
+"""
+from collections import OrderedDict
+from warnings import warn
+import heapq
+import math
+import time
+
+from compiledMaze import CompiledMaze, astarCompiled
+from movementModels import getMovement
+
+def oneToMany(compiled, source, targets, steps):
+    """
+    Cost from flat index source to every one of targets it reaches: Dijkstra until all are settled
+    steps are the (offset, multiplier, sideA, sideB) of a movement model, see MovementModel.steps.
+    """
+    cells = compiled.cells
+    remaining = set(targets)
+    remaining.discard(source)
+    found = {source: 0}
+    dist = {source: 0}
+    heap = [(0, source)]
+    while heap and remaining:
+        (d, index) = heapq.heappop(heap)
+        if d > dist[index]:
+            continue
+        if index in remaining:
+            remaining.discard(index)
+            found[index] = d
+        for (offset, multiplier, sideA, sideB) in steps:
+            child = index + offset
+            cost = cells[child]
+            if cost == 0 or (sideA and (cells[index + sideA] == 0 or cells[index + sideB] == 0)):
+                continue
+            childD = d + cost * multiplier
+            if childD < dist.get(child, math.inf):
+                dist[child] = childD
+                heapq.heappush(heap, (childD, child))
+    return found
+
+def tourCost(matrix, order, closed = True):
+    legs = list(zip(order, order[1:]))
+    if closed and len(order) > 1:
+        legs.append((order[-1], order[0]))
+    return sum(matrix[a][b] for (a, b) in legs)
+
+def nearestNeighbour(matrix, first = 0):
+    """An order of every waypoint that always moves on to the cheapest one not visited yet"""
+    left = set(range(len(matrix)))
+    left.discard(first)
+    order = [first]
+    while left:
+        row = matrix[order[-1]]
+        nearest = min(left, key=lambda b: row[b])
+        left.discard(nearest)
+        order.append(nearest)
+    return order
+
+def twoOpt(matrix, order, closed = True):
+    """
+    Reverses stretches of order while that makes the tour cheaper; the first waypoint stays first
+    A reversed stretch is walked backwards, so its own cost changes too when the
+    matrix is not symmetric: prefix sums of both directions give it in O(1).
+    """
+
+    if len(order) < 3:
+        return list(order)
+    # a closed tour ends back on its first waypoint, which never moves
+    tour = list(order) + [order[0]] if closed else list(order)
+    last = len(tour) - 1 if closed else len(tour)
+    improved = True
+    while improved:
+        improved = False
+        forward = [0]
+        backward = [0]
+        for (a, b) in zip(tour, tour[1:]):
+            forward.append(forward[-1] + matrix[a][b])
+            backward.append(backward[-1] + matrix[b][a])
+        for i in range(1, last - 1):
+            before = tour[i - 1]
+            for j in range(i + 1, last):
+                delta = (matrix[before][tour[j]] - matrix[before][tour[i]]
+                         + backward[j] - backward[i] - (forward[j] - forward[i]))
+                if j + 1 < len(tour):
+                    after = tour[j + 1]
+                    delta += matrix[tour[i]][after] - matrix[tour[j]][after]
+                if delta < -1e-9:
+                    tour[i:j + 1] = tour[i:j + 1][::-1]
+                    improved = True
+                    break
+            if improved:
+                break
+    return tour[:-1] if closed else tour
+
+
+class TourPlanner:
+    """
+    Waypoint tours on one maze, with distance matrices cached between tours
+    version counts the changes made through updateCells(); a change drops
+    every cached matrix.
+    """
+
+    def __init__(self, maze, allow_diagonal_movement = False, cacheSize = 16, movement = None):
+        """
+        :param maze: a CompiledMaze or a weighted maze
+        :param allow_diagonal_movement:
+        :param cacheSize: distance matrices kept
+        :param movement: a movementModels model or model name; its moves and move costs
+            replace allow_diagonal_movement
+        """
+
+        self.compiled = maze if isinstance(maze, CompiledMaze) else CompiledMaze(maze)
+        self.allow_diagonal_movement = allow_diagonal_movement
+        self.movement = movement
+        self.steps = getMovement(movement, allow_diagonal_movement).steps(self.compiled.width)
+        self.cacheSize = cacheSize
+        self.matrices = OrderedDict()
+        self.version = 0
+
+    def updateCells(self, changes):
+        """Sets the cost of cells; changes is an iterable of ((row, col), cost)"""
+        for (position, cost) in changes:
+            self.compiled.cells[self.compiled.index(position)] = cost
+        self.version += 1
+        self.matrices.clear()
+
+    def distanceMatrix(self, waypoints):
+        """matrix[a][b] is the cost from waypoints[a] to waypoints[b], math.inf where there is no path"""
+        key = (self.version, tuple(waypoints))
+        matrix = self.matrices.get(key)
+        if matrix is not None:
+            self.matrices.move_to_end(key)
+            return matrix
+        indices = [self.compiled.index(waypoint) for waypoint in waypoints]
+        matrix = []
+        for source in indices:
+            found = oneToMany(self.compiled, source, indices, self.steps)
+            matrix.append([found.get(target, math.inf) for target in indices])
+        self.matrices[key] = matrix
+        if len(self.matrices) > self.cacheSize:
+            self.matrices.popitem(last=False)
+        return matrix
+
+    def leg(self, start, end):
+        if self.movement is not None:
+            return astarCompiled(self.compiled, start, end, 2, movement=self.movement)[0]
+        # Manhattan distance overestimates diagonal moves, so those legs run without a heuristic
+        heuristic = 1 if self.allow_diagonal_movement else 2
+        return astarCompiled(self.compiled, start, end, heuristic, self.allow_diagonal_movement)[0]
+
+    def plan(self, waypoints, closed = True):
+        """
+        Returns (path, order, timings) for a tour of waypoints starting at waypoints[0]
+        path is every cell of the tour, back to the start when closed; order is
+        the visiting order as indices of waypoints; timings holds the seconds
+        spent on the matrix, the ordering and the stitching, and the tour's cost.
+        path is [] if some waypoint cannot be reached. No waypoints give an
+        empty tour and a single one the tour that stays on it.
+        :param waypoints:
+        :param closed: return to the first waypoint at the end
+        :return:
+        """
+
+        timings = {}
+        if len(waypoints) < 2:
+            timings['matrixSeconds'] = timings['orderSeconds'] = timings['stitchSeconds'] = 0.0
+            timings['cost'] = 0
+            return (list(waypoints), list(range(len(waypoints))), timings)
+
+        startTime = time.perf_counter()
+        matrix = self.distanceMatrix(waypoints)
+        timings['matrixSeconds'] = time.perf_counter() - startTime
+
+        startTime = time.perf_counter()
+        if any(math.isinf(cost) for row in matrix for cost in row):
+            timings['orderSeconds'] = timings['stitchSeconds'] = 0.0
+            timings['cost'] = -1
+            warn("Couldn't get a path to destination")
+            return ([], [], timings)
+        order = nearestNeighbour(matrix)
+        timings['nearestNeighbourCost'] = tourCost(matrix, order, closed)
+        order = twoOpt(matrix, order, closed)
+        timings['cost'] = tourCost(matrix, order, closed)
+        timings['orderSeconds'] = time.perf_counter() - startTime
+
+        startTime = time.perf_counter()
+        stops = [waypoints[i] for i in order] + ([waypoints[order[0]]] if closed else [])
+        path = [stops[0]]
+        for (a, b) in zip(stops, stops[1:]):
+            path.extend(self.leg(a, b)[1:])
+        timings['stitchSeconds'] = time.perf_counter() - startTime
+        return (path, order, timings)
+
+
+def main():
+    import random
+    from mazeGenerators import generate
+
+    terrain = generate('terrain', 128, 128, seed=4)
+    maze = terrain.tolist()
+    walkable = [(r, c) for r in range(len(maze)) for c in range(len(maze[0])) if maze[r][c] != 0]
+    rng = random.Random(4)
+    waypoints = rng.sample(walkable, 40)
+
+    planner = TourPlanner(maze)
+    (path, order, timings) = planner.plan(waypoints)
+    print(f'Tour of {len(waypoints)} waypoints, {len(path)} cells:\n{timings}')
+    (path, order, timings) = planner.plan(waypoints)
+    print(f'Same waypoints again, matrix cached:\n{timings}')
+
+    startTime = time.perf_counter()
+    for a in waypoints[:10]:
+        for b in waypoints:
+            if a != b:
+                astarCompiled(planner.compiled, a, b)
+    seconds = time.perf_counter() - startTime
+    print(f'Pairwise A* for comparison (10 of {len(waypoints)} rows):\n{seconds} ({seconds * len(waypoints) / 10} for all)')
+
+
+if __name__ == '__main__':
+    main()